@@ -2,16 +2,25 @@
 from .paths import *
 from .crawler import *
 from .api import *
+from .analysis import *
 from .logging_config import *
 
 __all__ = [
     # paths
-    'PROJECT_ROOT', 'RAW_DATA_DIR', 'PROCESSED_DATA_DIR', 'DICT_DIR', 'WEB_DIR',
-    'TEACHER_DICT_PATH', 'TEACHER_DICT_AUTO_PATH', 'TEACHER_HIGH_RISK_PATH',
+    'PROJECT_ROOT', 'RAW_DATA_DIR', 'PROCESSED_DATA_DIR', 'PARTITION_CACHE_DIR', 'PARTITIONED_DATA_DIR', 'CLUSTER_DIR', 'CHART_DIR', 'FEATURE_DIR', 'FORECAST_DIR', 'SIMILAR_DIR', 'TEACHER_PROFILE_DIR', 'SQLITE_DIR', 'PIPELINE_STATE_PATH', 'API_STATE_DIR', 'DICT_DIR', 'SNAPSHOT_DIR', 'SYNTHETIC_DATA_DIR',
+    'WEB_DIR',
+    'TEACHER_DICT_PATH', 'TEACHER_DICT_AUTO_PATH', 'TEACHER_HIGH_RISK_PATH', 'DEPARTMENT_MAPPING_PATH',
     # crawler
     'BASE_URL', 'BASE_DOMAIN', 'START_YEAR', 'START_SEMESTER', 'END_YEAR', 'END_SEMESTER', 'CLS_BRANCH', 'HTML_PARSER',
+    'SNAPSHOT_INTERVAL',
     # api
-    'API_HOST', 'API_PORT',
+    'API_HOST', 'API_PORT', 'API_PARTITION_MEMORY_MB', 'API_BACKEND', 'API_SQLITE_POOL_SIZE',
+    # analysis
+    'CLUSTER_K', 'CLUSTER_RANDOM_STATE', 'CLUSTER_N_INIT', 'CLUSTER_MIN_SAMPLES', 'CLUSTER_MIN_SELECTED_SHARE',
+    'FORECAST_DECAY', 'FORECAST_SAME_TERM_WEIGHT', 'FORECAST_PRIOR_WEIGHT',
+    'SIMILAR_TOP_K', 'SIMILAR_NGRAM_RANGE', 'SIMILAR_BLOCK_CELLS',
+    'TEACHER_TOP_SLOTS', 'TEACHER_TOP_COTEACHERS',
+    'CHART_CATEGORY', 'CHART_DPI',
     # logging
     'LOG_DIR', 'LOG_FILE', 'LOG_LEVEL', 'LOG_FORMAT'
 ]
@@ -0,0 +1,33 @@
+# 選課行為分群設定
+CLUSTER_K = 4
+CLUSTER_RANDOM_STATE = 42
+CLUSTER_N_INIT = 10
+# 單一 (學年度, 學期, 分類) 可分析課程數少於此值時不分群
+CLUSTER_MIN_SAMPLES = 12
+# 選上人數大於 0 的開課班比例低於此值的學期視為尚無選上資料（仍在選課中），不分群
+CLUSTER_MIN_SELECTED_SHARE = 0.5
+
+# 選課需求預測設定
+# 歷年登記/上限比每早一個學期權重乘上的衰減係數
+FORECAST_DECAY = 0.7
+# 與目標學期同為上學期或下學期的開課紀錄權重倍數
+FORECAST_SAME_TERM_WEIGHT = 2.0
+# 先驗（同名課程、全校平均）相當於幾筆開課紀錄的權重
+FORECAST_PRIOR_WEIGHT = 1.0
+
+# 相似課程索引設定
+# 每個開課班保留的相似開課班數
+SIMILAR_TOP_K = 20
+# 課程名稱字元 n-gram 長度範圍
+SIMILAR_NGRAM_RANGE = (2, 3)
+# 分塊計算相似度時每塊的最大格數（列數 x 開課班數），限制記憶體峰值
+SIMILAR_BLOCK_CELLS = 4_000_000
+
+# 教師檔案設定：保留的常見上課時段數與合授教師數
+TEACHER_TOP_SLOTS = 5
+TEACHER_TOP_COTEACHERS = 10
+
+# 分群視覺化設定
+# 繪製哪一個課程分類的分群結果（與 web 介面的分群分析頁面對應）
+CHART_CATEGORY = '核心通識'
+CHART_DPI = 300
@@ -1,3 +1,11 @@
 # API 相關設定
 API_HOST = "localhost"
 API_PORT = 8000
+
+# API 常駐記憶體中學期分區的預算（MB）；最新學期固定常駐，超過預算時淘汰最久未使用的舊學期
+API_PARTITION_MEMORY_MB = 256
+
+# API 資料來源：memory（學期分區載入記憶體）或 sqlite（查詢 sqlite 階段建立的資料庫，常駐記憶體不隨歷年資料成長）
+API_BACKEND = "memory"
+# sqlite 後端的唯讀連線數上限
+API_SQLITE_POOL_SIZE = 4
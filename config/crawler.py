@@ -7,3 +7,6 @@ END_YEAR = 114
 END_SEMESTER = 2
 CLS_BRANCH = ""
 HTML_PARSER = "lxml"
+
+# 選課期間人數快照（秒）
+SNAPSHOT_INTERVAL = 60
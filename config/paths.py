@@ -6,10 +6,34 @@ PROJECT_ROOT = Path(__file__).parent.resolve().parent
 # 資料路徑
 RAW_DATA_DIR = PROJECT_ROOT / "data" / "raw"
 PROCESSED_DATA_DIR = PROJECT_ROOT / "data" / "processed"
+PARTITION_CACHE_DIR = PROCESSED_DATA_DIR / "cache"
+# 依學期分區的處理後資料集（每次處理一個時間戳目錄）
+PARTITIONED_DATA_DIR = PROCESSED_DATA_DIR / "partitions"
+# 選課行為分群結果（檔名時間戳與對應的處理後資料集相同）
+CLUSTER_DIR = PROCESSED_DATA_DIR / "clusters"
+# 分群視覺化圖表（繪製後複製到 web/assets/images）
+CHART_DIR = PROCESSED_DATA_DIR / "charts"
+# 選課競爭特徵表（檔名時間戳與對應的處理後資料集相同）
+FEATURE_DIR = PROCESSED_DATA_DIR / "features"
+# 最新學期的選課需求預測
+FORECAST_DIR = PROCESSED_DATA_DIR / "forecasts"
+# 最新學期的相似課程索引
+SIMILAR_DIR = PROCESSED_DATA_DIR / "similar"
+# 教師跨學期授課檔案
+TEACHER_PROFILE_DIR = PROCESSED_DATA_DIR / "teachers"
+# 嵌入式 SQLite 課程資料庫（API_BACKEND 為 sqlite 時使用）
+SQLITE_DIR = PROCESSED_DATA_DIR / "sqlite"
+# main.py all 各階段上次成功執行時的輸入雜湊
+PIPELINE_STATE_PATH = PROCESSED_DATA_DIR / "pipeline_state.json"
+# API 服務狀態快照（啟動時一次讀入）
+API_STATE_DIR = PROCESSED_DATA_DIR / "api_state"
 DICT_DIR = PROJECT_ROOT / "data" / "dict"
+SNAPSHOT_DIR = PROJECT_ROOT / "data" / "snapshots"
+SYNTHETIC_DATA_DIR = PROJECT_ROOT / "data" / "synthetic"
 WEB_DIR = PROJECT_ROOT / "web"
 
 # 字典檔路徑
 TEACHER_DICT_PATH = DICT_DIR / "teacher.csv"
 TEACHER_DICT_AUTO_PATH = DICT_DIR / "teacher_dict_auto.csv"
 TEACHER_HIGH_RISK_PATH = DICT_DIR / "teacher_high_risk.csv"
+DEPARTMENT_MAPPING_PATH = DICT_DIR / "department_mapping.csv"
@@ -3,7 +3,9 @@
 
 import argparse
 import sys
+import time
 from pathlib import Path
+from typing import Any, Callable, Dict, List
 
 BASE_DIR = Path(__file__).parent
 SRC_DIR = BASE_DIR / "src"
@@ -14,11 +16,103 @@ if str(SRC_DIR) not in sys.path:
 
 from utils.common import setup_logging
 
+def pipeline_stages(args) -> list:
+    """完整流程的階段 DAG：每個階段的依賴、決定是否需要重跑的輸入檔與預期的輸出檔
+
+    資料集相關的檔案一律以 process 階段回傳的資料集版本解析（本次產生的，或略過時上次成功產生的），
+    並以 version 參數傳給下游階段，不讀取磁碟上最新的資料集。
+    """
+    from config import (
+        PROJECT_ROOT, RAW_DATA_DIR, PROCESSED_DATA_DIR, CHART_DIR, API_BACKEND,
+        TEACHER_DICT_PATH, TEACHER_DICT_AUTO_PATH, TEACHER_HIGH_RISK_PATH, DEPARTMENT_MAPPING_PATH
+    )
+    from utils.pipeline import Stage, Values
+    from processor.competition_features import features_path_for
+    from processor.demand_forecast import forecast_path_for
+    from processor.course_similarity import similar_path_for
+    from processor.teacher_profiles import profiles_path_for
+    from processor.course_clustering import clusters_path_for
+    from processor.course_database import database_path_for
+    from api.app import dataset_source, state_sources
+    from api.state import state_is_current, state_path_for
+
+    use_cache = not args.no_cache
+    analysis_config = PROJECT_ROOT / "config" / "analysis.py"
+
+    def raw_files(values: Values) -> List[Path]:
+        return sorted(RAW_DATA_DIR.glob("courses_*.csv"))
+
+    def version(values: Values) -> List[str]:
+        return [values["process"]] if values.get("process") else []
+
+    def courses_file(values: Values) -> List[Path]:
+        return [PROCESSED_DATA_DIR / f"all_courses_{v}.csv" for v in version(values)]
+
+    def dataset_files(values: Values) -> List[Path]:
+        return [PROCESSED_DATA_DIR / f"{prefix}_{v}.csv" for v in version(values)
+                for prefix in ("all_courses", "all_meetings")]
+
+    def dataset(values: Values) -> Dict[str, Any]:
+        return {"version": values.get("process")}
+
+    def derived(path_for) -> Callable[[Values], List[Path]]:
+        return lambda values: [path_for(f) for f in courses_file(values)]
+
+    stages = [
+        Stage("crawl", "crawler.crawler:main", {}, always=True, outputs=raw_files),
+        Stage("build-dict", "processor.teacher_dict_builder:main", {}, deps=("crawl",),
+              inputs=raw_files, outputs=lambda values: [TEACHER_DICT_AUTO_PATH]),
+        Stage("process", "processor.data_processor:main",
+              {"workers": args.workers, "use_cache": use_cache, "chunksize": args.chunksize,
+               "validate": not args.skip_validation},
+              deps=("crawl", "build-dict"),
+              inputs=lambda values: raw_files(values) + [TEACHER_DICT_PATH, TEACHER_DICT_AUTO_PATH,
+                                                         TEACHER_HIGH_RISK_PATH, DEPARTMENT_MAPPING_PATH],
+              outputs=dataset_files),
+        Stage("features", "processor.competition_features:main", {"use_cache": use_cache}, deps=("process",),
+              inputs=courses_file, outputs=derived(features_path_for), bind=dataset),
+        Stage("forecast", "processor.demand_forecast:main", {"use_cache": use_cache}, deps=("process",),
+              inputs=lambda values: courses_file(values) + [analysis_config], outputs=derived(forecast_path_for),
+              bind=dataset),
+        Stage("similar", "processor.course_similarity:main", {"use_cache": use_cache}, deps=("process",),
+              inputs=lambda values: courses_file(values) + [analysis_config], outputs=derived(similar_path_for),
+              bind=dataset),
+        Stage("teachers", "processor.teacher_profiles:main", {"use_cache": use_cache}, deps=("process",),
+              inputs=lambda values: dataset_files(values) + [analysis_config], outputs=derived(profiles_path_for),
+              bind=dataset),
+        Stage("cluster", "processor.course_clustering:main", {"workers": args.workers, "use_cache": use_cache},
+              deps=("features",),
+              inputs=lambda values: courses_file(values) + derived(features_path_for)(values) + [analysis_config],
+              outputs=derived(clusters_path_for), bind=dataset),
+        Stage("charts", "processor.cluster_charts:main", {"workers": args.workers, "use_cache": use_cache},
+              deps=("cluster",), inputs=lambda values: derived(clusters_path_for)(values) + [analysis_config],
+              outputs=lambda values: [CHART_DIR / "charts.json"], bind=dataset),
+    ]
+    if args.no_crawl:
+        stages = [s._replace(deps=tuple(d for d in s.deps if d != "crawl")) for s in stages if s.name != "crawl"]
+    # API 資料來源：sqlite 後端建立課程資料庫，否則建立包含所有衍生結果的狀態快照
+    if API_BACKEND == 'sqlite':
+        stages.append(Stage("sqlite", "processor.course_database:main", {"use_cache": use_cache}, deps=("process",),
+                            inputs=dataset_files, outputs=lambda values: [database_path_for(v) for v in version(values)],
+                            bind=dataset))
+    else:
+        artifacts = [features_path_for, forecast_path_for, similar_path_for, profiles_path_for, clusters_path_for]
+        stages.append(Stage("api-state", "api.state:main", {"use_cache": use_cache},
+                            deps=("features", "forecast", "similar", "teachers", "cluster"),
+                            inputs=lambda values: dataset_files(values) + [path_for(f) for f in courses_file(values)
+                                                                          for path_for in artifacts],
+                            outputs=lambda values: [state_path_for(v) for v in version(values)],
+                            current=lambda values: all(state_is_current(state_path_for(v), v,
+                                                                        state_sources(dataset_source(v)))
+                                                       for v in version(values)),
+                            bind=dataset))
+    return stages
+
 def main():
     parser = argparse.ArgumentParser(description="Course Master - 智慧選課輔助系統")
     parser.add_argument(
         "command",
-        choices=["crawl", "process", "build-dict", "api", "all"],
+        choices=["crawl", "snapshot", "snapshot-report", "process", "build-dict", "features", "forecast", "similar", "teachers", "cluster", "charts", "sqlite", "api-state", "api", "all"],
         help="要執行的命令"
     )
     parser.add_argument(
@@ -27,6 +121,68 @@ def main():
         default="INFO",
         help="日誌級別"
     )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=None,
+        help="snapshot 模式的爬取間隔（秒）"
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=None,
+        help="snapshot 模式的快照次數（預設不限）"
+    )
+    parser.add_argument(
+        "--window",
+        type=float,
+        default=60,
+        help="snapshot-report 計算登記速度的時間視窗（分鐘）"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="snapshot-report 列出的課程數"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="process 階段平行處理學期、cluster 階段平行分群、charts 階段平行繪圖的行程數"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=4,
+        help="all 模式同時執行的獨立階段數"
+    )
+    parser.add_argument(
+        "--no-crawl",
+        action="store_true",
+        help="all 模式不爬取，以現有原始檔更新後續階段"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="process/features/forecast/similar/teachers/cluster/charts/sqlite/api-state 階段忽略快取，全部重新處理；all 模式不略過任何階段"
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="process 階段以分塊串流模式處理，每塊讀取的列數"
+    )
+    parser.add_argument(
+        "--skip-validation",
+        action="store_true",
+        help="process 階段不驗證資料集（驗證有錯誤時預設不輸出）"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="build-dict 只將最新學期併入既有教師字典"
+    )
 
     args = parser.parse_args()
 
@@ -37,40 +193,74 @@ def main():
         from crawler.crawler import main as crawl_main
         crawl_main()
 
+    elif args.command == "snapshot":
+        from crawler.crawler import snapshot_main
+        snapshot_main(args.interval, args.iterations)
+
+    elif args.command == "snapshot-report":
+        from crawler.crawler import snapshot_report_main
+        snapshot_report_main(args.window, args.top)
+
     elif args.command == "process":
         from processor.data_processor import main as process_main
-        process_main()
+        process_main(workers=args.workers, use_cache=not args.no_cache, chunksize=args.chunksize,
+                     validate=not args.skip_validation)
 
     elif args.command == "build-dict":
         from processor.teacher_dict_builder import main as dict_main
-        dict_main()
+        dict_main(incremental=args.incremental)
+
+    elif args.command == "features":
+        from processor.competition_features import main as features_main
+        features_main(use_cache=not args.no_cache)
+
+    elif args.command == "forecast":
+        from processor.demand_forecast import main as forecast_main
+        forecast_main(use_cache=not args.no_cache)
+
+    elif args.command == "similar":
+        from processor.course_similarity import main as similar_main
+        similar_main(use_cache=not args.no_cache)
+
+    elif args.command == "teachers":
+        from processor.teacher_profiles import main as teachers_main
+        teachers_main(use_cache=not args.no_cache)
+
+    elif args.command == "cluster":
+        from processor.course_clustering import main as cluster_main
+        cluster_main(workers=args.workers, use_cache=not args.no_cache)
+
+    elif args.command == "charts":
+        from processor.cluster_charts import main as charts_main
+        charts_main(workers=args.workers, use_cache=not args.no_cache)
+
+    elif args.command == "sqlite":
+        from processor.course_database import main as sqlite_main
+        sqlite_main(use_cache=not args.no_cache)
+
+    elif args.command == "api-state":
+        from api.state import main as state_main
+        state_main(use_cache=not args.no_cache)
 
     elif args.command == "api":
         from api.app import main as api_main
         api_main()
 
     elif args.command == "all":
+        from config import PIPELINE_STATE_PATH
+        from utils.pipeline import FAILED, Pipeline, print_summary
         print("開始執行完整流程...")
-        try:
-            print("1. 爬取課程數據...")
-            from crawler.crawler import main as crawl_main
-            crawl_main()
-
-            print("2. 構建教師字典...")
-            from processor.teacher_dict_builder import main as dict_main
-            dict_main()
-
-            print("3. 處理課程數據...")
-            from processor.data_processor import main as process_main
-            process_main()
-
-            print("4. 啟動 API 服務器...")
-            from api.app import main as api_main
-            api_main()
-
-        except Exception as e:
-            print(f"執行失敗: {e}")
+        started = time.perf_counter()
+        pipeline = Pipeline(pipeline_stages(args), PIPELINE_STATE_PATH, jobs=args.jobs, force=args.no_cache)
+        results = pipeline.run()
+        print_summary(results, time.perf_counter() - started)
+        if any(r.status == FAILED for r in results):
+            print("執行失敗，未啟動 API 服務器")
             sys.exit(1)
 
+        print("啟動 API 服務器...")
+        from api.app import main as api_main
+        api_main()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,308 @@
+"""處理熱點的微基準測試 - 在原始資料與 10x/100x 放大資料上量測耗時與記憶體峰值，並與存放於 repo 的基準比較；
+另可量測 build_all_courses_dataset 隨學期數與行程數的擴展性（--depths）"""
+
+import argparse
+import json
+import logging
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(1, str(BASE_DIR / 'src'))
+
+import pandas as pd
+
+from config import RAW_DATA_DIR, TEACHER_DICT_PATH
+from processor.data_processor import DataProcessor
+from processor.department_mapper import DepartmentMapper
+from processor.teacher_dict_builder import TeacherDictBuilder
+from processor.teacher_matcher import TeacherNameMatcher
+from utils.common import safe_write_csv
+
+BASELINE_PATH = Path(__file__).parent / 'benchmark_baselines.json'
+# 差距小於此值不視為退化，避免毫秒級或僅數 KB 的案例受雜訊影響
+MIN_SECONDS_DELTA = 0.02
+MIN_PEAK_KB_DELTA = 64
+
+# 每個案例：(放大倍數, 原始資料) -> (函式, 參數)
+Case = Callable[[int, 'RawData'], Tuple[Callable, tuple]]
+
+
+class RawData:
+    """所有學期的原始資料與字典，僅載入一次"""
+
+    def __init__(self):
+        files = sorted(RAW_DATA_DIR.glob('courses_*.csv'))
+        if not files:
+            raise SystemExit(f'No raw files found in {RAW_DATA_DIR}')
+        self.files = files
+        self.frame = pd.concat([pd.read_csv(f, encoding='utf-8-sig') for f in files], ignore_index=True)
+        self.teacher_set = DataProcessor().load_teacher_set(TEACHER_DICT_PATH)
+        self.max_name_len = max(map(len, self.teacher_set), default=4)
+        self.single_set = TeacherDictBuilder.extract_single_teacher_set(self.frame['教師姓名'].dropna())
+        self.tmp_dir = Path(tempfile.mkdtemp(prefix='benchmark_'))
+
+    def column(self, name: str, factor: int) -> List[str]:
+        values = self.frame[name].dropna().astype(str).tolist()
+        return values * factor
+
+    def series(self, name: str, factor: int) -> pd.Series:
+        series = self.frame[name]
+        return pd.concat([series] * factor, ignore_index=True) if factor > 1 else series
+
+    def scaled_file(self, factor: int) -> Path:
+        """最新學期原始檔放大 factor 倍後寫入暫存目錄（檔名保留學年度/學期）"""
+        source = self.files[-1]
+        path = self.tmp_dir / f'x{factor}' / source.name
+        if not path.exists():
+            df = pd.read_csv(source, encoding='utf-8-sig')
+            safe_write_csv(pd.concat([df] * factor, ignore_index=True), path)
+        return path
+
+
+def run_each(func: Callable, values: List[Any], *args) -> None:
+    for value in values:
+        func(value, *args)
+
+
+# 舊版逐列實作，僅作為向量化版本的比較基準
+def parse_schedule_location(schedule_str: str) -> List[Dict[str, Any]]:
+    """解析節次與地點（逐字串）"""
+    if pd.isna(schedule_str) or str(schedule_str).strip() == '未知':
+        return [{'星期': pd.NA, '起始節次': pd.NA, '結束節次': pd.NA, '上課地點': pd.NA}]
+
+    text = str(schedule_str).strip()
+    pattern = r'(\([一二三四五六日]\))\s*([\d,\-]+)\s*(.*?)(?=\s*\([一二三四五六日]\)|$)'
+    matches = re.findall(pattern, text)
+
+    if not matches:
+        return [{'星期': pd.NA, '起始節次': pd.NA, '結束節次': pd.NA, '上課地點': text}]
+
+    results = []
+    for w, t, l in matches:
+        start_node = pd.NA
+        end_node = pd.NA
+        nums = re.findall(r'\d+', t)
+        if nums:
+            start_node = int(nums[0])
+            end_node = int(nums[-1])
+        results.append({'星期': w, '起始節次': start_node, '結束節次': end_node, '上課地點': l.strip()})
+    return results
+
+
+def split_teachers_by_dict(text: str, teacher_set: Set[str], max_name_len: int) -> List[str]:
+    """教師姓名拆分（逐位置最大匹配）"""
+    result = []
+    n = len(text)
+    i = 0
+    while i < n:
+        matched = None
+        window = min(n - i, max_name_len)
+        for width in range(window, 1, -1):
+            candidate = text[i : i + width]
+            if candidate in teacher_set:
+                matched = candidate
+                break
+        if matched:
+            result.append(matched)
+            i += len(matched)
+        else:
+            i += 1
+    return result if result else [text]
+
+
+def split_teachers(teacher_str: str, teacher_set: Set[str], max_name_len: int) -> List[str]:
+    """教師姓名處理入口（逐字串）"""
+    if pd.isna(teacher_str):
+        return []
+    text = str(teacher_str).strip()
+    if text in ['校際教師', '校外教師']:
+        return ['校際教']
+    return split_teachers_by_dict(text, teacher_set, max_name_len)
+
+
+def case_parse_schedule_location(factor: int, raw: RawData):
+    return run_each, (parse_schedule_location, raw.column('上課節次+地點', factor))
+
+
+def case_parse_schedule_series(factor: int, raw: RawData):
+    return DataProcessor.parse_schedule_series, (raw.series('上課節次+地點', factor),)
+
+
+def case_split_teachers_by_dict(factor: int, raw: RawData):
+    return run_each, (split_teachers, raw.column('教師姓名', factor),
+                      raw.teacher_set, raw.max_name_len)
+
+
+def case_teacher_matcher(factor: int, raw: RawData):
+    def split(names: pd.Series):
+        # 每次重新編譯字典樹，避免快取讓結果失真
+        return TeacherNameMatcher(raw.teacher_set).split_series(names)
+    return split, (raw.series('教師姓名', factor),)
+
+
+def case_parse_department_info(factor: int, raw: RawData):
+    def parse(values: List[str]):
+        # 每次建立新的 mapper，快取從空開始
+        run_each(DepartmentMapper().parse_department_info, values)
+    return parse, (raw.column('開課班別(代表)', factor),)
+
+
+def case_add_department_info(factor: int, raw: RawData):
+    def add(classes: pd.DataFrame):
+        # 每次建立新的 mapper，快取從空開始
+        DepartmentMapper().add_department_info_to_df(classes)
+    return add, (raw.series('開課班別(代表)', factor).to_frame(),)
+
+
+def case_smart_split(factor: int, raw: RawData):
+    return run_each, (TeacherDictBuilder.smart_split_preserve_order, raw.column('教師姓名', factor),
+                      raw.single_set)
+
+
+def case_clean_single_file(factor: int, raw: RawData):
+    def clean(path: Path):
+        DataProcessor().clean_single_file(path, raw.teacher_set)
+    return clean, (raw.scaled_file(factor),)
+
+
+CASES: Dict[str, Case] = {
+    'parse_schedule_location': case_parse_schedule_location,
+    'parse_schedule_series': case_parse_schedule_series,
+    'split_teachers_by_dict': case_split_teachers_by_dict,
+    'teacher_matcher.split_series': case_teacher_matcher,
+    'parse_department_info': case_parse_department_info,
+    'add_department_info_to_df': case_add_department_info,
+    'smart_split_preserve_order': case_smart_split,
+    'clean_single_file': case_clean_single_file,
+}
+
+
+def measure(func: Callable, args: tuple, repeat: int) -> Dict[str, float]:
+    """耗時取 repeat 次最佳值；記憶體峰值另以 tracemalloc 執行一次量測（不計入耗時）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': round(best, 4), 'peak_kb': round(peak / 1e3, 1)}
+
+
+def make_history(raw: RawData, target_dir: Path, depth: int) -> None:
+    """以原始學期檔輪流複製出 depth 個學期（學年度從 100 起編）"""
+    for i in range(depth):
+        year, semester = 100 + i // 2, i % 2 + 1
+        shutil.copy(raw.files[i % len(raw.files)], target_dir / f'courses_{year}_{semester}.csv')
+
+
+def benchmark_workers(raw: RawData, depths: List[int], worker_counts: List[int]) -> None:
+    """build_all_courses_dataset 隨學期數與行程數的擴展性（不快取、每項執行一次，不與基準比較）"""
+    print(f"\n{'學期數':<10}" + ''.join(f"{f'workers={w}(s)':>16}" for w in worker_counts))
+    for depth in depths:
+        with tempfile.TemporaryDirectory(dir=raw.tmp_dir) as tmp:
+            make_history(raw, Path(tmp), depth)
+            row = f"{depth:<10}"
+            for workers in worker_counts:
+                start = time.perf_counter()
+                DataProcessor().build_all_courses_dataset(Path(tmp), TEACHER_DICT_PATH, workers, False)
+                row += f"{time.perf_counter() - start:>16.3f}"
+            print(row)
+
+
+def load_baselines() -> Dict[str, Any]:
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text(encoding='utf-8'))
+    return {'results': {}}
+
+
+def format_ratio(current: float, baseline: float) -> str:
+    return f'{current / baseline:.2f}x' if baseline else '-'
+
+
+def run_cases(raw: RawData, args, baselines: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, Dict[str, float]]], List[str]]:
+    """執行所有案例並與基準比較，回傳 (結果, 退化案例)"""
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    regressions = []
+    for name in args.cases:
+        for factor in args.scales:
+            func, func_args = CASES[name](factor, raw)
+            current = measure(func, func_args, args.repeat if factor == 1 else 1)
+            results.setdefault(name, {})[str(factor)] = current
+
+            baseline = baselines['results'].get(name, {}).get(str(factor))
+            time_ratio = mem_ratio = '-'
+            if baseline:
+                time_ratio = format_ratio(current['seconds'], baseline['seconds'])
+                mem_ratio = format_ratio(current['peak_kb'], baseline['peak_kb'])
+                slower = (current['seconds'] > baseline['seconds'] * args.tolerance
+                          and current['seconds'] - baseline['seconds'] > MIN_SECONDS_DELTA)
+                larger = (current['peak_kb'] > baseline['peak_kb'] * args.tolerance
+                          and current['peak_kb'] - baseline['peak_kb'] > MIN_PEAK_KB_DELTA)
+                if slower or larger:
+                    regressions.append(f'{name} x{factor}')
+            print(f"{name:<30}{factor:>6}{current['seconds']:>10.3f}{current['peak_kb']:>12.1f}"
+                  f"{time_ratio:>10}{mem_ratio:>12}")
+    return results, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='處理熱點的微基準測試')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES), help='要執行的案例')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100], help='資料放大倍數')
+    parser.add_argument('--repeat', type=int, default=3, help='原始資料每項重複次數（放大資料只跑一次）')
+    parser.add_argument('--tolerance', type=float, default=1.5, help='耗時或記憶體超過基準此倍數即視為退化')
+    parser.add_argument('--save', action='store_true', help='將本次結果寫入基準檔')
+    parser.add_argument('--check', action='store_true', help='有退化時以非零狀態結束')
+    parser.add_argument('--depths', type=int, nargs='*', default=[], help='平行處理測試的學期數（如 8 32）')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='平行處理測試的行程數')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    raw = RawData()
+    baselines = load_baselines()
+
+    print(f"原始資料：{len(raw.frame)} 列（{len(raw.files)} 個學期）；基準檔：{BASELINE_PATH.name}")
+    print(f"{'案例':<30}{'倍數':>6}{'耗時(s)':>10}{'峰值(KB)':>12}{'耗時/基準':>10}{'記憶體/基準':>12}")
+    try:
+        results, regressions = run_cases(raw, args, baselines)
+        if args.depths:
+            benchmark_workers(raw, args.depths, args.workers)
+    finally:
+        shutil.rmtree(raw.tmp_dir, ignore_errors=True)
+
+    if args.save:
+        for name, by_scale in results.items():
+            baselines['results'].setdefault(name, {}).update(by_scale)
+        baselines['environment'] = {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'raw_rows': len(raw.frame),
+        }
+        BASELINE_PATH.write_text(json.dumps(baselines, ensure_ascii=False, indent=2, sort_keys=True) + '\n',
+                                 encoding='utf-8')
+        print(f'\n已更新基準：{BASELINE_PATH}')
+
+    if regressions:
+        print(f"\n超過基準 {args.tolerance}x：{', '.join(regressions)}")
+        if args.check:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
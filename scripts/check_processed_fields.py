@@ -1,43 +1,56 @@
-"""檢查 processed CSV 的欄位結構與樣本值"""
+"""檢查最新 processed 資料集 - 執行與處理流程相同的驗證並輸出 JSON 報告"""
 
-import pandas as pd
-import os
+import argparse
+import sys
 from pathlib import Path
 
-PROCESSED_DIR = Path('data/processed')
-files = sorted(PROCESSED_DIR.glob('all_courses_*.csv'))
-if not files:
-    print('No processed files found in', PROCESSED_DIR)
-    raise SystemExit(1)
-latest = files[-1]
-print('Checking:', latest)
-df = pd.read_csv(latest)
-required = ['課程名稱','星期','起始節次','結束節次','上課地點','學分','課程代碼','序號']
-missing = [c for c in required if c not in df.columns]
-if missing:
-    print('Missing columns:', missing)
-else:
-    print('All required columns present')
-
-for c in required:
-    non_null = df[c].notna().sum()
-    total = len(df)
-    print(f"{c}: {non_null}/{total} non-null")
-
-for c in ['起始節次','結束節次','學分']:
-    if c in df.columns:
-        def is_number(val):
-            try:
-                if pd.isna(val) or str(val).strip()=='':
-                    return False
-                float(val)
-                return True
-            except Exception:
-                return False
-        invalid = df[~df[c].apply(is_number)]
-        print(f"{c} sample invalid count: {len(invalid)}")
-        if len(invalid) > 0:
-            print(invalid[[c]].head(5).to_string(index=False))
-
-print('\nSample rows:')
-print(df[required].head(10).to_string(index=False))
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(1, str(BASE_DIR / 'src'))
+
+from config import PROCESSED_DATA_DIR
+from processor.validator import summarize, validate_tables, write_report
+from utils.common import safe_read_csv
+from utils.course_tables import CourseTables, split_flat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='驗證最新的 processed 資料集')
+    parser.add_argument('--output', type=Path, default=None, help='報告輸出路徑（預設與資料集同目錄）')
+    args = parser.parse_args()
+
+    files = sorted(PROCESSED_DATA_DIR.glob('all_courses_*.csv'))
+    if not files:
+        print('No processed files found in', PROCESSED_DATA_DIR)
+        raise SystemExit(1)
+    latest = files[-1]
+    print('Checking:', latest)
+
+    courses = safe_read_csv(latest)
+    if courses is None:
+        raise SystemExit(1)
+    # 上課時段另存於同時間戳的 all_meetings_*.csv；舊版扁平檔則就地拆分
+    meetings_file = latest.with_name(latest.name.replace('all_courses_', 'all_meetings_', 1))
+    meetings = safe_read_csv(meetings_file) if meetings_file.exists() else None
+    if meetings is None or 'section_id' not in courses.columns:
+        print('Meetings: (legacy flat file)')
+        tables = split_flat(courses)
+    else:
+        print('Meetings:', meetings_file)
+        tables = CourseTables(courses, meetings)
+
+    report = validate_tables(tables)
+    output = args.output or latest.with_name(latest.name.replace('all_courses_', 'validation_', 1)).with_suffix('.json')
+    write_report(report, output)
+
+    print(f"{report['courses']} 個開課班、{report['meetings']} 段上課時間；"
+          f"{report['errors']} 項錯誤、{report['warnings']} 項警告")
+    for line in summarize(report):
+        print(line)
+    print('Report:', output)
+    if not report['ok']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""處理後資料集的記憶體報告 - 逐欄比較原始型別與緊湊型別（categorical / 縮小位寬）的用量"""
+
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(1, str(BASE_DIR / 'src'))
+
+import pandas as pd
+
+from config import PROCESSED_DATA_DIR
+from utils.dtypes import to_compact_dtypes, memory_report
+from utils.course_tables import CourseTables, flatten
+
+
+def main():
+    files = sorted(PROCESSED_DATA_DIR.glob('all_courses_*.csv'))
+    if not files:
+        print('No processed files found in', PROCESSED_DATA_DIR)
+        raise SystemExit(1)
+    latest = files[-1]
+    print('Checking:', latest)
+
+    before = pd.read_csv(latest, encoding='utf-8-sig', low_memory=False)
+    after = to_compact_dtypes(before.copy())
+    report = memory_report(before, after)
+
+    pd.set_option('display.width', 160)
+    print(report.to_string(index=False))
+
+    total_before = int(report['bytes(前)'].sum())
+    total_after = int(report['bytes(後)'].sum())
+    print(f"\n總計：{total_before / 1e6:.2f} MB -> {total_after / 1e6:.2f} MB "
+          f"({total_after / total_before:.1%})，{len(before)} 列")
+
+    # API 另外為每個學期保留一份切片
+    if {'學年度', '學期'} <= set(before.columns):
+        slices_before = sum(
+            g.memory_usage(deep=True, index=False).sum() for _, g in before.groupby(['學年度', '學期'])
+        )
+        slices_after = sum(
+            g.memory_usage(deep=True, index=False).sum()
+            for _, g in after.groupby(['學年度', '學期'], observed=True)
+        )
+        print(f"各學期切片合計：{slices_before / 1e6:.2f} MB -> {slices_after / 1e6:.2f} MB")
+
+    # 上課時段表，並與舊版「一段上課時間一列」的扁平格式比較
+    meetings_file = latest.with_name(latest.name.replace('all_courses_', 'all_meetings_', 1))
+    if meetings_file.exists() and 'section_id' in before.columns:
+        meetings = to_compact_dtypes(pd.read_csv(meetings_file, encoding='utf-8-sig'))
+        meetings_bytes = int(meetings.memory_usage(deep=True, index=False).sum())
+        flat = to_compact_dtypes(flatten(CourseTables(before.copy(), meetings)))
+        flat_bytes = int(flat.memory_usage(deep=True, index=False).sum())
+        print(f"上課時段表：{meetings_bytes / 1e6:.2f} MB，{len(meetings)} 列")
+        print(f"課程表+時段表：{(total_after + meetings_bytes) / 1e6:.2f} MB；"
+              f"扁平格式：{flat_bytes / 1e6:.2f} MB，{len(flat)} 列")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,30 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
+import json
+import time
+import numpy as np
 import pandas as pd
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
 from pydantic import BaseModel
 
-from config import PROCESSED_DATA_DIR, WEB_DIR, API_HOST, API_PORT, LOG_LEVEL, LOG_FORMAT, LOG_FILE, LOG_DIR
+from config import (
+    PROCESSED_DATA_DIR, PARTITIONED_DATA_DIR, CLUSTER_DIR, FEATURE_DIR, FORECAST_DIR, SIMILAR_DIR, TEACHER_PROFILE_DIR, SQLITE_DIR, WEB_DIR, API_HOST, API_PORT, API_PARTITION_MEMORY_MB,
+    API_BACKEND, API_SQLITE_POOL_SIZE,
+    LOG_LEVEL, LOG_FORMAT, LOG_FILE, LOG_DIR
+)
 from utils.common import safe_read_csv, setup_logging
+from utils.dtypes import own_object_columns, to_compact_dtypes
+from utils.course_db import COURSE_DB_VERSION, CourseDatabase, database_version
+from utils.course_features import CourseFeatureTable
+from utils.course_tables import CourseTables, MEETING_FIELDS, concat_courses, split_flat
+from utils.partitions import MANIFEST_NAME, PartitionedDataset, latest_dataset_dir
+from utils.similarity_index import SimilarityIndex
+from api.state import read_state, state_path_for
 
 def clean_course_data(courses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """清理課程數據，處理 NaN 並規範型別"""
@@ -43,35 +58,12 @@ def clean_single_course(course: Dict[str, Any]) -> Dict[str, Any]:
             cleaned_course[key] = value
     return cleaned_course
 
-def calculate_historical_stats(full_df: pd.DataFrame) -> Dict[tuple, float]:
-    """計算每門課（同名稱+同教師）的歷年平均選上率"""
-    if full_df is None or full_df.empty:
-        return {}
-    
-    if '登記人數' not in full_df.columns or '上限人數' not in full_df.columns:
-        return {}
-
-    df = full_df.copy()
-    df['登記人數'] = pd.to_numeric(df['登記人數'], errors='coerce').fillna(0)
-    df['上限人數'] = pd.to_numeric(df['上限人數'], errors='coerce').fillna(0)
-    
-    df['課程名稱'] = df['課程名稱'].fillna('').astype(str).str.strip()
-    df['教師姓名'] = df['教師姓名'].fillna('').astype(str).str.strip()
-
-    valid_mask = (df['登記人數'] > 0) & (df['上限人數'] > 0)
-    valid_df = df[valid_mask].copy()
-
-    if valid_df.empty:
-        return {}
-
-    valid_df['acceptance_rate'] = valid_df['上限人數'] / valid_df['登記人數']
-    valid_df['acceptance_rate'] = valid_df['acceptance_rate'].clip(upper=1.0)
-    
-    avg_rates = valid_df.groupby(['課程名稱', '教師姓名'])['acceptance_rate'].mean().to_dict()
-    
-    return avg_rates
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up()
+    yield
 
-app = FastAPI(title="Course Master API", version="1.0.0")
+app = FastAPI(title="Course Master API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -85,50 +77,354 @@ app.mount("/css", StaticFiles(directory=str(WEB_DIR / "assets" / "css")), name="
 app.mount("/js", StaticFiles(directory=str(WEB_DIR / "assets" / "js")), name="js")
 app.mount("/assets", StaticFiles(directory=str(WEB_DIR / "assets")), name="assets")
 
-_courses_cache: Dict[str, pd.DataFrame] = {}
+_store: Optional[PartitionedDataset] = None
+# use_dataset() 指定的資料集版本；None 時使用最新的資料集
+_dataset_version: Optional[str] = None
+_feature_cache: Dict[str, Optional[CourseFeatureTable]] = {}
+_cluster_cache: Dict[str, Optional[pd.DataFrame]] = {}
+_forecast_cache: Dict[str, Optional[pd.DataFrame]] = {}
+_similarity_cache: Dict[str, Optional[SimilarityIndex]] = {}
+_teacher_cache: Dict[str, Optional[Dict[str, Dict[str, Any]]]] = {}
+_database_cache: Dict[str, Optional[CourseDatabase]] = {}
+# 冷啟動與第一個請求的耗時，/api/status 回報
+_startup_stats: Dict[str, Any] = {'source': None, 'cold_start_seconds': None, 'first_request_ms': None}
+
+def load_course_tables(courses_file: Path) -> Optional[CourseTables]:
+    """讀取課程表與同時間戳的上課時段表；舊版扁平檔（無時段表）則就地拆分"""
+    df = safe_read_csv(courses_file)
+    if df is None:
+        return None
 
-def get_latest_courses_df() -> Optional[pd.DataFrame]:
-    """取得最新課程資料"""
-    cache_key = "latest"
-    if cache_key in _courses_cache:
-        return _courses_cache[cache_key]
-    
+    meetings_file = courses_file.with_name(courses_file.name.replace("all_courses_", "all_meetings_", 1))
+    meetings = safe_read_csv(meetings_file) if meetings_file.exists() else None
+    if meetings is None or 'section_id' not in df.columns:
+        tables = split_flat(df.drop(columns=['section_id'], errors='ignore'))
+    else:
+        tables = CourseTables(df, meetings)
+    return CourseTables(to_compact_dtypes(tables.courses), to_compact_dtypes(tables.meetings))
+
+def dataset_source(version: Optional[str] = None) -> Optional[Tuple[str, Path]]:
+    """資料集的版本與來源：學期分區目錄，沒有時為 all_courses_<版本>.csv；
+    未指定版本時為 use_dataset() 指定的版本，再沒有則為最新的資料集"""
+    version = version or _dataset_version
+    if version is not None:
+        dataset_dir = PARTITIONED_DATA_DIR / version
+        if (dataset_dir / MANIFEST_NAME).exists():
+            return version, dataset_dir
+        courses_file = PROCESSED_DATA_DIR / f"all_courses_{version}.csv"
+        return (version, courses_file) if courses_file.exists() else None
+    dataset_dir = latest_dataset_dir(PARTITIONED_DATA_DIR)
+    if dataset_dir is not None:
+        return dataset_dir.name, dataset_dir
     processed_files = sorted(PROCESSED_DATA_DIR.glob("all_courses_*.csv"))
     if not processed_files:
         return None
-    
-    latest_file = processed_files[-1]
-    df = safe_read_csv(latest_file)
-    
-    if df is not None:
-        if '課程代碼' in df.columns and '序號' in df.columns:
-            subset = [c for c in ['學年度', '學期', '課程代碼', '序號'] if c in df.columns]
-            df = df.drop_duplicates(subset=subset, keep='last')
-        _courses_cache[cache_key] = df
-        
-    return df
+    return processed_files[-1].stem.replace("all_courses_", "", 1), processed_files[-1]
+
+def use_dataset(version: Optional[str]) -> None:
+    """固定使用指定版本的資料集（流程中的 api-state 階段使用 process 產生的版本），並清除已載入的資料"""
+    global _dataset_version, _store
+    _dataset_version = version
+    _store = None
+
+def artifact_paths(version: str) -> Dict[str, Path]:
+    """資料集版本對應的各衍生結果路徑"""
+    return {
+        'features': FEATURE_DIR / f"features_{version}.npz",
+        'clusters': CLUSTER_DIR / f"clusters_{version}.csv",
+        'forecast': FORECAST_DIR / f"forecast_{version}.csv",
+        'similar': SIMILAR_DIR / f"similar_{version}.npz",
+        'teachers': TEACHER_PROFILE_DIR / f"teachers_{version}.json",
+    }
+
+def state_sources(source: Optional[Tuple[str, Path]] = None) -> Dict[str, Path]:
+    """狀態快照依賴的來源檔（資料集與各衍生結果），任何一個變動即視為過期"""
+    source = source or dataset_source()
+    if source is None:
+        return {}
+    version, path = source
+    if path.is_dir():
+        sources = {'dataset': path / MANIFEST_NAME}
+    else:
+        sources = {'dataset': path,
+                   'meetings': path.with_name(path.name.replace("all_courses_", "all_meetings_", 1))}
+    sources.update(artifact_paths(version))
+    return sources
+
+def get_store() -> Optional[PartitionedDataset]:
+    """取得學期分區資料集；沒有分區目錄時改讀最新的 all_courses_*.csv 並於記憶體中分區"""
+    global _store
+    if _store is not None:
+        return _store
+
+    source = dataset_source()
+    if source is None:
+        return None
+    version, path = source
+    if path.is_dir():
+        _store = PartitionedDataset.open(path, memory_budget=API_PARTITION_MEMORY_MB * 1_000_000)
+        logging.info(f"使用學期分區資料集：{path.name}（{len(_store.keys)} 個學期）")
+    else:
+        tables = load_course_tables(path)
+        if tables is None:
+            return None
+        _store = PartitionedDataset.from_tables(tables, version=version)
+    return _store
+
+def get_database() -> Optional[CourseDatabase]:
+    """API_BACKEND 為 sqlite 時，目前資料集的課程資料庫（唯讀連線池）；尚未執行 sqlite 階段時回傳 None，
+    改用記憶體中的學期分區"""
+    if API_BACKEND != 'sqlite':
+        return None
+    source = dataset_source()
+    if source is None:
+        return None
+    version = source[0]
+    if version not in _database_cache:
+        for db in _database_cache.values():
+            if db is not None:
+                db.close()
+        _database_cache.clear()
+        path = SQLITE_DIR / f"courses_{version}.db"
+        if path.exists() and database_version(path) == COURSE_DB_VERSION:
+            _database_cache[version] = CourseDatabase(path, API_SQLITE_POOL_SIZE)
+            logging.info(f"使用 SQLite 課程資料庫：{path.name}")
+        else:
+            logging.warning(f"找不到課程資料庫 {path.name}，請執行 python main.py sqlite；改用記憶體資料")
+            _database_cache[version] = None
+    return _database_cache[version]
+
+def lookup_meetings(section_ids) -> List[List[Dict[str, Any]]]:
+    """各開課班的上課時段，sqlite 後端直接查詢資料庫，不載入學期分區"""
+    db = get_database()
+    return db.meetings(section_ids) if db is not None else get_store().lookup(section_ids)
+
+def course_rows(section_ids) -> pd.DataFrame:
+    """依 section_id 取得課程列（依傳入順序），sqlite 後端直接查詢資料庫"""
+    db = get_database()
+    return db.rows(section_ids) if db is not None else get_store().rows(section_ids)
+
+def find_latest_sections(course_id: str, serial: Optional[str] = None) -> pd.DataFrame:
+    """最新學期中課程代碼（與序號）相符的開課班，sqlite 後端直接查詢資料庫"""
+    db = get_database()
+    if db is not None:
+        return db.find(course_id, serial, key=db.latest_key)
+    latest_df = get_latest_courses_df()
+    if latest_df is None or latest_df.empty:
+        return pd.DataFrame()
+    mask = _text(latest_df['課程代碼']) == str(course_id)
+    if serial is not None:
+        mask &= _text(latest_df['序號']) == str(serial)
+    return latest_df[mask]
 
-def get_all_historical_courses_df() -> Optional[pd.DataFrame]:
-    """取得所有歷史課程資料"""
-    return get_latest_courses_df()
+def get_latest_courses_df() -> Optional[pd.DataFrame]:
+    """取得最新學期的課程資料（每個開課班一列，上課時段另存於分區的 MeetingIndex）"""
+    store = get_store()
+    if store is None or store.latest_key is None:
+        return None
+    return store.courses(store.latest_key)
+
+def iter_semesters() -> Iterator[pd.DataFrame]:
+    """由新到舊逐學期產生課程資料；未指定學期的端點逐學期處理，不串接也不保留所有學期，
+    舊學期分區仍受 API_PARTITION_MEMORY_MB 淘汰"""
+    store = get_store()
+    if store is None:
+        return
+    for _, df in store.iter_newest():
+        yield df
 
 def get_courses_by_semester(year: int, semester: int) -> Optional[pd.DataFrame]:
-    cache_key = f"{year}_{semester}"
-    if cache_key in _courses_cache:
-        return _courses_cache[cache_key]
-    
-    df = get_all_historical_courses_df()
-    if df is None:
+    """取得指定學期的課程資料；非最新學期於第一次存取時才載入"""
+    store = get_store()
+    if store is None:
+        return None
+    return store.courses((int(year), int(semester)))
+
+def dataset_version() -> Optional[str]:
+    """目前資料集的版本；不載入學期分區（sqlite 後端只需要版本來找衍生結果）"""
+    if _store is not None:
+        return _store.version
+    source = dataset_source()
+    return source[0] if source is not None else None
+
+def get_features() -> Optional[CourseFeatureTable]:
+    """目前資料集的競爭特徵表（由 features 階段產生）；尚未計算時回傳 None，API 行程不自行計算"""
+    version = dataset_version()
+    if version is None:
         return None
-    
-    filtered = df[
-        (df['學年度'].astype(str) == str(year)) & 
-        (df['學期'].astype(str) == str(semester))
-    ].copy()
-    
-    if not filtered.empty:
-        _courses_cache[cache_key] = filtered
-    return filtered
+    if version not in _feature_cache:
+        _feature_cache.clear()
+        path = artifact_paths(version)['features']
+        table = CourseFeatureTable.load(path, version) if path.exists() else None
+        if table is None:
+            logging.warning(f"找不到特徵表 {path.name}，請執行 python main.py features")
+        _feature_cache[version] = table
+    return _feature_cache[version]
+
+def get_clusters() -> Optional[pd.DataFrame]:
+    """目前資料集的分群結果（由 cluster 階段產生，依 section_id 排序）；尚未分群時回傳 None"""
+    version = dataset_version()
+    if version is None:
+        return None
+    if version not in _cluster_cache:
+        _cluster_cache.clear()
+        path = artifact_paths(version)['clusters']
+        _cluster_cache[version] = safe_read_csv(path) if path.exists() else None
+    return _cluster_cache[version]
+
+def get_forecast() -> Optional[pd.DataFrame]:
+    """目前資料集最新學期的需求預測（由 forecast 階段產生，依 section_id 排序）；尚未預測時回傳 None"""
+    version = dataset_version()
+    if version is None:
+        return None
+    if version not in _forecast_cache:
+        _forecast_cache.clear()
+        path = artifact_paths(version)['forecast']
+        _forecast_cache[version] = safe_read_csv(path) if path.exists() else None
+    return _forecast_cache[version]
+
+def get_similarity_index() -> Optional[SimilarityIndex]:
+    """目前資料集最新學期的相似課程索引（由 similar 階段產生）；尚未建立時回傳 None"""
+    version = dataset_version()
+    if version is None:
+        return None
+    if version not in _similarity_cache:
+        _similarity_cache.clear()
+        path = artifact_paths(version)['similar']
+        _similarity_cache[version] = SimilarityIndex.load(path) if path.exists() else None
+    return _similarity_cache[version]
+
+def get_teacher_profiles() -> Optional[Dict[str, Dict[str, Any]]]:
+    """目前資料集的教師檔案（由 teachers 階段產生，以教師姓名為鍵）；尚未建立時回傳 None"""
+    version = dataset_version()
+    if version is None:
+        return None
+    if version not in _teacher_cache:
+        _teacher_cache.clear()
+        path = artifact_paths(version)['teachers']
+        _teacher_cache[version] = json.loads(path.read_text(encoding='utf-8')) if path.exists() else None
+    return _teacher_cache[version]
+
+def export_state() -> Dict[str, Any]:
+    """目前可直接服務的狀態（載入所有學期分區與各衍生結果），供 api-state 階段寫出"""
+    store = get_store()
+    if store is None:
+        return {}
+    for key in store.keys:
+        store.partition(key)
+    return {
+        'store': store,
+        'features': get_features(),
+        'clusters': get_clusters(),
+        'forecast': get_forecast(),
+        'similar': get_similarity_index(),
+        'teachers': get_teacher_profiles(),
+    }
+
+def restore_state(state: Dict[str, Any]) -> None:
+    """以狀態快照取代資料集與各衍生結果的快取"""
+    global _store
+    # 學期分區於反序列化時已重新建立 object 欄位（見 PartitionedDataset.__setstate__）
+    _store = state['store']
+    for cache, name in [(_feature_cache, 'features'), (_cluster_cache, 'clusters'), (_forecast_cache, 'forecast'),
+                        (_similarity_cache, 'similar'), (_teacher_cache, 'teachers')]:
+        value = state[name]
+        cache.clear()
+        cache[_store.version] = own_object_columns(value) if isinstance(value, pd.DataFrame) else value
+
+def load_state() -> bool:
+    """讀取最新資料集的狀態快照；沒有或已過期時回傳 False（之後由來源檔延遲載入）"""
+    source = dataset_source()
+    if source is None:
+        return False
+    version = source[0]
+    try:
+        state = read_state(state_path_for(version), version, state_sources(source))
+    except Exception as e:
+        logging.warning(f"讀取狀態快照失敗，改由來源檔載入: {e}")
+        return False
+    if not state:
+        return False
+    restore_state(state)
+    return True
+
+def warm_up() -> None:
+    """啟動時載入狀態快照（沒有時由來源檔建立），預先載入各衍生結果並走過一次回應路徑，記錄冷啟動耗時"""
+    started = time.perf_counter()
+    db = get_database()
+    # sqlite 後端不載入所有學期分區，只預先開啟連線
+    from_state = db is None and load_state()
+    if db is not None or get_store() is not None:
+        for load in (get_features, get_clusters, get_forecast, get_similarity_index, get_teacher_profiles):
+            load()
+        sample = db.courses().head(1) if db is not None else get_latest_courses_df()
+        if sample is not None and not sample.empty:
+            clean_course_data(course_records(sample.head(1)))
+    elapsed = time.perf_counter() - started
+    source = 'sqlite' if db is not None else 'state' if from_state else 'files'
+    _startup_stats.update(source=source, cold_start_seconds=round(elapsed, 4))
+    logging.info(f"API 暖機完成（{source}）：{elapsed:.3f}s")
+
+def attach_by_section(records: List[Dict[str, Any]], section_ids, table: Optional[pd.DataFrame],
+                      fields: List[str]) -> None:
+    """以 section_id 二分搜尋依 section_id 排序的結果表，將 fields 附加到紀錄（查無者為 None）"""
+    if table is None or table.empty:
+        return
+    ids = table['section_id'].to_numpy()
+    pos = np.searchsorted(ids, section_ids).clip(max=len(ids) - 1)
+    found = ids[pos] == section_ids
+    for fld in fields:
+        values = table[fld].astype(object).to_numpy()
+        for record, p, ok in zip(records, pos, found):
+            value = values[p] if ok else None
+            record[fld] = value.item() if isinstance(value, np.generic) else value
+
+def attach_clusters(records: List[Dict[str, Any]], section_ids) -> None:
+    """附上 cluster 與 分群描述（未分群者為 None）"""
+    attach_by_section(records, section_ids, get_clusters(), ['cluster', '分群描述'])
+
+def _text(values: pd.Series) -> pd.Series:
+    """字串比對用的欄位副本（缺值為空字串）；不可直接對共用的學期分區欄位呼叫 astype(str)"""
+    return values.astype(object).fillna('').astype(str)
+
+def course_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """將課程列轉為回應格式，並附上該開課班的所有上課時段（meetings）、分群結果與競爭特徵；
+    星期/起始節次/結束節次/上課地點 取第一段，與舊版扁平欄位相容"""
+    records = df.drop(columns=['section_id'], errors='ignore').to_dict('records')
+    if 'section_id' not in df.columns:
+        return records
+    meetings_per_course = lookup_meetings(df['section_id'].to_numpy())
+    for record, meetings in zip(records, meetings_per_course):
+        record['meetings'] = meetings
+        first = meetings[0] if meetings else {}
+        for fld in MEETING_FIELDS:
+            record[fld] = first.get(fld)
+    section_ids = df['section_id'].to_numpy()
+    attach_clusters(records, section_ids)
+    features = get_features()
+    if features is not None:
+        features.attach(records, section_ids)
+    return records
+
+def sections_matching_all(section_ids: pd.Series, meetings: pd.DataFrame, meeting_mask: pd.Series) -> pd.Series:
+    """開課班的所有上課時段皆符合條件（且至少有一段）時為 True"""
+    ok = meeting_mask.groupby(meetings['section_id']).all()
+    return section_ids.map(ok).fillna(False).astype(bool)
+
+def meeting_fits(day, start, end, empty_set: Set[Tuple[int, int]]) -> bool:
+    """上課時段的每一節都落在空堂 (星期, 節次) 內時為 True"""
+    try:
+        if pd.isna(day): return False
+        if str(day).isdigit(): d_num = int(day)
+        else: d_num = {'一':1,'二':2,'三':3,'四':4,'五':5,'六':6,'日':7}.get(str(day))
+        if not d_num: return False
+        s = 0 if pd.isna(start) else int(start)
+        e = 0 if pd.isna(end) else int(end)
+        if s <= 0 or e <= 0: return False
+        for p in range(s, e+1):
+            if (d_num, p) not in empty_set: return False
+        return True
+    except: return False
 
 class CourseSearchRequest(BaseModel):
     query: str
@@ -151,6 +447,19 @@ class RecommendRequest(BaseModel):
     semester: Optional[int] = None
     preferred_days: Optional[List[str]] = None
 
+@app.middleware("http")
+async def record_first_request(request: Request, call_next):
+    """記錄啟動後第一個 API 請求的耗時"""
+    if _startup_stats['first_request_ms'] is not None or not request.url.path.startswith('/api/'):
+        return await call_next(request)
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if _startup_stats['first_request_ms'] is None:
+        _startup_stats['first_request_ms'] = round(elapsed_ms, 2)
+        logging.info(f"第一個請求 {request.url.path}：{elapsed_ms:.1f}ms")
+    return response
+
 @app.get("/")
 async def read_root():
     return FileResponse(WEB_DIR / "index.html")
@@ -158,15 +467,20 @@ async def read_root():
 @app.get("/api/courses/all")
 async def get_all_courses(year: Optional[int] = None, semester: Optional[int] = None):
     try:
-        if year and semester:
+        db = get_database()
+        if db is not None:
+            df = db.courses((int(year), int(semester))) if year and semester else db.all_courses()
+        elif year and semester:
             df = get_courses_by_semester(year, semester)
         else:
-            df = get_latest_courses_df()
+            # 回應本身即包含所有學期，逐請求串接（由舊到新）而不快取
+            store = get_store()
+            df = store.all_courses() if store is not None and store.keys else None
         
         if df is None or df.empty:
             return CourseResponse(courses=[], total=0)
         
-        courses = df.to_dict('records')
+        courses = course_records(df)
         courses = clean_course_data(courses)
         return CourseResponse(courses=courses, total=len(courses))
     except Exception as e:
@@ -176,27 +490,31 @@ async def get_all_courses(year: Optional[int] = None, semester: Optional[int] =
 @app.get("/api/courses/search")
 async def search_courses(q: str, limit: int = 50):
     try:
-        latest_df = get_latest_courses_df()
-        if latest_df is None or latest_df.empty:
-            raise HTTPException(status_code=404, detail="沒有處理過的課程數據")
-
-        query = q.lower()
-        mask = (
-            latest_df['課程名稱'].astype(str).str.lower().str.contains(query, na=False) |
-            latest_df['教師姓名'].astype(str).str.lower().str.contains(query, na=False) |
-            latest_df['英文課程名稱'].astype(str).str.lower().str.contains(query, na=False)
-        )
-        results = latest_df[mask].head(limit)
-        history_df = get_all_historical_courses_df()
-        stats_map = calculate_historical_stats(history_df)
-        courses = results.to_dict('records')
+        db = get_database()
+        if db is not None:
+            results = db.search(q, limit)
+        else:
+            store = get_store()
+            if store is None or not store.keys:
+                raise HTTPException(status_code=404, detail="沒有處理過的課程數據")
+
+            # 由新到舊逐學期比對，湊滿 limit 筆即停止
+            query = q.lower()
+            matched, remaining = [], limit
+            for df in iter_semesters():
+                mask = (
+                    _text(df['課程名稱']).str.lower().str.contains(query, na=False) |
+                    _text(df['教師姓名']).str.lower().str.contains(query, na=False) |
+                    _text(df['英文課程名稱']).str.lower().str.contains(query, na=False)
+                )
+                hits = df[mask].head(remaining)
+                matched.append(hits)
+                remaining -= len(hits)
+                if remaining <= 0:
+                    break
+            results = concat_courses(matched)
+        courses = course_records(results)
         courses = clean_course_data(courses)
-
-        for c in courses:
-            name = str(c.get('課程名稱') or '').strip()
-            teacher = str(c.get('教師姓名') or '').strip()
-            c['historical_acceptance_rate'] = stats_map.get((name, teacher), None)
-
         return CourseResponse(courses=courses, total=len(courses))
     except Exception as e:
         logging.error(f"搜索課程失敗: {e}")
@@ -205,19 +523,24 @@ async def search_courses(q: str, limit: int = 50):
 @app.get("/api/courses/by-class")
 async def get_courses_by_class(department: str, class_name: str, year: int, semester: int):
     try:
+        db = get_database()
+        if db is not None:
+            courses = clean_course_data(course_records(db.by_class(department, class_name, (int(year), int(semester)))))
+            return CourseResponse(courses=courses, total=len(courses))
+
         df = get_courses_by_semester(year, semester)
         if df is None or df.empty:
             return CourseResponse(courses=[], total=0)
         
         mask = (
-            (df['開課班別(代表)'].astype(str).str.contains(department, na=False)) |
-            (df['開課班別(代表)'].astype(str).str.contains(class_name, na=False))
+            (_text(df['開課班別(代表)']).str.contains(department, na=False)) |
+            (_text(df['開課班別(代表)']).str.contains(class_name, na=False))
         )
-        required_mask = df['課程性質'].astype(str).str.contains('必修', na=False)
+        required_mask = _text(df['課程性質']).str.contains('必修', na=False)
         required_courses = df[mask & required_mask]
         elective_courses = df[mask & ~required_mask]
         result_df = pd.concat([required_courses, elective_courses], ignore_index=True)
-        courses = result_df.to_dict('records')
+        courses = course_records(result_df)
         courses = clean_course_data(courses)
         return CourseResponse(courses=courses, total=len(courses))
     except Exception as e:
@@ -227,34 +550,31 @@ async def get_courses_by_class(department: str, class_name: str, year: int, seme
 @app.post("/api/courses/recommend")
 async def recommend_courses(request: RecommendRequest):
     try:
-        full_df = get_latest_courses_df() 
-        if full_df is None or full_df.empty:
+        # sqlite 後端只查詢目標學期的課程與上課時段，不載入學期分區
+        db = get_database()
+        store = get_store() if db is None else None
+        latest_key = db.latest_key if db is not None else store.latest_key if store is not None else None
+        if latest_key is None:
             raise HTTPException(status_code=404, detail="沒有處理過的課程數據")
         
         if request.year is not None and request.semester is not None:
-            current_year, current_semester = request.year, request.semester
+            target_key = (int(request.year), int(request.semester))
         else:
-            current_year = int(full_df['學年度'].max()) if '學年度' in full_df.columns else None
-            if current_year:
-                try:
-                    current_semester = int(full_df[full_df['學年度'] == current_year]['學期'].max())
-                except: current_semester = 1
-            else: current_semester = 1
-
-        target_df = pd.DataFrame()
-        if current_year and current_semester:
-            target_df = full_df[
-                (full_df['學年度'].astype(str) == str(current_year)) & 
-                (full_df['學期'].astype(str) == str(current_semester))
-            ].copy()
-        
-        if target_df.empty:
+            target_key = latest_key
+
+        if db is not None:
+            target_df, target_meetings = db.courses(target_key), db.semester_meetings(target_key)
+        else:
+            partition = store.partition(target_key)
+            target_df = partition.courses if partition is not None else None
+            target_meetings = partition.index.meetings if partition is not None else None
+        if target_df is None or target_df.empty:
             return CourseResponse(courses=[], total=0)
         
         filtered = target_df.copy()
         if request.category:
              if request.category in ["核心通識", "精進中文", "精進英外文", "教育學程", "大二體育", "大三、四體育"]:
-                filtered = filtered[filtered['開課班別(代表)'].astype(str).str.contains(request.category, na=False)]
+                filtered = filtered[_text(filtered['開課班別(代表)']).str.contains(request.category, na=False)]
         
         if request.college:
             c = str(request.college)
@@ -269,7 +589,7 @@ async def recommend_courses(request: RecommendRequest):
                  filtered = filtered[filtered['開課班別(代表)'].str.contains(d, na=False)]
 
         if request.grade and '年級' in filtered.columns:
-             filtered = filtered[filtered['年級'].astype(str) == str(request.grade)]
+             filtered = filtered[_text(filtered['年級']) == str(request.grade)]
 
         if request.level:
             level_col = '部別(大學/碩士/博士)' if '部別(大學/碩士/博士)' in filtered.columns else None
@@ -277,10 +597,10 @@ async def recommend_courses(request: RecommendRequest):
                 level_col = '部別'
 
             if level_col:
-                filtered = filtered[filtered[level_col].astype(str) == request.level]
+                filtered = filtered[_text(filtered[level_col]) == request.level]
             else:
-                mask_phd = filtered['開課班別(代表)'].astype(str).str.contains('博', na=False) | filtered['年級'].astype(str).str.contains('博', na=False)
-                mask_master = filtered['開課班別(代表)'].astype(str).str.contains('碩', na=False) | filtered['年級'].astype(str).str.contains('碩', na=False)
+                mask_phd = _text(filtered['開課班別(代表)']).str.contains('博', na=False) | _text(filtered['年級']).str.contains('博', na=False)
+                mask_master = _text(filtered['開課班別(代表)']).str.contains('碩', na=False) | _text(filtered['年級']).str.contains('碩', na=False)
 
                 if request.level == '博士班':
                     filtered = filtered[mask_phd]
@@ -301,41 +621,30 @@ async def recommend_courses(request: RecommendRequest):
                     if str(v) == d_str and k in days_set: return True
                 return False
 
-            if '星期' in filtered.columns:
-                filtered = filtered[filtered['星期'].apply(check_day)]
+            meetings = target_meetings
+            day_ok = meetings['星期'].astype(object).map(check_day)
+            filtered = filtered[sections_matching_all(filtered['section_id'], meetings, day_ok)]
 
         if request.current_courses:
             for c in request.current_courses:
                 code, serial = str(c.get('code','')), str(c.get('serial',''))
-                filtered = filtered[~((filtered['課程代碼'].astype(str)==code) & (filtered['序號'].astype(str)==serial))]
+                filtered = filtered[~((_text(filtered['課程代碼'])==code) & (_text(filtered['序號'])==serial))]
 
         if request.empty_slots:
             empty_set = set((int(s['day']), int(s['period'])) for s in request.empty_slots if s and 'day' in s and 'period' in s)
-            def fits(row):
-                try:
-                    day = row.get('星期')
-                    if pd.isna(day): return False
-                    if str(day).isdigit(): d_num = int(day)
-                    else: d_num = {'一':1,'二':2,'三':3,'四':4,'五':5,'六':6,'日':7}.get(str(day))
-                    if not d_num: return False
-                    s, e = int(row.get('起始節次') or 0), int(row.get('結束節次') or 0)
-                    if s <= 0 or e <= 0: return False
-                    for p in range(s, e+1):
-                        if (d_num, p) not in empty_set: return False
-                    return True
-                except: return False
-            filtered = filtered[filtered.apply(fits, axis=1)]
-
-        history_df = get_all_historical_courses_df()
-        stats_map = calculate_historical_stats(history_df)
-
-        results_list = filtered.head(50).to_dict('records')
+            meetings = target_meetings
+            slot_ok = pd.Series(
+                [meeting_fits(*m, empty_set) for m in zip(meetings['星期'], meetings['起始節次'], meetings['結束節次'])],
+                index=meetings.index, dtype=bool
+            )
+            filtered = filtered[sections_matching_all(filtered['section_id'], meetings, slot_ok)]
+
+        top = filtered.head(50)
+        results_list = course_records(top)
+        # 最新學期附上需求預測（預測登記人數、中籤機率），其他學期為 None
+        attach_by_section(results_list, top['section_id'].to_numpy(), get_forecast(),
+                          ['predicted_registered', 'predicted_acceptance', 'forecast_basis'])
         results_list = clean_course_data(results_list)
-        
-        for c in results_list:
-            name = str(c.get('課程名稱') or '').strip()
-            teacher = str(c.get('教師姓名') or '').strip()
-            c['historical_acceptance_rate'] = stats_map.get((name, teacher), None)
 
         return CourseResponse(courses=results_list, total=len(results_list))
         
@@ -346,61 +655,205 @@ async def recommend_courses(request: RecommendRequest):
 @app.get("/api/courses/history")
 async def get_course_history(q: str, limit: int = 100):
     try:
-        df = get_all_historical_courses_df()
-        if df is None or df.empty:
+        db = get_database()
+        if db is not None:
+            courses = clean_course_data(course_records(db.search(q, limit, columns=['name', 'teacher'])))
+            return CourseResponse(courses=courses, total=len(courses))
+
+        store = get_store()
+        if store is None or not store.keys:
             raise HTTPException(status_code=404, detail="沒有處理過的課程數據")
         
+        # 由新到舊逐學期比對，湊滿 limit 筆即停止，不必載入更舊的學期
         query = q.lower()
-        mask = (
-            df['課程名稱'].astype(str).str.lower().str.contains(query, na=False) |
-            df['教師姓名'].astype(str).str.lower().str.contains(query, na=False)
-        )
-        results = df[mask].sort_values(['學年度', '學期'], ascending=[False, False]).head(limit)
-        courses = results.to_dict('records')
+        matched, remaining = [], limit
+        for _, df in store.iter_newest():
+            mask = (
+                _text(df['課程名稱']).str.lower().str.contains(query, na=False) |
+                _text(df['教師姓名']).str.lower().str.contains(query, na=False)
+            )
+            hits = df[mask].head(remaining)
+            matched.append(hits)
+            remaining -= len(hits)
+            if remaining <= 0:
+                break
+        results = concat_courses(matched)
+        courses = course_records(results)
         courses = clean_course_data(courses)
         return CourseResponse(courses=courses, total=len(courses))
     except Exception as e:
         raise HTTPException(status_code=500, detail="獲取歷年資料失敗")
 
+# 統計端點用到的欄位，sqlite 後端只讀取這些欄位
+STATS_COLUMNS = ['教師姓名', '開課班別(代表)', '課程性質', '全英語授課', '選上人數']
+
+def course_stats(frames: Iterable[pd.DataFrame]) -> Optional[Dict[str, Any]]:
+    """逐塊（學期）累加課程統計；沒有任何課程時回傳 None"""
+    total = english = enrolled_sum = enrolled_count = max_enrollment = 0
+    teachers: Set[str] = set()
+    departments = pd.Series(dtype='int64')
+    course_types = pd.Series(dtype='int64')
+    for df in frames:
+        if df is None or df.empty:
+            continue
+        total += len(df)
+        if '教師姓名' in df.columns:
+            teachers.update(df['教師姓名'].dropna().astype(str).unique())
+        if '開課班別(代表)' in df.columns:
+            departments = departments.add(df['開課班別(代表)'].astype(object).value_counts(), fill_value=0)
+        if '課程性質' in df.columns:
+            course_types = course_types.add(df['課程性質'].astype(object).value_counts(), fill_value=0)
+        if '全英語授課' in df.columns:
+            english += int(df['全英語授課'].sum())
+        if '選上人數' in df.columns:
+            enrolled = df['選上人數'].dropna()
+            enrolled_sum += float(enrolled.sum())
+            enrolled_count += len(enrolled)
+            if len(enrolled):
+                max_enrollment = max(max_enrollment, int(enrolled.max()))
+    if total == 0:
+        return None
+    return {
+        "total_courses": total,
+        "total_teachers": len(teachers),
+        "departments": departments.sort_values(ascending=False, kind='stable').head(10).astype(int).to_dict(),
+        "course_types": course_types.sort_values(ascending=False, kind='stable').astype(int).to_dict(),
+        "english_only": english,
+        "avg_enrollment": enrolled_sum / enrolled_count if enrolled_count else 0,
+        "max_enrollment": max_enrollment
+    }
+
 @app.get("/api/courses/stats")
 async def get_course_stats():
     try:
-        df = get_latest_courses_df()
-        if df is None or df.empty:
+        db = get_database()
+        stats = course_stats([db.all_courses(STATS_COLUMNS)] if db is not None else iter_semesters())
+        if stats is None:
              raise HTTPException(status_code=404)
-        stats = {
-            "total_courses": len(df),
-            "total_teachers": df['教師姓名'].nunique() if '教師姓名' in df.columns else 0,
-            "departments": df['開課班別(代表)'].value_counts().head(10).to_dict() if '開課班別(代表)' in df.columns else {},
-            "course_types": df['課程性質'].value_counts().to_dict() if '課程性質' in df.columns else {},
-            "english_only": int(df['全英語授課'].sum()) if '全英語授課' in df.columns else 0,
-            "avg_enrollment": float(df['選上人數'].mean()) if '選上人數' in df.columns else 0,
-            "max_enrollment": int(df['選上人數'].max()) if '選上人數' in df.columns else 0
-        }
         return stats
     except: raise HTTPException(500)
 
 @app.get("/api/courses/{course_id}")
 async def get_course_detail(course_id: str):
     try:
-        df = get_latest_courses_df()
-        if df is None or df.empty: raise HTTPException(404)
-        course = df[df['課程代碼'].astype(str) == str(course_id)]
+        db = get_database()
+        if db is not None:
+            course = db.find(course_id)
+            if not course.empty:
+                # 取最新一個有開課的學期
+                course = course[(course['學年度'] == course['學年度'].iloc[-1]) & (course['學期'] == course['學期'].iloc[-1])]
+        else:
+            # 由新到舊逐學期查找，找到即停止
+            course = pd.DataFrame()
+            for df in iter_semesters():
+                course = df[_text(df['課程代碼']) == str(course_id)]
+                if not course.empty:
+                    break
         if course.empty: raise HTTPException(404)
-        return clean_single_course(course.iloc[0].to_dict())
+        return clean_single_course(course_records(course.head(1))[0])
     except HTTPException: raise
     except Exception: raise HTTPException(500)
 
+@app.get("/api/courses/{course_id}/similar")
+async def get_similar_courses(course_id: str, serial: Optional[str] = None, limit: int = 10,
+                              slots: Optional[List[str]] = Query(None)):
+    """最新學期中名稱相似的其他課程開課班（依相似度遞減）；slots 為空堂（星期-節次，如 1-3），
+    指定時只回傳所有上課時段都落在空堂內的開課班。
+
+    只從索引預先保留的 SIMILAR_TOP_K 個相似開課班中篩選，空堂條件嚴格時結果可能少於 limit。
+    """
+    index = get_similarity_index()
+    if index is None:
+        raise HTTPException(status_code=404, detail="尚無相似課程索引，請先執行 python main.py similar")
+
+    source = find_latest_sections(course_id, serial)
+    if source.empty:
+        raise HTTPException(status_code=404, detail="找不到課程")
+
+    section_ids, scores = index.similar(int(source['section_id'].iloc[0]))
+    if slots:
+        try:
+            empty_set = set(tuple(int(x) for x in slot.split('-', 1)) for slot in slots)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="slots 格式為 星期-節次，例如 1-3")
+        keep = [bool(meetings) and all(meeting_fits(m['星期'], m['起始節次'], m['結束節次'], empty_set)
+                                       for m in meetings)
+                for meetings in lookup_meetings(section_ids)]
+        section_ids, scores = section_ids[keep], scores[keep]
+    section_ids, scores = section_ids[:limit], scores[:limit]
+
+    courses = course_records(course_rows(section_ids))
+    for course, score in zip(courses, scores):
+        course['similarity'] = round(float(score), 4)
+    courses = clean_course_data(courses)
+    return CourseResponse(courses=courses, total=len(courses))
+
+@app.get("/api/courses/{course_id}/history")
+async def get_course_identity_history(course_id: str, serial: Optional[str] = None):
+    """同一門課（跨學期課程身分）在各學期的開課班，由新到舊；serial 指定最新學期的序號"""
+    features = get_features()
+    if features is None:
+        raise HTTPException(status_code=404, detail="尚無特徵表，請先執行 python main.py features")
+
+    source = find_latest_sections(course_id, serial)
+    if source.empty:
+        raise HTTPException(status_code=404, detail="找不到課程")
+
+    section_ids = features.history(int(source['section_id'].iloc[0]))[::-1]
+    courses = clean_course_data(course_records(course_rows(section_ids)))
+    return CourseResponse(courses=courses, total=len(courses))
+
+@app.get("/api/teachers/{name}")
+async def get_teacher_profile(name: str):
+    """教師的跨學期授課檔案：授課課程、學期、平均中籤率/滿班率、常見上課時段與合授教師"""
+    profiles = get_teacher_profiles()
+    if profiles is None:
+        raise HTTPException(status_code=404, detail="尚無教師檔案，請先執行 python main.py teachers")
+    profile = profiles.get(name.strip())
+    if profile is None:
+        raise HTTPException(status_code=404, detail="找不到教師")
+    return profile
+
+@app.get("/api/clusters")
+async def get_cluster_summary(year: Optional[int] = None, semester: Optional[int] = None,
+                              category: Optional[str] = None):
+    """各 (學年度, 學期, 分類) 的分群摘要：課程數與平均中籤率/飽和度；未指定學期時為最新一個已分群的學期
+    （尚無選上資料的學期不分群）"""
+    clusters = get_clusters()
+    if clusters is None or clusters.empty:
+        raise HTTPException(status_code=404, detail="尚無分群結果，請先執行 python main.py cluster")
+    if not (year and semester):
+        latest = clusters.sort_values(['學年度', '學期']).iloc[-1]
+        year, semester = int(latest['學年度']), int(latest['學期'])
+    selected = clusters[(clusters['學年度'] == int(year)) & (clusters['學期'] == int(semester))]
+    if category:
+        selected = selected[selected['分類'] == category]
+    summary = (
+        selected.groupby(['分類', 'cluster', '分群描述'], observed=True)
+        .agg(courses=('section_id', 'size'), 中籤率=('中籤率', 'mean'), 飽和度=('飽和度', 'mean'))
+        .reset_index()
+    )
+    summary['分類'] = summary['分類'].astype(str)
+    summary['分群描述'] = summary['分群描述'].astype(str)
+    return {"year": int(year), "semester": int(semester), "clusters": summary.round(4).to_dict('records')}
+
+@app.get("/api/status")
+async def get_status():
+    """資料集版本、啟動來源（狀態快照或來源檔）、冷啟動與第一個請求的耗時"""
+    return {"version": dataset_version(), **_startup_stats}
+
 @app.get("/api/departments")
 async def get_departments(year: Optional[int] = None, semester: Optional[int] = None):
     try:
-        if year and semester: df = get_courses_by_semester(year, semester)
-        else: df = get_latest_courses_df()
-        if df is None or df.empty or '開課班別(代表)' not in df.columns: return {"departments": []}
-        departments = df['開課班別(代表)'].dropna().unique().tolist()
-        departments = [d for d in departments if d and str(d).strip()]
-        departments.sort()
-        return {"departments": departments}
+        db = get_database()
+        if db is not None:
+            return {"departments": db.departments((int(year), int(semester)) if year and semester else None)}
+        frames = [get_courses_by_semester(year, semester)] if year and semester else iter_semesters()
+        departments: Set[str] = set()
+        for df in frames:
+            if df is None or df.empty or '開課班別(代表)' not in df.columns: continue
+            departments.update(d for d in df['開課班別(代表)'].dropna().unique().tolist() if d and str(d).strip())
+        return {"departments": sorted(departments)}
     except: raise HTTPException(500)
 
 def main():
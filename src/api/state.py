@@ -0,0 +1,111 @@
+"""API 服務狀態快照 - 將可直接服務的狀態（型別化的學期分區、上課時段索引、競爭特徵表、分群/預測結果、
+相似課程索引、教師檔案）序列化為單一檔案，API 啟動時一次讀入，不必重新解析 CSV 與建立索引
+
+檔案開頭為小型標頭（格式版本、資料集版本、各來源檔的修改時間與大小），讀取時先比對標頭，
+來源檔有任何變動（重新處理、補跑某個階段）即視為過期，改由各來源檔延遲載入。
+只讀取本機 api-state 階段產生的檔案。
+"""
+
+import logging
+import pickle
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from config import API_STATE_DIR
+
+# 狀態內容或相關類別（PartitionedDataset、CourseFeatureTable 等）改變時遞增，舊版快照視為不存在
+API_STATE_VERSION = 1
+
+SourceStamp = Optional[Tuple[int, int]]
+
+
+def state_path_for(version: str) -> Path:
+    """資料集版本對應的狀態快照路徑（api_state/api_state_<時間戳>.pkl）"""
+    return API_STATE_DIR / f"api_state_{version}.pkl"
+
+
+def source_stamps(sources: Dict[str, Path]) -> Dict[str, SourceStamp]:
+    """各來源檔的 (修改時間 ns, 大小)，不存在者為 None"""
+    stamps = {}
+    for name, path in sources.items():
+        try:
+            stat = path.stat()
+            stamps[name] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamps[name] = None
+    return stamps
+
+
+def write_state(path: Path, version: str, sources: Dict[str, Path], state: Dict[str, Any]) -> Path:
+    header = {'format_version': API_STATE_VERSION, 'version': version, 'sources': source_stamps(sources)}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path.replace(path)
+    return path
+
+
+def _header_matches(header: Dict[str, Any], path: Path, version: str, sources: Dict[str, Path]) -> bool:
+    if header.get('format_version') != API_STATE_VERSION or header.get('version') != version:
+        logging.info(f"狀態快照版本不符，略過：{path.name}")
+        return False
+    if header.get('sources') != source_stamps(sources):
+        logging.info(f"來源檔已變動，狀態快照過期：{path.name}")
+        return False
+    return True
+
+
+def state_is_current(path: Path, version: str, sources: Dict[str, Path]) -> bool:
+    """只讀標頭判斷狀態快照是否仍對應目前的來源檔；無法讀取（截斷、不同版本的 pandas 等）時視為過期"""
+    if not path.exists():
+        return False
+    try:
+        with open(path, 'rb') as f:
+            return _header_matches(pickle.load(f), path, version, sources)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as e:
+        logging.warning(f"讀取狀態快照標頭失敗，將重新建立：{path.name}（{e}）")
+        return False
+
+
+def read_state(path: Path, version: str, sources: Dict[str, Path]) -> Optional[Dict[str, Any]]:
+    """讀取狀態快照；不存在、格式版本不符或來源檔已變動時回傳 None"""
+    if not path.exists():
+        return None
+    with open(path, 'rb') as f:
+        if not _header_matches(pickle.load(f), path, version, sources):
+            return None
+        return pickle.load(f)
+
+
+def main(use_cache: bool = True, version: Optional[str] = None):
+    """建立資料集版本對應的狀態快照；未指定版本（由命令列執行）時為最新的資料集"""
+    from utils.common import setup_logging
+    setup_logging()
+    # API 模組只有建立快照時需要，延遲匯入
+    from api.app import dataset_source, export_state, state_sources, use_dataset
+
+    source = dataset_source(version)
+    if source is None:
+        logging.error("找不到處理後的資料集，請先執行 process")
+        return
+
+    version, _ = source
+    use_dataset(version)
+    output_path = state_path_for(version)
+    sources = state_sources(source)
+    if use_cache and state_is_current(output_path, version, sources):
+        print(f"\n資料集與衍生結果未變動，沿用狀態快照：{output_path}")
+        return
+
+    started = time.perf_counter()
+    state = export_state()
+    write_state(output_path, version, sources, state)
+    size_mb = output_path.stat().st_size / 1e6
+    print(f"\n狀態快照完成（{size_mb:.1f} MB，{time.perf_counter() - started:.2f}s）：{output_path}")
+
+
+if __name__ == "__main__":
+    main()
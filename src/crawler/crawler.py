@@ -7,12 +7,15 @@ from urllib.parse import urljoin
 from pathlib import Path
 from typing import List, Tuple, Dict, Any, Optional
 import logging
+import time
 
 from config import (
     BASE_URL, BASE_DOMAIN, RAW_DATA_DIR,
-    START_YEAR, START_SEMESTER, END_YEAR, END_SEMESTER, CLS_BRANCH, HTML_PARSER
+    START_YEAR, START_SEMESTER, END_YEAR, END_SEMESTER, CLS_BRANCH, HTML_PARSER,
+    SNAPSHOT_INTERVAL
 )
 from utils.common import safe_write_csv, get_timestamp
+from .snapshot_store import EnrollmentSnapshotStore, COUNT_COLUMNS
 
 class CourseCrawler:
     def __init__(self):
@@ -164,6 +167,26 @@ class CourseCrawler:
 
         return headers, data
 
+    @staticmethod
+    def parse_enrollment_counts(table: BeautifulSoup) -> pd.DataFrame:
+        """僅擷取課程鍵與人數欄位（快照模式用）"""
+        rows = table.find_all("tr")
+        headers = [th.get_text(strip=True) for th in rows[0].find_all("th")]
+        wanted = ['課程代碼', '序號'] + COUNT_COLUMNS
+        col_idx = {h: headers.index(h) for h in wanted if h in headers}
+        missing = [h for h in wanted if h not in col_idx]
+        if missing:
+            raise RuntimeError(f"課程資料表缺少人數快照所需欄位: {missing}")
+
+        data = []
+        for row in rows[1:]:
+            cols = row.find_all("td")
+            if len(cols) < len(headers):
+                continue
+            data.append([cols[col_idx[h]].get_text(strip=True) for h in wanted])
+
+        return pd.DataFrame(data, columns=wanted)
+
     def crawl_semester(self, year: int, semester: int) -> bool:
         """爬取單一學期的課程數據"""
         try:
@@ -195,6 +218,34 @@ class CourseCrawler:
         for year, semester in semesters:
             self.crawl_semester(year, semester)
 
+    def snapshot_semester(self, store: EnrollmentSnapshotStore) -> int:
+        """爬取一次人數快照並寫入儲存，回傳有變動的課程數"""
+        table = self.fetch_course_table(store.year, store.semester, CLS_BRANCH)
+        counts_df = self.parse_enrollment_counts(table)
+        if counts_df.empty:
+            self.logger.warning(f"{store.year}-{store.semester} 查無人數資料")
+            return 0
+        changed = store.append(counts_df)
+        self.logger.info(f"快照 {store.year}-{store.semester}: {len(counts_df)} 門課，{changed} 門人數變動")
+        return changed
+
+    def run_snapshot_loop(self, interval: int = SNAPSHOT_INTERVAL, iterations: Optional[int] = None) -> None:
+        """選課期間定時爬取當學期人數快照"""
+        store = EnrollmentSnapshotStore(END_YEAR, END_SEMESTER)
+        self.logger.info(f"開始人數快照 {END_YEAR}-{END_SEMESTER}，間隔 {interval} 秒")
+
+        count = 0
+        while iterations is None or count < iterations:
+            started = time.monotonic()
+            try:
+                self.snapshot_semester(store)
+            except Exception as e:
+                self.logger.error(f"人數快照失敗: {e}")
+            count += 1
+            if iterations is not None and count >= iterations:
+                break
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
 def main():
     from utils.common import setup_logging
     setup_logging()
@@ -202,5 +253,30 @@ def main():
     crawler = CourseCrawler()
     crawler.crawl_all_semesters()
 
+def snapshot_main(interval: Optional[int] = None, iterations: Optional[int] = None):
+    from utils.common import setup_logging
+    setup_logging()
+
+    crawler = CourseCrawler()
+    crawler.run_snapshot_loop(interval or SNAPSHOT_INTERVAL, iterations)
+
+def snapshot_report_main(window_minutes: float = 60, top: int = 20):
+    """列出當學期人數快照中最近登記速度最快、以及最快額滿的課程"""
+    from utils.common import setup_logging
+    setup_logging()
+
+    store = EnrollmentSnapshotStore(END_YEAR, END_SEMESTER)
+    if not len(store.read_ticks()):
+        logging.error(f"{store.store_dir} 尚無人數快照，請先執行 python main.py snapshot")
+        return
+
+    velocity = store.enrollment_velocity(window_minutes).sort_values('登記速度', ascending=False, kind='stable')
+    print(f"\n{END_YEAR}-{END_SEMESTER} 最近 {window_minutes:g} 分鐘登記速度最快的課程（人/分鐘）：")
+    print(velocity.head(top).to_string(index=False))
+
+    full = store.time_to_full().dropna(subset=['額滿分鐘']).sort_values('額滿分鐘', kind='stable')
+    print(f"\n已額滿 {len(full)} 門課程，最快額滿的課程：")
+    print(full.head(top).to_string(index=False))
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
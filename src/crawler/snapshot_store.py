@@ -0,0 +1,195 @@
+"""選課人數快照儲存 - 以緊湊的欄式時間序列記錄上限/登記/選上人數"""
+
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import logging
+
+from config import SNAPSHOT_DIR
+
+# 每筆變動紀錄：時間戳（UTC epoch 秒）、課程鍵、上限人數、登記人數、選上人數
+RECORD_DTYPE = np.dtype([
+    ('ts', '<i8'),
+    ('key', '<i4'),
+    ('cap', '<i4'),
+    ('reg', '<i4'),
+    ('sel', '<i4'),
+])
+
+COUNT_COLUMNS = ['上限人數', '登記人數', '選上人數']
+
+
+class EnrollmentSnapshotStore:
+    """單一學期的人數快照儲存
+
+    目錄結構：
+      keys.csv    課程鍵對照（key, 課程代碼, 序號），僅追加
+      ticks.bin   每次快照的時間戳（int64）
+      counts.bin  人數變動紀錄（RECORD_DTYPE），只寫入與上次不同的課程
+    """
+
+    def __init__(self, year: int, semester: int, base_dir: Path = SNAPSHOT_DIR):
+        self.logger = logging.getLogger(__name__)
+        self.year = year
+        self.semester = semester
+        self.store_dir = base_dir / f"{year}_{semester}"
+        self.keys_path = self.store_dir / "keys.csv"
+        self.ticks_path = self.store_dir / "ticks.bin"
+        self.counts_path = self.store_dir / "counts.bin"
+
+        self._key_index: Dict[Tuple[str, str], int] = {}
+        self._last_counts: Optional[np.ndarray] = None
+        self._load_state()
+
+    def _load_state(self) -> None:
+        """載入既有課程鍵與每門課最後一次紀錄的人數"""
+        self._key_index = {}
+        if self.keys_path.exists():
+            keys_df = pd.read_csv(self.keys_path, dtype=str, encoding='utf-8')
+            for key, code, serial in keys_df[['key', '課程代碼', '序號']].itertuples(index=False):
+                self._key_index[(code, serial)] = int(key)
+
+        last = np.full((len(self._key_index), 3), -1, dtype=np.int32)
+        records = self.read_records()
+        if len(records):
+            # 紀錄依時間追加，後寫入者覆蓋前者即為最新狀態
+            last[records['key']] = np.column_stack([records['cap'], records['reg'], records['sel']])
+        self._last_counts = last
+
+    def read_records(self) -> np.ndarray:
+        if not self.counts_path.exists():
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.fromfile(self.counts_path, dtype=RECORD_DTYPE)
+
+    def read_ticks(self) -> np.ndarray:
+        if not self.ticks_path.exists():
+            return np.empty(0, dtype='<i8')
+        return np.fromfile(self.ticks_path, dtype='<i8')
+
+    def _resolve_keys(self, codes: np.ndarray, serials: np.ndarray) -> np.ndarray:
+        """將 (課程代碼, 序號) 轉為整數鍵，新課程追加至 keys.csv"""
+        keys = np.empty(len(codes), dtype=np.int32)
+        new_rows = []
+        for i, pair in enumerate(zip(codes, serials)):
+            key = self._key_index.get(pair)
+            if key is None:
+                key = len(self._key_index)
+                self._key_index[pair] = key
+                new_rows.append((key, pair[0], pair[1]))
+            keys[i] = key
+
+        if new_rows:
+            write_header = not self.keys_path.exists()
+            pd.DataFrame(new_rows, columns=['key', '課程代碼', '序號']).to_csv(
+                self.keys_path, mode='a', header=write_header, index=False, encoding='utf-8'
+            )
+            grown = np.full((len(self._key_index), 3), -1, dtype=np.int32)
+            grown[:len(self._last_counts)] = self._last_counts
+            self._last_counts = grown
+        return keys
+
+    def append(self, counts_df: pd.DataFrame, timestamp: Optional[int] = None) -> int:
+        """追加一次快照，回傳實際寫入（人數有變動）的課程數"""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        ts = int(timestamp if timestamp is not None else time.time())
+
+        codes = counts_df['課程代碼'].astype(str).to_numpy()
+        serials = counts_df['序號'].astype(str).to_numpy()
+        values = (
+            counts_df[COUNT_COLUMNS]
+            .apply(pd.to_numeric, errors='coerce')
+            .fillna(0)
+            .to_numpy(dtype=np.int32)
+        )
+
+        keys = self._resolve_keys(codes, serials)
+        changed = (self._last_counts[keys] != values).any(axis=1)
+
+        records = np.empty(int(changed.sum()), dtype=RECORD_DTYPE)
+        records['ts'] = ts
+        records['key'] = keys[changed]
+        records['cap'] = values[changed, 0]
+        records['reg'] = values[changed, 1]
+        records['sel'] = values[changed, 2]
+
+        with open(self.counts_path, 'ab') as f:
+            records.tofile(f)
+        with open(self.ticks_path, 'ab') as f:
+            np.array([ts], dtype='<i8').tofile(f)
+
+        self._last_counts[keys[changed]] = values[changed]
+        return len(records)
+
+    def _keys_frame(self) -> pd.DataFrame:
+        pairs = sorted(self._key_index.items(), key=lambda x: x[1])
+        return pd.DataFrame(
+            [(code, serial) for (code, serial), _ in pairs],
+            columns=['課程代碼', '序號'],
+        )
+
+    def _sorted_records(self) -> np.ndarray:
+        records = self.read_records()
+        order = np.lexsort((records['ts'], records['key']))
+        return records[order]
+
+    def enrollment_velocity(self, window_minutes: float = 60) -> pd.DataFrame:
+        """每門課在最近 window_minutes 內的登記/選上人數變化速度（人/分鐘）"""
+        records = self._sorted_records()
+        ticks = self.read_ticks()
+        keys_df = self._keys_frame()
+        if len(records) == 0 or len(ticks) == 0:
+            return keys_df.assign(**{c: pd.Series(dtype='float64') for c in ['登記速度', '選上速度']})
+
+        end = int(ticks.max())
+        start = max(int(ticks.min()), end - int(window_minutes * 60))
+        span_minutes = max((end - start) / 60, 1 / 60)
+
+        n_keys = len(keys_df)
+        key_starts = np.searchsorted(records['key'], np.arange(n_keys), side='left')
+        key_ends = np.searchsorted(records['key'], np.arange(n_keys), side='right')
+        has_records = key_ends > key_starts
+
+        # 以 (key, ts) 組合鍵定位每門課在視窗起點當下的最後一筆紀錄
+        t0 = int(records['ts'].min())
+        composite = (records['key'].astype(np.int64) << 32) | (records['ts'] - t0)
+        probe = (np.arange(n_keys, dtype=np.int64) << 32) | max(start - t0, 0)
+        at_start = np.searchsorted(composite, probe, side='right') - 1
+        valid_start = has_records & (at_start >= key_starts)
+        # 視窗起點之前尚無紀錄者，以該課程第一筆紀錄為起點
+        at_start = np.where(valid_start, at_start, key_starts)
+        latest = np.clip(key_ends - 1, 0, None)
+
+        at_start = np.clip(at_start, 0, len(records) - 1)
+        reg_delta = np.where(has_records, records['reg'][latest] - records['reg'][at_start], 0)
+        sel_delta = np.where(has_records, records['sel'][latest] - records['sel'][at_start], 0)
+
+        result = keys_df.copy()
+        result['上限人數'] = np.where(has_records, records['cap'][latest], 0)
+        result['登記人數'] = np.where(has_records, records['reg'][latest], 0)
+        result['選上人數'] = np.where(has_records, records['sel'][latest], 0)
+        result['登記速度'] = reg_delta / span_minutes
+        result['選上速度'] = sel_delta / span_minutes
+        return result
+
+    def time_to_full(self) -> pd.DataFrame:
+        """每門課自第一次快照起至登記人數達上限所經過的分鐘數（未額滿為 NaN）"""
+        records = self._sorted_records()
+        ticks = self.read_ticks()
+        result = self._keys_frame()
+        result['額滿時間'] = pd.Series(pd.NaT, index=result.index, dtype='datetime64[ns, UTC]')
+        result['額滿分鐘'] = np.nan
+        if len(records) == 0 or len(ticks) == 0:
+            return result
+
+        full = (records['cap'] > 0) & (records['reg'] >= records['cap'])
+        full_records = records[full]
+        # 已依 (key, ts) 排序，np.unique 的首次索引即為每門課第一次額滿
+        full_keys, first_idx = np.unique(full_records['key'], return_index=True)
+        full_ts = full_records['ts'][first_idx]
+
+        origin = int(ticks.min())
+        result.loc[full_keys, '額滿時間'] = pd.to_datetime(full_ts, unit='s', utc=True)
+        result.loc[full_keys, '額滿分鐘'] = (full_ts - origin) / 60
+        return result
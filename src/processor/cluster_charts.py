@@ -0,0 +1,298 @@
+"""分群視覺化 - 以 Agg 後端在行程池中平行繪製分群圖表，輸入資料未變動的圖表直接略過
+
+每張圖表由「準備資料」與「繪圖」兩步組成：準備好的資料連同圖表版本計算雜湊，與上次繪製時記錄的雜湊相同
+（且輸出檔仍在）就不重畫；重畫的圖表再複製到 web/assets/images 供前端使用。
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from config import CLUSTER_DIR, CHART_DIR, WEB_DIR, CHART_CATEGORY, CHART_DPI
+from utils.common import safe_read_csv
+
+# 圖表樣式或繪圖邏輯改變時遞增，使所有圖表重畫
+CHART_VERSION = "2"
+MANIFEST_NAME = 'charts.json'
+WEB_IMAGE_DIR = WEB_DIR / "assets" / "images"
+
+FACE_COLOR = '#f8f9fa'
+# 中籤率為 上限/登記（取上限 1），飽和度為 選上/上限
+SELECTION_RATE_LABEL = 'Selection Rate (Capacity / Registered, capped at 1)'
+SATURATION_LABEL = 'Saturation (Selected / Capacity)'
+
+
+class ChartSpec(NamedTuple):
+    filename: str
+    prepare: Callable[[pd.DataFrame], pd.DataFrame]
+    render: Callable[[pd.DataFrame, Path], None]
+
+
+def _raw_points(df: pd.DataFrame) -> pd.DataFrame:
+    return df[['cluster', '中籤率', '飽和度']].sort_values(['cluster', '中籤率', '飽和度'], ignore_index=True)
+
+
+def _cluster_stats(df: pd.DataFrame) -> pd.DataFrame:
+    stats = df.groupby('cluster').agg(
+        courses=('cluster', 'size'),
+        rate_mean=('中籤率', 'mean'), rate_std=('中籤率', 'std'),
+        sat_mean=('飽和度', 'mean'), sat_std=('飽和度', 'std'),
+    )
+    return stats.round(3).reset_index()
+
+
+def _cluster_counts(df: pd.DataFrame) -> pd.DataFrame:
+    return df['cluster'].value_counts().sort_index().rename_axis('cluster').reset_index(name='courses')
+
+
+def _colors(n: int):
+    import matplotlib.pyplot as plt
+    return plt.cm.tab10(np.linspace(0, 1, n))
+
+
+def _by_cluster(data: pd.DataFrame, column: str):
+    clusters = sorted(data['cluster'].unique())
+    return clusters, [data.loc[data['cluster'] == c, column].to_numpy() for c in clusters]
+
+
+def _style(ax, xlabel: str = None, ylabel: str = None, title: str = None, grid_axis: str = 'both'):
+    if xlabel:
+        ax.set_xlabel(xlabel, fontsize=12, fontweight='bold')
+    if ylabel:
+        ax.set_ylabel(ylabel, fontsize=12, fontweight='bold')
+    if title:
+        ax.set_title(title, fontsize=13, fontweight='bold')
+    ax.grid(True, alpha=0.3, axis=grid_axis, linestyle='--')
+    ax.set_facecolor(FACE_COLOR)
+
+
+def render_scatter(data: pd.DataFrame, path: Path) -> None:
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(12, 8))
+    clusters = sorted(data['cluster'].unique())
+    for color, cluster in zip(_colors(len(clusters)), clusters):
+        points = data[data['cluster'] == cluster]
+        ax.scatter(points['飽和度'], points['中籤率'], label=f'Cluster {cluster} (n={len(points)})',
+                   color=color, alpha=0.6, s=50, edgecolors='black', linewidth=0.5)
+    _style(ax, SATURATION_LABEL, SELECTION_RATE_LABEL, 'K-Means Clustering: Selection Rate vs Saturation')
+    ax.legend(title='Cluster', fontsize=10, title_fontsize=11)
+    fig.tight_layout()
+    fig.savefig(path, dpi=CHART_DPI, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_distribution(data: pd.DataFrame, path: Path) -> None:
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(10, 6))
+    bars = ax.bar([f'Cluster {c}' for c in data['cluster']], data['courses'],
+                  color=_colors(len(data)), edgecolor='black', linewidth=1.5, alpha=0.8)
+    for bar in bars:
+        ax.text(bar.get_x() + bar.get_width() / 2., bar.get_height(), f'{int(bar.get_height())}',
+                ha='center', va='bottom', fontsize=11, fontweight='bold')
+    _style(ax, 'Cluster', 'Number of Courses', 'Distribution of Courses Across Clusters', grid_axis='y')
+    fig.tight_layout()
+    fig.savefig(path, dpi=CHART_DPI, bbox_inches='tight')
+    plt.close(fig)
+
+
+def _render_pair(data: pd.DataFrame, path: Path, draw: Callable) -> None:
+    """中籤率與飽和度並排的分布圖（箱形圖、小提琴圖）"""
+    import matplotlib.pyplot as plt
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+    for ax, column, name, label in zip(axes, ['中籤率', '飽和度'], ['Selection Rate', 'Saturation'],
+                                       [SELECTION_RATE_LABEL, SATURATION_LABEL]):
+        clusters, values = _by_cluster(data, column)
+        draw(ax, values, _colors(len(clusters)))
+        ax.set_xticks(range(len(clusters)))
+        ax.set_xticklabels([f'Cluster {c}' for c in clusters])
+        _style(ax, ylabel=label, title=f'{name} Distribution by Cluster', grid_axis='y')
+    fig.tight_layout()
+    fig.savefig(path, dpi=CHART_DPI, bbox_inches='tight')
+    plt.close(fig)
+
+
+def _draw_box(ax, values, colors):
+    parts = ax.boxplot(values, positions=range(len(values)), patch_artist=True, showmeans=True, meanline=True)
+    for patch, color in zip(parts['boxes'], colors):
+        patch.set_facecolor(color)
+        patch.set_alpha(0.7)
+
+
+def _draw_violin(ax, values, colors):
+    parts = ax.violinplot(values, positions=range(len(values)), showmeans=True, showmedians=True)
+    for body, color in zip(parts['bodies'], colors):
+        body.set_facecolor(color)
+        body.set_alpha(0.7)
+
+
+def render_boxplot(data: pd.DataFrame, path: Path) -> None:
+    _render_pair(data, path, _draw_box)
+
+
+def render_violin(data: pd.DataFrame, path: Path) -> None:
+    _render_pair(data, path, _draw_violin)
+
+
+def render_table(data: pd.DataFrame, path: Path) -> None:
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(14, 8))
+    ax.axis('off')
+    rows = [[f'Cluster {r.cluster}', f'{r.courses:.0f}', f'{r.rate_mean:.3f}', f'{r.rate_std:.3f}',
+             f'{r.sat_mean:.3f}', f'{r.sat_std:.3f}'] for r in data.itertuples()]
+    table = ax.table(cellText=rows,
+                     colLabels=['Cluster', 'Count', 'Selection Rate (Mean)\nCapacity / Registered,\ncapped at 1',
+                                'Selection Rate (Std)\nCapacity / Registered,\ncapped at 1',
+                                'Saturation (Mean)\nSelected / Capacity', 'Saturation (Std)\nSelected / Capacity'],
+                     cellLoc='center', loc='center', bbox=[0, 0, 1, 1])
+    table.auto_set_font_size(False)
+    table.set_fontsize(10)
+    for (row, _), cell in table.get_celld().items():
+        if row == 0:
+            cell.set_facecolor('#4a90e2')
+            cell.set_text_props(weight='bold', color='white')
+        else:
+            cell.set_facecolor('#f0f0f0' if row % 2 == 0 else 'white')
+    ax.set_title('Cluster Statistics Summary', fontsize=16, fontweight='bold', pad=20)
+    fig.savefig(path, dpi=CHART_DPI, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_heatmap(data: pd.DataFrame, path: Path) -> None:
+    import matplotlib.pyplot as plt
+    values = data[['rate_mean', 'sat_mean']].to_numpy().T
+    fig, ax = plt.subplots(figsize=(10, 6))
+    image = ax.imshow(values, cmap='YlOrRd', aspect='auto')
+    fig.colorbar(image, ax=ax, label='Value')
+    for (i, j), value in np.ndenumerate(values):
+        ax.text(j, i, f'{value:.3f}', ha='center', va='center', fontsize=11)
+    ax.set_xticks(range(len(data)))
+    ax.set_xticklabels([str(c) for c in data['cluster']])
+    ax.set_yticks(range(2))
+    ax.set_yticklabels(['Selection Rate (Mean)\nCapacity / Registered,\ncapped at 1',
+                        'Saturation (Mean)\nSelected / Capacity'])
+    ax.set_xlabel('Cluster', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Metric', fontsize=12, fontweight='bold')
+    ax.set_title('Cluster Characteristics Heatmap', fontsize=14, fontweight='bold')
+    fig.tight_layout()
+    fig.savefig(path, dpi=CHART_DPI, bbox_inches='tight')
+    plt.close(fig)
+
+
+CHARTS = [
+    ChartSpec('scatter_selection_vs_saturation.png', _raw_points, render_scatter),
+    ChartSpec('cluster_distribution.png', _cluster_counts, render_distribution),
+    ChartSpec('cluster_statistics_boxplot.png', _raw_points, render_boxplot),
+    ChartSpec('cluster_statistics_table.png', _cluster_stats, render_table),
+    ChartSpec('cluster_distribution_violin.png', _raw_points, render_violin),
+    ChartSpec('cluster_heatmap.png', _cluster_stats, render_heatmap),
+]
+_RENDERERS = {spec.filename: spec.render for spec in CHARTS}
+
+
+def data_hash(filename: str, data: pd.DataFrame) -> str:
+    digest = hashlib.sha256(f"{CHART_VERSION}|{CHART_DPI}|{filename}|{','.join(data.columns)}".encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _render_job(job):
+    """行程池工作：固定使用 Agg 後端（無視窗環境），寫入暫存檔後改名"""
+    import matplotlib
+    matplotlib.use('Agg')
+    filename, data, output_dir = job
+    path = output_dir / filename
+    tmp_path = path.with_name(f"{path.stem}.tmp{path.suffix}")
+    _RENDERERS[filename](data, tmp_path)
+    tmp_path.replace(path)
+    return filename
+
+
+class ChartRenderer:
+    def __init__(self, output_dir: Path = CHART_DIR, web_dir: Path = WEB_IMAGE_DIR):
+        self.output_dir = output_dir
+        self.web_dir = web_dir
+        self.manifest_path = output_dir / MANIFEST_NAME
+        self.logger = logging.getLogger(__name__)
+
+    def load_manifest(self) -> Dict[str, str]:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            return json.loads(self.manifest_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"讀取圖表紀錄失敗，全部重畫: {e}")
+            return {}
+
+    def stale(self, filename: str, digest: str, manifest: Dict[str, str]) -> bool:
+        return (manifest.get(filename) != digest
+                or not (self.output_dir / filename).exists()
+                or not (self.web_dir / filename).exists())
+
+    def run(self, clusters: pd.DataFrame, workers: int = 1, force: bool = False) -> List[str]:
+        """繪製輸入資料有變動的圖表，回傳重畫的檔名"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.web_dir.mkdir(parents=True, exist_ok=True)
+        manifest = {} if force else self.load_manifest()
+
+        jobs, digests = [], {}
+        for spec in CHARTS:
+            data = spec.prepare(clusters)
+            digests[spec.filename] = data_hash(spec.filename, data)
+            if self.stale(spec.filename, digests[spec.filename], manifest):
+                jobs.append((spec.filename, data, self.output_dir))
+        skipped = len(CHARTS) - len(jobs)
+        if not jobs:
+            self.logger.info(f"{skipped} 張圖表的輸入資料皆未變動，略過繪製")
+            return []
+
+        workers = max(1, min(workers, len(jobs)))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                rendered = list(executor.map(_render_job, jobs))
+        else:
+            rendered = [_render_job(job) for job in jobs]
+
+        for filename in rendered:
+            shutil.copy2(self.output_dir / filename, self.web_dir / filename)
+            manifest[filename] = digests[filename]
+        self.manifest_path.write_text(json.dumps(manifest, indent=2) + '\n', encoding='utf-8')
+        self.logger.info(f"重畫 {len(rendered)} 張圖表、略過 {skipped} 張（{workers} 個行程）")
+        return rendered
+
+
+def main(workers: int = 1, use_cache: bool = True, version: Optional[str] = None):
+    """繪製資料集版本對應的分群圖表；未指定版本（由命令列執行）時使用最新的分群結果"""
+    from utils.common import setup_logging
+    setup_logging()
+
+    cluster_files = [CLUSTER_DIR / f"clusters_{version}.csv"] if version is not None else sorted(CLUSTER_DIR.glob("clusters_*.csv"))
+    if not cluster_files or not cluster_files[-1].exists():
+        logging.error(f"{CLUSTER_DIR} 內找不到分群結果，請先執行 cluster")
+        return
+    cluster_file = cluster_files[-1]
+    clusters = safe_read_csv(cluster_file)
+    if clusters is None:
+        return
+    clusters = clusters[clusters['分類'] == CHART_CATEGORY]
+    if clusters.empty:
+        logging.error(f"{cluster_file.name} 沒有「{CHART_CATEGORY}」的分群結果")
+        return
+
+    started = time.perf_counter()
+    try:
+        rendered = ChartRenderer().run(clusters, workers=workers, force=not use_cache)
+    except ImportError:
+        logging.error("繪製圖表需要 matplotlib：pip install matplotlib")
+        return
+    print(f"\n圖表完成（重畫 {len(rendered)} 張，{time.perf_counter() - started:.2f}s）：{WEB_IMAGE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""選課競爭特徵階段 - 對最新的處理後資料集計算競爭特徵表，每個資料集版本只計算一次"""
+
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import FEATURE_DIR
+from utils.common import processed_courses_file
+from utils.course_features import INPUT_COLUMNS, CourseFeatureTable
+from utils.course_tables import read_courses
+
+
+def features_path_for(courses_file: Path) -> Path:
+    """資料集對應的特徵檔路徑（all_courses_<時間戳>.csv -> features/features_<時間戳>.npz）"""
+    return FEATURE_DIR / courses_file.name.replace("all_courses_", "features_", 1).replace(".csv", ".npz")
+
+
+def build_features(courses_file: Path) -> Optional[CourseFeatureTable]:
+    """由資料集計算特徵表（只讀取特徵需要的欄位）"""
+    df = read_courses(courses_file, INPUT_COLUMNS)
+    if df is None:
+        return None
+    return CourseFeatureTable.build(df, version=courses_file.stem.replace("all_courses_", "", 1))
+
+
+def main(use_cache: bool = True, version: Optional[str] = None):
+    from utils.common import setup_logging
+    setup_logging()
+
+    courses_file = processed_courses_file(version)
+    if courses_file is None:
+        return
+    output_path = features_path_for(courses_file)
+    if use_cache and output_path.exists() and CourseFeatureTable.load(output_path) is not None:
+        print(f"\n資料集未變動，沿用特徵表：{output_path}")
+        return
+
+    started = time.perf_counter()
+    table = build_features(courses_file)
+    if table is None:
+        return
+    table.save(output_path)
+    logging.info(f"競爭特徵：{len(table)} 個開課班、{len(table.identity)} 門課程（跨學期課程身分）")
+    print(f"\n特徵表完成（{time.perf_counter() - started:.2f}s）：{output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""選課行為分群 - 以中籤率與飽和度對每個 (學年度, 學期, 分類) 的課程做 K-means 分群，結果依資料集內容快取
+
+中籤率與飽和度取自競爭特徵表（utils.course_features 的 acceptance_rate、fill_rate），與 API 及其他階段的定義一致。
+"""
+
+import logging
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from config import (
+    PARTITION_CACHE_DIR, CLUSTER_DIR,
+    CLUSTER_K, CLUSTER_RANDOM_STATE, CLUSTER_N_INIT, CLUSTER_MIN_SAMPLES, CLUSTER_MIN_SELECTED_SHARE
+)
+from utils.common import safe_write_csv, hash_files, processed_courses_file
+from utils.course_features import FEATURE_TABLE_VERSION, CourseFeatureTable, semester_order
+from utils.course_tables import SECTION_KEY, read_courses
+from processor.competition_features import build_features, features_path_for
+
+# 分群邏輯或輸出欄位改變時遞增，使既有的分群快取失效
+CLUSTER_CACHE_VERSION = "3"
+
+# 依開課班別判斷課程分類（依序比對，先命中者優先，其餘為專業課程）
+COURSE_CATEGORIES = [
+    ('核心通識', '核心通識'),
+    ('精進中文', '精進中文'),
+    ('精進英外文', '精進英外文'),
+    ('師培課程', '教育學程'),
+    ('體育/軍訓', '體育|全民國防'),
+]
+DEFAULT_CATEGORY = '專業課程'
+
+FEATURE_COLUMNS = ['中籤率', '飽和度']
+CLUSTER_COLUMNS = ['section_id', '學年度', '學期', '分類'] + FEATURE_COLUMNS + ['cluster', '分群描述']
+INPUT_COLUMNS = ['section_id'] + SECTION_KEY + ['開課班別(代表)', '選上人數']
+
+# 中籤率（上限/登記，取上限 1）的描述門檻：大部分課程登記未超過上限、中籤率為 1，
+# 群中心稍低於 1 即表示群內有相當比例的課程登記超額；低於 0.5 表示登記人數超過上限兩倍
+EASY_SELECTION_RATE = 0.95
+COMPETITIVE_SELECTION_RATE = 0.5
+
+
+def describe_cluster(selection_rate: float, saturation: float) -> str:
+    """依群中心的平均中籤率與飽和度描述群組"""
+    if selection_rate < COMPETITIVE_SELECTION_RATE and saturation > 1.0:
+        return '競爭激烈、超額選課'
+    if selection_rate >= EASY_SELECTION_RATE and saturation > 1.0:
+        return '熱門課程、超額選課'
+    if selection_rate < COMPETITIVE_SELECTION_RATE and saturation < 0.8:
+        return '競爭激烈、未滿額'
+    if selection_rate >= EASY_SELECTION_RATE and saturation < 0.8:
+        return '容易選上、未滿額'
+    return '中等競爭程度'
+
+
+def _kmeans_labels(features: np.ndarray) -> np.ndarray:
+    """標準化後 K-means 分群；群編號依群中心飽和度由低到高重新排序，不同學期的編號意義一致"""
+    # scikit-learn 只有分群階段需要，延遲匯入
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+
+    scaled = StandardScaler().fit_transform(features)
+    k = min(CLUSTER_K, len(np.unique(scaled, axis=0)))
+    labels = KMeans(n_clusters=k, random_state=CLUSTER_RANDOM_STATE, n_init=CLUSTER_N_INIT).fit_predict(scaled)
+    saturation = np.bincount(labels, weights=features[:, 1], minlength=k) / np.bincount(labels, minlength=k)
+    rank = np.empty(k, dtype=np.int8)
+    rank[np.argsort(saturation, kind='stable')] = np.arange(k)
+    return rank[labels]
+
+
+class CourseClustering:
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = PARTITION_CACHE_DIR
+
+    @staticmethod
+    def categorize(class_names: pd.Series) -> pd.Series:
+        names = class_names.astype(object).fillna('').astype(str)
+        conditions = [names.str.contains(pattern, regex=True).to_numpy() for _, pattern in COURSE_CATEGORIES]
+        return pd.Series(np.select(conditions, [c for c, _ in COURSE_CATEGORIES], DEFAULT_CATEGORY),
+                         index=class_names.index)
+
+    @classmethod
+    def compute_features(cls, courses: pd.DataFrame, table: CourseFeatureTable) -> pd.DataFrame:
+        """所有學期與分類的中籤率（上限/登記，取上限 1）與飽和度（選上/上限），取自競爭特徵表；
+        登記或上限為 0 的課程，以及尚無選上資料的學期（如仍在選課中的最新學期，見 CLUSTER_MIN_SELECTED_SHARE）不納入"""
+        columns = table.lookup(courses['section_id'].to_numpy())
+        acceptance, fill = columns['acceptance_rate'], columns['fill_rate']
+        selected = courses['選上人數'].fillna(0).to_numpy(dtype='float64')
+        # 各學期選上人數大於 0 的開課班比例，過低表示選課尚未結束
+        selected_share = pd.Series(selected > 0).groupby(semester_order(courses)).transform('mean').to_numpy()
+        has_selected = selected_share >= CLUSTER_MIN_SELECTED_SHARE
+        valid = ~np.isnan(acceptance) & ~np.isnan(fill) & has_selected
+        features = pd.DataFrame({
+            'section_id': courses['section_id'].to_numpy()[valid],
+            '學年度': pd.to_numeric(courses['學年度']).to_numpy()[valid],
+            '學期': pd.to_numeric(courses['學期']).to_numpy()[valid],
+            '分類': cls.categorize(courses['開課班別(代表)']).to_numpy()[valid],
+            '中籤率': acceptance[valid],
+            '飽和度': fill[valid],
+        })
+        return features
+
+    def cluster(self, features: pd.DataFrame, workers: int = 1) -> pd.DataFrame:
+        """對每個 (學年度, 學期, 分類) 分群；workers > 1 時以行程池平行處理"""
+        groups: List[Tuple[tuple, np.ndarray]] = []
+        for key, index in features.groupby(['學年度', '學期', '分類'], sort=True).indices.items():
+            if len(index) >= CLUSTER_MIN_SAMPLES:
+                groups.append((key, index))
+        if not groups:
+            return pd.DataFrame(columns=CLUSTER_COLUMNS)
+
+        values = features[FEATURE_COLUMNS].to_numpy()
+        inputs = [values[index] for _, index in groups]
+        workers = max(1, min(workers, len(groups)))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                labels = list(executor.map(_kmeans_labels, inputs))
+        else:
+            labels = [_kmeans_labels(x) for x in inputs]
+
+        order = np.concatenate([index for _, index in groups])
+        result = features.iloc[order].reset_index(drop=True)
+        result['cluster'] = np.concatenate(labels).astype('int8')
+        centers = result.groupby(['學年度', '學期', '分類', 'cluster'])[FEATURE_COLUMNS].transform('mean')
+        result['分群描述'] = [describe_cluster(r, s) for r, s in zip(centers['中籤率'], centers['飽和度'])]
+        self.logger.info(f"分群完成：{len(groups)} 組、{len(result)} 門課程（{workers} 個行程）")
+        return result.sort_values('section_id', kind='stable', ignore_index=True)[CLUSTER_COLUMNS]
+
+    @staticmethod
+    def load_courses(courses_file: Path) -> Optional[pd.DataFrame]:
+        return read_courses(courses_file, INPUT_COLUMNS)
+
+    def load_features(self, courses_file: Path) -> Optional[CourseFeatureTable]:
+        """features 階段寫出的特徵表；沒有或格式版本不符時由資料集計算"""
+        path = features_path_for(courses_file)
+        table = CourseFeatureTable.load(path) if path.exists() else None
+        if table is None:
+            self.logger.info(f"找不到特徵表 {path.name}，由資料集計算")
+            table = build_features(courses_file)
+        return table
+
+    def cache_key(self, courses_file: Path) -> str:
+        params = f"{CLUSTER_CACHE_VERSION}|{FEATURE_TABLE_VERSION}|{CLUSTER_K}|{CLUSTER_RANDOM_STATE}|{CLUSTER_N_INIT}|{CLUSTER_MIN_SAMPLES}|{CLUSTER_MIN_SELECTED_SHARE}"
+        return hash_files([courses_file], extra=params)
+
+    def run(self, courses_file: Path, workers: int = 1, use_cache: bool = True) -> Optional[pd.DataFrame]:
+        """分群處理後的資料集；資料集內容與參數未變時直接讀取快取"""
+        cache_path = self.cache_dir / f"clusters.{self.cache_key(courses_file)[:16]}.pkl"
+        if use_cache and cache_path.exists():
+            try:
+                self.logger.info(f"資料集未變動，使用分群快取 {cache_path.name}")
+                return pd.read_pickle(cache_path)
+            except Exception as e:
+                self.logger.warning(f"讀取分群快取失敗 {cache_path.name}: {e}")
+
+        courses = self.load_courses(courses_file)
+        table = self.load_features(courses_file) if courses is not None else None
+        if table is None:
+            return None
+        result = self.cluster(self.compute_features(courses, table), workers)
+        if use_cache:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for stale in self.cache_dir.glob("clusters.*.pkl"):
+                stale.unlink()
+            result.to_pickle(cache_path)
+        return result
+
+
+def clusters_path_for(courses_file: Path) -> Path:
+    """資料集對應的分群結果路徑（all_courses_<時間戳>.csv -> clusters/clusters_<時間戳>.csv）"""
+    return CLUSTER_DIR / courses_file.name.replace("all_courses_", "clusters_", 1)
+
+
+def main(workers: int = 1, use_cache: bool = True, version: Optional[str] = None):
+    from utils.common import setup_logging
+    setup_logging()
+
+    courses_file = processed_courses_file(version)
+    if courses_file is None:
+        return
+    started = time.perf_counter()
+    try:
+        result = CourseClustering().run(courses_file, workers=workers, use_cache=use_cache)
+    except ImportError:
+        logging.error("分群需要 scikit-learn：pip install scikit-learn")
+        return
+    if result is None:
+        return
+
+    output_path = clusters_path_for(courses_file)
+    safe_write_csv(result, output_path)
+    summary = result.groupby(['分類', '分群描述']).size()
+    logging.info(f"各分類分群結果：\n{summary.to_string()}")
+    print(f"\n分群完成（{time.perf_counter() - started:.2f}s）：{output_path}")
+
+
+if __name__ == "__main__":
+    main()
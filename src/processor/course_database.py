@@ -0,0 +1,69 @@
+"""SQLite 課程資料庫階段 - 將最新的處理後資料集逐學期寫入嵌入式 SQLite（含 B-tree 與 FTS5 trigram 索引），
+每個資料集版本只建立一次；API_BACKEND 設為 sqlite 時 API 改由此資料庫查詢"""
+
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import PARTITIONED_DATA_DIR, SQLITE_DIR
+from utils.course_db import COURSE_DB_VERSION, CourseDatabaseWriter, database_version
+from utils.course_tables import split_flat
+from utils.common import safe_read_csv, processed_courses_file
+from utils.partitions import MANIFEST_NAME, PartitionedDataset, latest_dataset_dir
+
+
+def database_path_for(version: str) -> Path:
+    """資料集版本對應的資料庫路徑（sqlite/courses_<時間戳>.db）"""
+    return SQLITE_DIR / f"courses_{version}.db"
+
+
+def open_dataset(version: Optional[str] = None) -> Optional[PartitionedDataset]:
+    """資料集版本對應的學期分區資料集（未指定時為最新的一個）；沒有分區目錄時讀取對應的 all_courses_*.csv
+    並於記憶體中分區"""
+    dataset_dir = PARTITIONED_DATA_DIR / version if version is not None else latest_dataset_dir(PARTITIONED_DATA_DIR)
+    if dataset_dir is not None and (dataset_dir / MANIFEST_NAME).exists():
+        # 預算為 0：寫完一個學期即淘汰，記憶體只保留最新學期與正在寫入的學期
+        return PartitionedDataset.open(dataset_dir, memory_budget=0)
+    courses_file = processed_courses_file(version)
+    if courses_file is None:
+        return None
+    meetings_file = courses_file.with_name(courses_file.name.replace("all_courses_", "all_meetings_", 1))
+    courses = safe_read_csv(courses_file)
+    meetings = safe_read_csv(meetings_file) if meetings_file.exists() else None
+    if courses is None:
+        return None
+    tables = split_flat(courses.drop(columns=['section_id'], errors='ignore')) if meetings is None else (courses, meetings)
+    return PartitionedDataset.from_tables(tables, version=courses_file.stem.replace("all_courses_", "", 1))
+
+
+def main(use_cache: bool = True, version: Optional[str] = None):
+    from utils.common import setup_logging
+    setup_logging()
+
+    store = open_dataset(version)
+    if store is None or not store.keys:
+        logging.error("找不到處理後的資料集，請先執行 process")
+        return
+
+    output_path = database_path_for(store.version)
+    if use_cache and output_path.exists() and database_version(output_path) == COURSE_DB_VERSION:
+        print(f"\n資料集未變動，沿用課程資料庫：{output_path}")
+        return
+
+    started = time.perf_counter()
+    writer = CourseDatabaseWriter(output_path)
+    try:
+        for key in store.keys:
+            partition = store.partition(key)
+            writer.append(key, partition.courses, partition.index.meetings)
+    except Exception:
+        writer.abort()
+        raise
+    writer.commit()
+    size_mb = output_path.stat().st_size / 1e6
+    print(f"\n課程資料庫完成（{len(store.keys)} 個學期，{size_mb:.1f} MB，{time.perf_counter() - started:.2f}s）：{output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""相似課程索引階段 - 以課程名稱/英文課程名稱的字元 n-gram TF-IDF 計算最新學期開課班之間的相似度，
+分塊做稀疏矩陣乘積並只保留每個開課班的 top-k（不含同課程代碼的其他開課班），輸出緊湊陣列供 API 查詢"""
+
+import logging
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Optional
+
+from config import SIMILAR_DIR, SIMILAR_TOP_K, SIMILAR_NGRAM_RANGE, SIMILAR_BLOCK_CELLS
+from utils.common import processed_courses_file, params_key
+from utils.course_features import semester_order
+from utils.course_tables import read_courses
+from utils.similarity_index import SimilarityIndex
+
+TEXT_COLUMNS = ['課程名稱', '英文課程名稱']
+INPUT_COLUMNS = ['section_id', '學年度', '學期', '課程代碼'] + TEXT_COLUMNS
+
+
+def _tfidf(texts: pd.Series):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=SIMILAR_NGRAM_RANGE, sublinear_tf=True)
+    return vectorizer.fit_transform(texts.astype(object).fillna('').astype(str).str.strip())
+
+
+def vectorize(courses: pd.DataFrame):
+    """中文與英文課程名稱各自建立 TF-IDF 後並排、再逐列正規化，使兩者權重相同"""
+    # scikit-learn / scipy 只有建立索引時需要，延遲匯入
+    from scipy.sparse import hstack
+    from sklearn.preprocessing import normalize
+
+    blocks = [_tfidf(courses[col]) for col in TEXT_COLUMNS if col in courses.columns]
+    return normalize(hstack(blocks).tocsr())
+
+
+def top_k_neighbors(matrix, k: int, groups: Optional[np.ndarray] = None):
+    """分塊計算 matrix @ matrix.T，每列保留相似度最高的 k 個（排除自己與相似度為 0 者，以 -1 補齊）
+
+    指定 groups 時一併排除同組者（同一課程代碼的其他開課班名稱相同、相似度必為 1，會佔滿 k 個名額）。
+    """
+    n = matrix.shape[0]
+    k = max(0, min(k, n - 1))
+    neighbors = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if k == 0:
+        return neighbors, scores
+
+    block = max(1, SIMILAR_BLOCK_CELLS // n)
+    transposed = matrix.T.tocsc()
+    for start in range(0, n, block):
+        end = min(start + block, n)
+        sims = (matrix[start:end] @ transposed).toarray()
+        rows = np.arange(end - start)
+        sims[rows, rows + start] = -1.0
+        if groups is not None:
+            sims[groups[start:end, None] == groups[None, :]] = -1.0
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        keep = top_scores > 0
+        neighbors[start:end] = np.where(keep, top, -1)
+        scores[start:end] = np.where(keep, top_scores, 0.0)
+    return neighbors, scores
+
+
+def index_params(k: int = SIMILAR_TOP_K) -> str:
+    """影響索引內容的設定摘要；與索引一併儲存，不同即重新建立"""
+    return params_key(k, SIMILAR_NGRAM_RANGE, SIMILAR_BLOCK_CELLS)
+
+
+def build_index(courses: pd.DataFrame, k: int = SIMILAR_TOP_K) -> SimilarityIndex:
+    courses = courses.sort_values('section_id', kind='stable')
+    groups = pd.factorize(courses['課程代碼'])[0] if '課程代碼' in courses.columns else None
+    neighbors, scores = top_k_neighbors(vectorize(courses), k, groups)
+    return SimilarityIndex(courses['section_id'].to_numpy(dtype=np.int64), neighbors, scores, index_params(k))
+
+
+def load_latest_semester(courses_file: Path) -> Optional[pd.DataFrame]:
+    """只讀取需要的欄位並取最新學期"""
+    df = read_courses(courses_file, INPUT_COLUMNS)
+    if df is None:
+        return None
+    order = semester_order(df)
+    return df[order == order.max()]
+
+
+def similar_path_for(courses_file: Path) -> Path:
+    """資料集對應的相似課程索引路徑（all_courses_<時間戳>.csv -> similar/similar_<時間戳>.npz）"""
+    return SIMILAR_DIR / courses_file.name.replace("all_courses_", "similar_", 1).replace(".csv", ".npz")
+
+
+def main(use_cache: bool = True, version: Optional[str] = None):
+    from utils.common import setup_logging
+    setup_logging()
+
+    courses_file = processed_courses_file(version)
+    if courses_file is None:
+        return
+    output_path = similar_path_for(courses_file)
+    if use_cache and output_path.exists():
+        cached = SimilarityIndex.load(output_path)
+        if cached is not None and cached.params == index_params():
+            print(f"\n資料集與參數未變動，沿用相似課程索引：{output_path}")
+            return
+
+    started = time.perf_counter()
+    courses = load_latest_semester(courses_file)
+    if courses is None or courses.empty:
+        return
+    try:
+        index = build_index(courses)
+    except ImportError:
+        logging.error("相似課程索引需要 scikit-learn：pip install scikit-learn")
+        return
+    index.save(output_path)
+    logging.info(f"相似課程索引：{len(index)} 個開課班、每班保留 {index.top_k} 個相似開課班")
+    print(f"\n相似課程索引完成（{time.perf_counter() - started:.2f}s）：{output_path}")
+
+
+if __name__ == "__main__":
+    main()
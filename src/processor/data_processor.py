@@ -1,114 +1,148 @@
-"""資料處理工具 - 讀取爬蟲產生的原始 CSV，輸出已清理且扁平化的資料集"""
+"""資料處理工具 - 讀取爬蟲產生的原始 CSV，輸出已清理的課程表與上課時段表"""
 
+import numpy as np
 import pandas as pd
-import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple, Set
+from typing import Dict, Any, Iterator, Optional, Tuple, Set
 import logging
+import time
 
-from config import RAW_DATA_DIR, PROCESSED_DATA_DIR, TEACHER_DICT_PATH
+from config import (
+    RAW_DATA_DIR, PROCESSED_DATA_DIR, PARTITION_CACHE_DIR, PARTITIONED_DATA_DIR, TEACHER_DICT_PATH,
+    DEPARTMENT_MAPPING_PATH
+)
 from utils.common import (
-    extract_year_semester_from_filename, safe_read_csv, safe_write_csv,
-    get_timestamp
+    extract_year_semester_from_filename, safe_read_csv, safe_read_csv_chunks, safe_write_csv,
+    append_csv, get_timestamp, hash_files
 )
+from utils.dtypes import to_compact_dtypes
+from utils.course_tables import CourseTables, MEETING_COLUMNS, MEETING_FIELDS, concat_tables
+from utils.partitions import PartitionWriter, write_partitioned
 from .department_mapper import DepartmentMapper
+from .teacher_matcher import TeacherNameMatcher
+from .validator import DatasetValidator, summarize, write_report
+
+# 上課節次+地點：(星期) 節次 地點，可重複多段
+SCHEDULE_PATTERN = r'\(([一二三四五六日])\)\s*([\d,\-]+)\s*(.*?)(?=\s*\([一二三四五六日]\)|$)'
+SCHEDULE_COLUMNS = ['星期', '起始節次', '結束節次', '上課地點']
+
+# 清理邏輯或輸出欄位改變時遞增，使既有的學期快取失效
+PARTITION_CACHE_VERSION = "2"
+
+# 扁平輸出（一段上課時間一列）的欄位順序；課程表為去除上課時段欄位後的子集
+OUTPUT_COLUMNS = [
+    '學年度', '學期', '序號', '課程代碼', '開課班別(代表)',
+    '學院', '科系', '年級', '班級',
+    '學制', '部別',
+    '教學大綱Syllabus', '教學大綱連結', '教學大綱狀態',
+    '課程名稱', '英文課程名稱',
+    '課程性質', '課程性質2', '全英語授課', '學分',
+    '教師姓名', '教師列表',
+    '上課大樓', '上課節次+地點',
+    '星期', '起始節次', '結束節次', '上課地點',
+    '上限人數', '登記人數', '選上人數',
+    '可跨班', '備註'
+]
+COURSE_COLUMNS = ['section_id'] + [c for c in OUTPUT_COLUMNS if c not in MEETING_FIELDS]
 
 class DataProcessor:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.department_mapper = DepartmentMapper()
+        self._teacher_matcher: Optional[TeacherNameMatcher] = None
+        self._teacher_matcher_source: Optional[Set[str]] = None
+        self.cache_dir = PARTITION_CACHE_DIR
+
+    @staticmethod
+    def _parse_distinct_schedules(text: pd.Series) -> pd.DataFrame:
+        """以 extractall 解析不重複的節次字串，索引為字串在 text 中的位置"""
+        unknown = text == '未知'
+
+        parsed = text[~unknown].str.extractall(SCHEDULE_PATTERN)
+        parsed.columns = ['星期', '節次', '上課地點']
+        periods = parsed['節次']
+        meetings = pd.DataFrame({
+            '星期': parsed['星期'],
+            '起始節次': pd.to_numeric(periods.str.extract(r'(\d+)', expand=False)).astype('Int64'),
+            '結束節次': pd.to_numeric(periods.str.extract(r'(\d+)\D*$', expand=False)).astype('Int64'),
+            '上課地點': parsed['上課地點'].str.strip(),
+        })
+        meetings.index = meetings.index.get_level_values(0)
+
+        # 未知與無法解析的字串各補一列；無法解析者保留原始字串為地點
+        needs_fallback = unknown | ~text.index.isin(meetings.index)
+        fallback_index = text.index[needs_fallback]
+        fallback = pd.DataFrame({
+            '星期': pd.Series(pd.NA, index=fallback_index, dtype=object),
+            '起始節次': pd.Series(pd.NA, index=fallback_index, dtype='Int64'),
+            '結束節次': pd.Series(pd.NA, index=fallback_index, dtype='Int64'),
+            '上課地點': text[needs_fallback].astype(object).where(~unknown[needs_fallback], pd.NA),
+        })
+
+        if not len(meetings):
+            result = fallback
+        elif len(fallback):
+            result = pd.concat([meetings, fallback])
+        else:
+            result = meetings
+        # 穩定排序：同一字串的多段上課時間維持原本順序
+        return result.iloc[result.index.argsort(kind='stable')][SCHEDULE_COLUMNS]
 
     @staticmethod
-    def parse_schedule_location(schedule_str: str) -> List[Dict[str, Any]]:
-        """解析節次與地點"""
-        if pd.isna(schedule_str) or str(schedule_str).strip() == '未知':
-            return [{'星期': pd.NA, '起始節次': pd.NA, '結束節次': pd.NA, '上課地點': pd.NA}]
-
-        text = str(schedule_str).strip()
-        pattern = r'(\([一二三四五六日]\))\s*([\d,\-]+)\s*(.*?)(?=\s*\([一二三四五六日]\)|$)'
-        matches = re.findall(pattern, text)
-
-        if not matches:
-            return [{'星期': pd.NA, '起始節次': pd.NA, '結束節次': pd.NA, '上課地點': text}]
-
-        results = []
-        for w, t, l in matches:
-            start_node = pd.NA
-            end_node = pd.NA
-            try:
-                nums = re.findall(r'\d+', t)
-                if nums:
-                    start_node = int(nums[0])
-                    end_node = int(nums[-1])
-            except (ValueError, IndexError):
-                pass
-
-            results.append({
-                '星期': w,
-                '起始節次': start_node,
-                '結束節次': end_node,
-                '上課地點': l.strip()
-            })
-        return results
-
-    def load_teacher_set(self, dict_path: Path) -> Tuple[Set[str], int]:
+    def parse_schedule_series(schedules: pd.Series) -> pd.DataFrame:
+        """向量化解析節次與地點，每段上課時間一列，索引為原始列位置
+
+        缺值或「未知」回傳一列全 NA，無法解析的字串保留原文為上課地點。相同字串只解析一次再廣播回各列。
+        """
+        codes, uniques = pd.factorize(schedules.reset_index(drop=True))
+        text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+        # 缺值 (code -1) 視同「未知」，放在最後一個位置
+        codes = np.where(codes < 0, len(text), codes)
+        text = pd.concat([text, pd.Series(['未知'])], ignore_index=True)
+
+        distinct = DataProcessor._parse_distinct_schedules(text)
+        counts = np.bincount(distinct.index.to_numpy(), minlength=len(text))
+        starts = np.cumsum(counts) - counts
+
+        row_counts = counts[codes]
+        row_index = np.repeat(np.arange(len(codes)), row_counts)
+        within = np.arange(len(row_index)) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+        result = distinct.iloc[np.repeat(starts[codes], row_counts) + within]
+        result.index = row_index
+        return result
+
+    @staticmethod
+    def build_meetings(schedule_df: pd.DataFrame, section_offset: int = 0) -> pd.DataFrame:
+        """將 parse_schedule_series 的結果轉為上課時段表；無任何時間或地點的列不保留"""
+        meetings = schedule_df.copy()
+        meetings.insert(0, 'section_id', (schedule_df.index.to_numpy() + section_offset).astype('int32'))
+        has_info = meetings['星期'].notna() | meetings['上課地點'].notna()
+        meetings = meetings[has_info].reset_index(drop=True)
+        meetings['上課地點'] = meetings['上課地點'].fillna("")
+        return meetings[MEETING_COLUMNS]
+
+    def load_teacher_set(self, dict_path: Path) -> Set[str]:
         """載入教師字典"""
         if not dict_path.exists():
             self.logger.warning(f"找不到字典檔：{dict_path}，將無法正確拆分黏連姓名。")
-            return set(), 4
+            return set()
 
         df = safe_read_csv(dict_path)
         if df is None or 'teacher_name' not in df.columns:
-            return set(), 4
+            return set()
 
-        t_set = set(df['teacher_name'].dropna().astype(str))
-        max_name_len = max([len(n) for n in t_set]) if t_set else 4
-        return t_set, max_name_len
+        return set(df['teacher_name'].dropna().astype(str))
 
-    @staticmethod
-    def split_teachers_by_dict(text: str, teacher_set: Set[str], max_name_len: int) -> List[str]:
-        """教師姓名拆分（最大匹配）"""
-        result = []
-        n = len(text)
-        i = 0
-        loop_limit = n * 2
-        count = 0
-
-        while i < n:
-            matched = None
-            window = min(n - i, max_name_len)
-            for width in range(window, 1, -1):
-                candidate = text[i : i + width]
-                if candidate in teacher_set:
-                    matched = candidate
-                    break
-
-            if matched:
-                result.append(matched)
-                i += len(matched)
-            else:
-                i += 1 
-            
-            count += 1
-            if count > loop_limit:
-                break
-
-        return result if result else [text]
+    def get_teacher_matcher(self, teacher_set: Set[str]) -> TeacherNameMatcher:
+        """取得（必要時編譯）教師字典樹，同一個教師集合只編譯一次"""
+        if self._teacher_matcher is None or self._teacher_matcher_source is not teacher_set:
+            self._teacher_matcher = TeacherNameMatcher(teacher_set)
+            self._teacher_matcher_source = teacher_set
+        return self._teacher_matcher
 
-    @staticmethod
-    def split_teachers(row: pd.Series, teacher_set: Set[str], max_name_len: int) -> List[str]:
-        """教師姓名處理入口"""
-        teacher_str = row.get('教師姓名')
-        if pd.isna(teacher_str):
-            return []
-
-        text = str(teacher_str).strip()
-        if text in ['校際教師', '校外教師']:
-            return ['校際教']
-        return DataProcessor.split_teachers_by_dict(text, teacher_set, max_name_len)
-
-    def clean_single_file(self, csv_file: Path, teacher_set: Set[str], max_name_len: int) -> Optional[pd.DataFrame]:
-        """清理單一檔案"""
+    def clean_single_file(self, csv_file: Path, teacher_set: Set[str]) -> Optional[CourseTables]:
+        """清理單一檔案，回傳課程表（每個開課班一列）與上課時段表"""
         df = safe_read_csv(csv_file)
         if df is None:
             return None
@@ -117,18 +151,29 @@ class DataProcessor:
         if year is None:
             return None
 
+        return self.clean_frame(df, year, semester, teacher_set)
+
+    def iter_clean_chunks(self, csv_file: Path, teacher_set: Set[str], chunksize: int,
+                          section_offset: int = 0) -> Iterator[CourseTables]:
+        """分塊讀取並清理單一檔案；section_id 自 section_offset 起連續編號"""
+        year, semester = extract_year_semester_from_filename(csv_file)
+        if year is None:
+            return
+        for chunk in safe_read_csv_chunks(csv_file, chunksize):
+            yield self.clean_frame(chunk, year, semester, teacher_set, section_offset)
+            section_offset += len(chunk)
+
+    def clean_frame(self, df: pd.DataFrame, year: str, semester: str, teacher_set: Set[str],
+                    section_offset: int = 0) -> CourseTables:
+        """清理一個學期（或其中一塊）的原始資料"""
         df['學年度'] = year
         df['學期'] = semester
 
-        df['parsed_schedule'] = df['上課節次+地點'].apply(self.parse_schedule_location)
-        df = df.explode('parsed_schedule')
-        df.reset_index(drop=True, inplace=True)
+        df = df.reset_index(drop=True)
+        df['section_id'] = np.arange(section_offset, section_offset + len(df), dtype='int32')
+        meetings = self.build_meetings(self.parse_schedule_series(df['上課節次+地點']), section_offset)
 
-        schedule_df = pd.json_normalize(df['parsed_schedule'])
-        df = pd.concat([df.drop(columns=['parsed_schedule']), schedule_df], axis=1)
-
-        df['教師列表'] = df.apply(lambda row: self.split_teachers(row, teacher_set, max_name_len), axis=1)
-        df['教師列表'] = df['教師列表'].apply(lambda x: ", ".join(x) if isinstance(x, list) else str(x))
+        df['教師列表'] = self.get_teacher_matcher(teacher_set).split_series(df['教師姓名'])
 
         df = self.department_mapper.add_department_info_to_df(df)
         def determine_system(class_name):
@@ -153,62 +198,210 @@ class DataProcessor:
             df['學制'] = '日間部'
             df['部別'] = '大學部'
 
-        if '星期' in df.columns:
-            df['星期'] = df['星期'].astype(str).str.replace(r'[()]', '', regex=True).replace('nan', '', regex=False)
-
-        text_cols_to_fill = ['備註', '英文課程名稱', '教師姓名', '上課地點', '上課大樓', '上課節次+地點']
+        text_cols_to_fill = ['備註', '英文課程名稱', '教師姓名', '上課大樓', '上課節次+地點']
         for col in text_cols_to_fill:
             if col in df.columns:
                 df[col] = df[col].fillna("")
 
+        # 數值欄位已由原始檔 schema 固定型別（人數為可空整數、學分為浮點數）
         count_cols = ['上限人數', '登記人數', '選上人數']
         for col in count_cols:
             if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+                df[col] = df[col].fillna(0).astype(int)
 
         if '全英語授課' in df.columns:
             df['全英語授課'] = df['全英語授課'].map({'是': True, '否': False}).fillna(False)
 
-        cols_to_keep = [
-            '學年度', '學期', '序號', '課程代碼', '開課班別(代表)',
-            '學院', '科系', '年級', '班級',
-            '學制', '部別',
-            '教學大綱Syllabus', '教學大綱連結', '教學大綱狀態',
-            '課程名稱', '英文課程名稱',
-            '課程性質', '課程性質2', '全英語授課', '學分',
-            '教師姓名', '教師列表',
-            '上課大樓', '上課節次+地點',
-            '星期', '起始節次', '結束節次', '上課地點',
-            '上限人數', '登記人數', '選上人數',
-            '可跨班', '備註'
-        ]
-        final_cols = [c for c in cols_to_keep if c in df.columns]
-        return df[final_cols]
-
-    def build_all_courses_dataset(self, input_dir: Path, teacher_dict_path: Path) -> pd.DataFrame:
+        final_cols = [c for c in COURSE_COLUMNS if c in df.columns]
+        return CourseTables(df[final_cols], meetings)
+
+    def partition_cache_key(self, csv_file: Path, teacher_dict_path: Path) -> str:
+        """學期快取鍵：原始檔、教師字典、科系映射與清理版本的雜湊"""
+        return hash_files(
+            [csv_file, teacher_dict_path, DEPARTMENT_MAPPING_PATH],
+            extra=PARTITION_CACHE_VERSION,
+        )
+
+    def _partition_path(self, csv_file: Path, cache_key: str) -> Path:
+        return self.cache_dir / f"{csv_file.stem}.{cache_key[:16]}.pkl"
+
+    def load_cached_partition(self, csv_file: Path, cache_key: str) -> Optional[CourseTables]:
+        path = self._partition_path(csv_file, cache_key)
+        if not path.exists():
+            return None
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            self.logger.warning(f"讀取學期快取失敗 {path.name}: {e}")
+            return None
+
+    def save_partition(self, csv_file: Path, cache_key: str, tables: CourseTables) -> None:
+        """寫入學期快取並移除同學期的舊版本"""
+        path = self._partition_path(csv_file, cache_key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            pd.to_pickle(tables, tmp_path)
+            tmp_path.replace(path)
+            for stale in self.cache_dir.glob(f"{csv_file.stem}.*.pkl"):
+                if stale != path:
+                    stale.unlink()
+        except Exception as e:
+            self.logger.warning(f"寫入學期快取失敗 {path.name}: {e}")
+
+    def build_all_courses_dataset(self, input_dir: Path, teacher_dict_path: Path, workers: int = 1,
+                                  use_cache: bool = True) -> CourseTables:
+        """清理所有學期並合併為課程表與上課時段表
+
+        use_cache 時只重新處理原始檔、教師字典或科系映射有變動的學期，其餘讀取快取；
+        workers > 1 時以行程池平行處理需重算的學期。
+        """
         csv_files = sorted(input_dir.glob("courses_*.csv"))
 
         if not csv_files:
             raise RuntimeError(f"{input_dir} 內找不到 courses_*.csv")
 
-        self.logger.info(f"正在載入教師字典：{teacher_dict_path}")
-        teacher_set, max_name_len = self.load_teacher_set(teacher_dict_path)
-        
-        dfs = []
-        for csv_file in csv_files:
-            self.logger.info(f"處理中：{csv_file.name}")
-            df_clean = self.clean_single_file(csv_file, teacher_set, max_name_len)
-            if df_clean is not None:
-                dfs.append(df_clean)
-
-        if not dfs:
-            return pd.DataFrame()
-
-        all_df = pd.concat(dfs, ignore_index=True)
-        self.logger.info(f"合併完成，共 {len(all_df)} 筆資料")
-        return all_df
+        started = time.perf_counter()
+        partitions: Dict[Path, Optional[CourseTables]] = {}
+        cache_keys: Dict[Path, str] = {}
+        if use_cache:
+            for csv_file in csv_files:
+                cache_keys[csv_file] = self.partition_cache_key(csv_file, teacher_dict_path)
+                cached = self.load_cached_partition(csv_file, cache_keys[csv_file])
+                if cached is not None:
+                    partitions[csv_file] = cached
+
+        pending = [f for f in csv_files if f not in partitions]
+        if use_cache:
+            self.logger.info(f"學期快取命中 {len(partitions)} 個，需重新處理 {len(pending)} 個")
+
+        if pending:
+            self.logger.info(f"正在載入教師字典：{teacher_dict_path}")
+            teacher_set = self.load_teacher_set(teacher_dict_path)
+
+        workers = max(1, min(workers, len(pending)))
+        if workers > 1:
+            self.logger.info(f"以 {workers} 個行程平行處理 {len(pending)} 個學期")
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(teacher_set,),
+            ) as executor:
+                results = list(executor.map(_clean_file_in_worker, pending))
+        else:
+            results = []
+            for csv_file in pending:
+                results.append(_timed_clean(self, csv_file, teacher_set))
+
+        for csv_file, (tables, elapsed) in zip(pending, results):
+            self.logger.info(f"處理完成：{csv_file.name}（{elapsed:.2f}s）")
+            partitions[csv_file] = tables
+            if use_cache and tables is not None:
+                self.save_partition(csv_file, cache_keys[csv_file], tables)
+
+        parts = [partitions[f] for f in csv_files if partitions.get(f) is not None]
+        merged = concat_tables(parts)
+        if merged.empty:
+            return merged
+
+        merged = CourseTables(to_compact_dtypes(merged.courses), to_compact_dtypes(merged.meetings))
+        self.logger.info(
+            f"合併完成，共 {len(merged.courses)} 個開課班、{len(merged.meetings)} 段上課時間"
+            f"（{len(csv_files)} 個學期，重新處理 {len(pending)} 個，"
+            f"{workers} 個行程，耗時 {time.perf_counter() - started:.2f}s）"
+        )
+        return merged
+
+    def stream_all_courses_dataset(self, input_dir: Path, teacher_dict_path: Path, courses_path: Path,
+                                   meetings_path: Path, chunksize: int,
+                                   validator: Optional[DatasetValidator] = None,
+                                   partition_writer: Optional[PartitionWriter] = None) -> Tuple[int, int]:
+        """分塊處理所有學期並逐塊附加寫出，記憶體峰值只與 chunksize 有關
+
+        輸出內容與 build_all_courses_dataset 相同（section_id 跨學期連續），
+        但不使用學期快取與行程池。先寫入暫存檔，完成後才改名，避免 API 讀到寫一半的檔案。
+        指定 validator 時逐塊驗證，有錯誤則捨棄暫存檔；指定 partition_writer 時同時寫出學期分區。
+        回傳 (課程數, 上課時段數)。
+        """
+        csv_files = sorted(input_dir.glob("courses_*.csv"))
+        if not csv_files:
+            raise RuntimeError(f"{input_dir} 內找不到 courses_*.csv")
 
-def main():
+        started = time.perf_counter()
+        teacher_set = self.load_teacher_set(teacher_dict_path)
+        tmp_courses = courses_path.with_name(courses_path.name + ".tmp")
+        tmp_meetings = meetings_path.with_name(meetings_path.name + ".tmp")
+        def discard() -> None:
+            tmp_courses.unlink(missing_ok=True)
+            tmp_meetings.unlink(missing_ok=True)
+            if partition_writer is not None:
+                partition_writer.abort()
+
+        n_courses = n_meetings = 0
+        try:
+            for csv_file in csv_files:
+                for tables in self.iter_clean_chunks(csv_file, teacher_set, chunksize, n_courses):
+                    if validator is not None:
+                        validator.update(tables)
+                    append_csv(tables.courses, tmp_courses, header=n_courses == 0)
+                    append_csv(tables.meetings, tmp_meetings, header=n_courses == 0)
+                    if partition_writer is not None:
+                        partition_writer.append(tables)
+                    n_courses += len(tables.courses)
+                    n_meetings += len(tables.meetings)
+                self.logger.info(f"處理完成：{csv_file.name}（累計 {n_courses} 個開課班）")
+        except Exception:
+            # 讀取或清理中途失敗：捨棄已寫出的部分，不輸出不完整的學期
+            discard()
+            raise
+
+        if n_courses == 0:
+            discard()
+            return 0, 0
+        if validator is not None and not validator.report()['ok']:
+            discard()
+            return 0, 0
+        tmp_courses.replace(courses_path)
+        tmp_meetings.replace(meetings_path)
+        if partition_writer is not None:
+            partition_writer.commit()
+        self.logger.info(
+            f"分塊處理完成，共 {n_courses} 個開課班、{n_meetings} 段上課時間"
+            f"（每塊 {chunksize} 列，耗時 {time.perf_counter() - started:.2f}s）"
+        )
+        return n_courses, n_meetings
+
+# 行程池 worker 狀態：每個 worker 初始化一次 DataProcessor（含科系映射）與教師集合
+_worker_processor: Optional[DataProcessor] = None
+_worker_teacher_set: Set[str] = set()
+
+def _init_worker(teacher_set: Set[str]) -> None:
+    global _worker_processor, _worker_teacher_set
+    _worker_processor = DataProcessor()
+    _worker_teacher_set = teacher_set
+
+def _timed_clean(processor: DataProcessor, csv_file: Path,
+                 teacher_set: Set[str]) -> Tuple[Optional[CourseTables], float]:
+    started = time.perf_counter()
+    tables = processor.clean_single_file(csv_file, teacher_set)
+    return tables, time.perf_counter() - started
+
+def _clean_file_in_worker(csv_file: Path) -> Tuple[Optional[CourseTables], float]:
+    return _timed_clean(_worker_processor, csv_file, _worker_teacher_set)
+
+def _gate(report: Dict[str, Any], report_path: Path) -> bool:
+    """寫出驗證報告並記錄失敗項目；回傳資料集是否可輸出"""
+    write_report(report, report_path)
+    for line in summarize(report):
+        logging.warning(line)
+    if not report['ok']:
+        logging.error(f"資料驗證失敗（{report['errors']} 項錯誤），不輸出資料集；報告：{report_path}")
+        return False
+    logging.info(f"資料驗證通過（{report['warnings']} 項警告）：{report_path.name}")
+    return True
+
+def main(workers: int = 1, use_cache: bool = True, chunksize: Optional[int] = None, validate: bool = True) -> str:
+    """處理所有學期並輸出資料集，回傳資料集版本（時間戳）；驗證失敗、沒有資料或處理錯誤時拋出 RuntimeError"""
     from utils.common import setup_logging
     setup_logging()
 
@@ -216,16 +409,43 @@ def main():
     PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
     try:
-        final_df = processor.build_all_courses_dataset(RAW_DATA_DIR, TEACHER_DICT_PATH)
-        if not final_df.empty:
-            timestamp = get_timestamp()
-            output_path = PROCESSED_DATA_DIR / f"all_courses_{timestamp}.csv"
-            safe_write_csv(final_df, output_path)
-            print(f"\n成功！最終檔案已儲存：{output_path}")
+        timestamp = get_timestamp()
+        output_path = PROCESSED_DATA_DIR / f"all_courses_{timestamp}.csv"
+        meetings_path = PROCESSED_DATA_DIR / f"all_meetings_{timestamp}.csv"
+        report_path = PROCESSED_DATA_DIR / f"validation_{timestamp}.json"
+        # 同一份資料另依學期分區寫出，供 API 延遲載入
+        partitions_dir = PARTITIONED_DATA_DIR / timestamp
+
+        if chunksize:
+            validator = DatasetValidator() if validate else None
+            n_courses, _ = processor.stream_all_courses_dataset(
+                RAW_DATA_DIR, TEACHER_DICT_PATH, output_path, meetings_path, chunksize, validator,
+                PartitionWriter(partitions_dir)
+            )
+            if validator is not None and validator.n_courses and not _gate(validator.report(), report_path):
+                raise RuntimeError(f"資料驗證失敗，不輸出資料集；報告：{report_path}")
+            if not n_courses:
+                raise RuntimeError("沒有可輸出的課程資料")
+        else:
+            tables = processor.build_all_courses_dataset(
+                RAW_DATA_DIR, TEACHER_DICT_PATH, workers=workers, use_cache=use_cache
+            )
+            if tables.empty:
+                raise RuntimeError("沒有可輸出的課程資料")
+            if validate:
+                validator = DatasetValidator()
+                validator.update(tables)
+                if not _gate(validator.report(), report_path):
+                    raise RuntimeError(f"資料驗證失敗，不輸出資料集；報告：{report_path}")
+            safe_write_csv(tables.courses, output_path)
+            safe_write_csv(tables.meetings, meetings_path)
+            write_partitioned(tables, partitions_dir)
     except Exception as e:
         logging.error(f"處理失敗: {e}")
-        import traceback
-        traceback.print_exc()
+        raise
+
+    print(f"\n成功！最終檔案已儲存：{output_path}、{meetings_path.name}；學期分區：{partitions_dir}")
+    return timestamp
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""選課需求預測 - 以歷年登記/上限比預測最新學期每個開課班的登記人數與中籤機率
+
+模型為分層收縮的加權平均：課程（跨學期課程身分）的歷年登記/上限比依距今學期數指數衰減加權、
+同一學期別（上/下學期）加重，並以同名課程（不分教師）與全校平均作為先驗收縮；
+全部以分組加總計算，不逐課程迴圈。
+"""
+
+import logging
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import (
+    FORECAST_DIR,
+    FORECAST_DECAY, FORECAST_SAME_TERM_WEIGHT, FORECAST_PRIOR_WEIGHT
+)
+from utils.common import safe_write_csv, processed_courses_file, params_key, output_is_current, record_params
+from utils.course_features import ratio, semester_order
+from utils.course_identity import link_courses, normalize_names
+from utils.course_tables import read_courses
+
+FORECAST_COLUMNS = [
+    'section_id', '學年度', '學期', 'predicted_registered', 'predicted_acceptance',
+    'forecast_basis', 'history_sections',
+]
+INPUT_COLUMNS = ['section_id', '學年度', '學期', '課程代碼', '課程名稱', '教師姓名', '教師列表', '上限人數', '登記人數']
+
+# 預測依據：課程本身的歷史、同名課程（其他教師）的歷史、全校平均
+BASIS_COURSE, BASIS_NAME, BASIS_GLOBAL = 'course', 'name', 'global'
+
+
+def _shrunk_mean(codes: np.ndarray, weights: np.ndarray, values: np.ndarray, n_groups: int,
+                 prior: np.ndarray) -> np.ndarray:
+    """各組加權平均，以權重 FORECAST_PRIOR_WEIGHT 的先驗收縮（沒有資料的組即為先驗）"""
+    weight_sum = np.bincount(codes, weights=weights, minlength=n_groups)
+    value_sum = np.bincount(codes, weights=weights * values, minlength=n_groups)
+    return (value_sum + FORECAST_PRIOR_WEIGHT * prior) / (weight_sum + FORECAST_PRIOR_WEIGHT)
+
+
+class DemandForecaster:
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def load_courses(courses_file: Path) -> Optional[pd.DataFrame]:
+        return read_courses(courses_file, INPUT_COLUMNS)
+
+    def forecast(self, courses: pd.DataFrame, target_order: Optional[int] = None) -> pd.DataFrame:
+        """以 target_order（學期序，預設為最新學期）之前的學期擬合，預測該學期每個開課班"""
+        order = semester_order(courses)
+        if target_order is None:
+            target_order = int(order.max())
+        registered = courses['登記人數'].fillna(0).to_numpy(dtype='float64')
+        capacity = courses['上限人數'].fillna(0).to_numpy(dtype='float64')
+        demand = ratio(registered, capacity, (registered > 0) & (capacity > 0))
+
+        codes = link_courses(courses)
+        name_codes = pd.factorize(normalize_names(courses['課程名稱']))[0]
+        n_courses = int(codes.max()) + 1 if len(codes) else 0
+        n_names = int(name_codes.max()) + 1 if len(name_codes) else 0
+
+        history = (order < target_order) & ~np.isnan(demand)
+        age = target_order - order[history]
+        weights = FORECAST_DECAY ** (age - 1) * np.where(age % 2 == 0, FORECAST_SAME_TERM_WEIGHT, 1.0)
+        values = demand[history]
+
+        global_mean = float(np.average(values, weights=weights)) if len(values) else 1.0
+        name_estimate = _shrunk_mean(name_codes[history], weights, values, n_names,
+                                     np.full(n_names, global_mean))
+        course_name = np.zeros(n_courses, dtype=np.int64)
+        course_name[codes] = name_codes
+        course_estimate = _shrunk_mean(codes[history], weights, values, n_courses, name_estimate[course_name])
+
+        course_sections = np.bincount(codes[history], minlength=n_courses)
+        name_sections = np.bincount(name_codes[history], minlength=n_names)
+
+        target = np.flatnonzero(order == target_order)
+        target_codes = codes[target]
+        predicted_demand = course_estimate[target_codes]
+        target_capacity = capacity[target]
+        basis = np.select(
+            [course_sections[target_codes] > 0, name_sections[name_codes[target]] > 0],
+            [BASIS_COURSE, BASIS_NAME], BASIS_GLOBAL
+        )
+        years = pd.to_numeric(courses['學年度']).to_numpy()[target]
+        semesters = pd.to_numeric(courses['學期']).to_numpy()[target]
+        return pd.DataFrame({
+            'section_id': courses['section_id'].to_numpy()[target],
+            '學年度': years,
+            '學期': semesters,
+            'predicted_registered': np.where(target_capacity > 0, predicted_demand * target_capacity, np.nan),
+            'predicted_acceptance': np.minimum(ratio(np.ones(len(target)), predicted_demand, predicted_demand > 0), 1.0),
+            'forecast_basis': basis,
+            'history_sections': course_sections[target_codes].astype('int32'),
+        }, columns=FORECAST_COLUMNS)
+
+    @staticmethod
+    def evaluate(courses: pd.DataFrame, forecast: pd.DataFrame) -> Dict[str, float]:
+        """與目標學期實際登記人數比較（僅限已有登記資料的開課班）；回測或登記期間檢視用"""
+        actual = courses.set_index('section_id')['登記人數'].reindex(forecast['section_id']).to_numpy(dtype='float64')
+        predicted = forecast['predicted_registered'].to_numpy()
+        observed = (actual > 0) & ~np.isnan(predicted)
+        if not observed.any():
+            return {}
+        error = np.abs(predicted[observed] - actual[observed])
+        return {
+            'sections': int(observed.sum()),
+            'mae': float(error.mean()),
+            'mape': float((error / actual[observed]).mean()),
+        }
+
+
+def forecast_path_for(courses_file: Path) -> Path:
+    """資料集對應的預測結果路徑（all_courses_<時間戳>.csv -> forecasts/forecast_<時間戳>.csv）"""
+    return FORECAST_DIR / courses_file.name.replace("all_courses_", "forecast_", 1)
+
+
+def forecast_params() -> str:
+    """影響預測結果的設定摘要；與上次產生時不同即重新預測"""
+    return params_key(FORECAST_DECAY, FORECAST_SAME_TERM_WEIGHT, FORECAST_PRIOR_WEIGHT)
+
+
+def main(use_cache: bool = True, version: Optional[str] = None):
+    from utils.common import setup_logging
+    setup_logging()
+
+    courses_file = processed_courses_file(version)
+    if courses_file is None:
+        return
+    output_path = forecast_path_for(courses_file)
+    params = forecast_params()
+    if use_cache and output_is_current(output_path, params):
+        print(f"\n資料集與參數未變動，沿用預測結果：{output_path}")
+        return
+
+    started = time.perf_counter()
+    forecaster = DemandForecaster()
+    courses = forecaster.load_courses(courses_file)
+    if courses is None or courses.empty:
+        return
+    result = forecaster.forecast(courses)
+    safe_write_csv(result, output_path)
+    record_params(output_path, params)
+
+    logging.info(f"各預測依據的開課班數：\n{result['forecast_basis'].value_counts().to_string()}")
+    metrics = forecaster.evaluate(courses, result)
+    if metrics:
+        logging.info(f"與目前登記人數比較（{metrics['sections']} 個開課班）：MAE {metrics['mae']:.1f}、"
+                     f"MAPE {metrics['mape']:.1%}")
+    print(f"\n需求預測完成（{len(result)} 個開課班，{time.perf_counter() - started:.2f}s）：{output_path}")
+
+
+if __name__ == "__main__":
+    main()
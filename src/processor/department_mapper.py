@@ -6,9 +6,68 @@ from typing import Dict, List, Optional, Tuple, Any
 import re
 import logging
 
-from config import DICT_DIR
+from config import DEPARTMENT_MAPPING_PATH
 from utils.common import safe_read_csv
 
+DEPARTMENT_COLUMNS = ['學院', '科系', '年級', '班級']
+
+# 常見的年級表示（依序比對，先命中者優先）
+YEAR_MAPPING = {
+    '1': '1', '一': '1', '大一': '1', '一年級': '1',
+    '2': '2', '二': '2', '大二': '2', '二年級': '2',
+    '3': '3', '三': '3', '大三': '3', '三年級': '3',
+    '4': '4', '四': '4', '大四': '4', '四年級': '4',
+    '5': '5', '五': '5', '大五': '5', '五年級': '5',
+    '研': '研究所', '研究': '研究所', '碩': '碩士', '博士': '博士'
+}
+
+# 縮寫映射（依序比對，先命中者優先）
+ABBREV_MAPPING = {
+    '資管': {'學院': '管理學院', '科系': '資訊管理學系'},
+    '資工': {'學院': '工學院', '科系': '資訊工程學系'},
+    '數': {'學院': '理學院', '科系': '數學系'},
+    '物': {'學院': '理學院', '科系': '物理學系'},
+    '化': {'學院': '理學院', '科系': '化學系'},
+    '生': {'學院': '理學院', '科系': '生物學系'},
+    '國': {'學院': '文學院', '科系': '國文學系'},
+    '英': {'學院': '文學院', '科系': '英語學系'},
+    '美': {'學院': '文學院', '科系': '美術學系'},
+    '地': {'學院': '文學院', '科系': '地理學系'},
+    '機電': {'學院': '工學院', '科系': '機電工程學系'},
+    '電機': {'學院': '工學院', '科系': '電機工程學系'},
+    '電子': {'學院': '工學院', '科系': '電子工程學系'},
+    '會': {'學院': '管理學院', '科系': '會計學系'},
+    '企管': {'學院': '管理學院', '科系': '企業管理學系'},
+    '財金': {'學院': '管理學院', '科系': '財務金融技術學系'},
+    '輔': {'學院': '教育學院', '科系': '輔導與諮商學系'},
+    '特': {'學院': '教育學院', '科系': '特殊教育學系'},
+    '運': {'學院': '社會科學暨體育學院', '科系': '運動學系'},
+    '公育': {'學院': '社會科學暨體育學院', '科系': '公共事務與公民教育學系'},
+    '科技': {'學院': '科技學院', '科系': '電機與機械科技學系'},
+    '智車': {'學院': '科技學院', '科系': '智慧車輛工程學系'},
+    '人管': {'學院': '科技學院', '科系': '人力資源管理研究所'},
+    '兒英': {'學院': '文學院', '科系': '科技與兒少英語研究所'},
+    '台文': {'學院': '文學院', '科系': '台灣文學研究所'},
+    '統資': {'學院': '理學院', '科系': '統計資訊研究所'},
+    '光': {'學院': '理學院', '科系': '光電科技研究所'},
+    '科': {'學院': '理學院', '科系': '科學教育研究所'},
+    '工學位': {'學院': '工學院', '科系': '工學院國際工程碩士學位學程'},
+    '運健': {'學院': '社會科學暨體育學院', '科系': '運動健康研究所'},
+    '技職': {'學院': '科技學院', '科系': '技術及職業教育研究所'},
+    'AI': {'學院': '科技學院', '科系': '人工智慧科技應用碩士學位學程'},
+    '歷': {'學院': '文學院', '科系': '歷史學研究所'},
+    '復': {'學院': '教育學院', '科系': '復健諮商研究所'},
+    '教': {'學院': '教育學院', '科系': '教育研究所'},
+    '高齡': {'學院': '教育學院', '科系': '高齡健康促進與照護管理原住民專班'},
+    '材生': {'學院': '理學院', '科系': '材料與生物科技暨科教國際碩士學位學程'},
+}
+
+_CLASS_AFTER_DIGIT = re.compile(r'(?:[0-9])([A-B])')
+_CLASS_AT_END = re.compile(r'^.*[^a-zA-Z]([A-B])$')
+_CLASS_ONLY = re.compile(r'^([A-B])$')
+_DIGITS = re.compile(r'[0-9]+')
+_CLASS_SUFFIX = re.compile(r'[A-C]班?')
+
 class DepartmentMapper:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
@@ -19,10 +78,12 @@ class DepartmentMapper:
             '性別平權學分學程', '精進中文', '精進英外文'
         }
         self.department_mapping = self._load_department_mapping()
+        self._compile_department_matcher()
+        self._parse_cache: Dict[str, Dict[str, Any]] = {}
 
     def _load_department_mapping(self) -> Dict[str, Dict[str, Any]]:
         """載入科系映射數據"""
-        mapping_file = DICT_DIR / "department_mapping.csv"
+        mapping_file = DEPARTMENT_MAPPING_PATH
         default_mapping = self._create_default_mapping()
 
         if not mapping_file.exists():
@@ -175,8 +236,33 @@ class DepartmentMapper:
 
         return default_mapping
 
+    def _compile_department_matcher(self) -> None:
+        """將科系映射編譯為單一 regex，取代每列排序與逐鍵掃描
+
+        鍵依長度由長到短排序（同長度維持映射順序），以前瞻 (?=...) 在每個位置
+        取得該處最長的鍵；所有位置中排序最前者即為原本「長度優先逐一比對」的結果。
+        """
+        self._sorted_dept_names = sorted(self.department_mapping, key=len, reverse=True)
+        self._dept_rank = {name: rank for rank, name in enumerate(self._sorted_dept_names)}
+        if self._sorted_dept_names:
+            alternation = '|'.join(re.escape(name) for name in self._sorted_dept_names)
+            self._dept_pattern = re.compile(f'(?=({alternation}))')
+        else:
+            self._dept_pattern = None
+
+    def _match_department_name(self, text: str) -> Optional[str]:
+        """回傳 text 中出現的最長科系映射鍵（同長度取映射順序較前者）"""
+        if self._dept_pattern is None:
+            return None
+        best = None
+        for match in self._dept_pattern.finditer(text):
+            name = match.group(1)
+            if best is None or self._dept_rank[name] < self._dept_rank[best]:
+                best = name
+        return best
+
     def parse_department_info(self, dept_code: str) -> Dict[str, Any]:
-        """解析開課班別代碼，提取學院、科系、年級、班級資訊"""
+        """解析開課班別代碼，提取學院、科系、年級、班級資訊（依字串快取）"""
         if pd.isna(dept_code):
             return {
                 '學院': '',
@@ -186,28 +272,32 @@ class DepartmentMapper:
             }
 
         dept_str = str(dept_code).strip()
+        cached = self._parse_cache.get(dept_str)
+        if cached is None:
+            cached = self._parse_department_str(dept_str)
+            self._parse_cache[dept_str] = cached
+        return cached.copy()
+
+    def _parse_department_str(self, dept_str: str) -> Dict[str, Any]:
+        # 1. 直接匹配完整科系名稱 (長度優先，避免部分匹配錯誤)
+        dept_name = self._match_department_name(dept_str)
+        if dept_name is not None:
+            result = self.department_mapping[dept_name].copy()
+            year, class_info = self._extract_year_and_class(dept_str)
+            result['年級'] = year
+
+            # 班級預設邏輯：
+            # 1. 有識別到班級 -> 使用識別結果
+            # 2. 沒識別到班級 且 不是特殊課程 -> 預設甲班
+            # 3. 沒識別到班級 且 是特殊課程 -> 空白
+            if class_info:
+                result['班級'] = class_info
+            elif dept_name not in self.special_course_keys:
+                result['班級'] = '甲班'
+            else:
+                result['班級'] = ''
 
-        # 1. 直接匹配完整科系名稱 (排序關鍵：長度優先，避免部分匹配錯誤)
-        sorted_items = sorted(self.department_mapping.items(), key=lambda x: len(x[0]), reverse=True)
-        
-        for dept_name, info in sorted_items:
-            if dept_name in dept_str:
-                result = info.copy()
-                year, class_info = self._extract_year_and_class(dept_str)
-                result['年級'] = year
-                
-                # 班級預設邏輯：
-                # 1. 有識別到班級 -> 使用識別結果
-                # 2. 沒識別到班級 且 不是特殊課程 -> 預設甲班
-                # 3. 沒識別到班級 且 是特殊課程 -> 空白
-                if class_info:
-                    result['班級'] = class_info
-                elif dept_name not in self.special_course_keys:
-                    result['班級'] = '甲班'
-                else:
-                    result['班級'] = ''
-                    
-                return result
+            return result
 
         # 2. 嘗試模式匹配（處理縮寫）
         result = self._parse_dept_code_pattern(dept_str)
@@ -234,21 +324,11 @@ class DepartmentMapper:
 
     def _extract_year_and_class(self, dept_str: str) -> Tuple[str, str]:
         """從部門字符串中提取年級和班級信息"""
-        # 常見的年級表示
-        year_mapping = {
-            '1': '1', '一': '1', '大一': '1', '一年級': '1',
-            '2': '2', '二': '2', '大二': '2', '二年級': '2',
-            '3': '3', '三': '3', '大三': '3', '三年級': '3',
-            '4': '4', '四': '4', '大四': '4', '四年級': '4',
-            '5': '5', '五': '5', '大五': '5', '五年級': '5',
-            '研': '研究所', '研究': '研究所', '碩': '碩士', '博士': '博士'
-        }
-
         year = ''
         class_info = ''
 
         # 查找年級信息
-        for key, value in year_mapping.items():
+        for key, value in YEAR_MAPPING.items():
             if key in dept_str:
                 year = value
                 break
@@ -261,13 +341,12 @@ class DepartmentMapper:
             class_info = '乙班'
         else:
             # 2. 檢查英文標識 (防止誤判，例如 AI 的 A)
-            # 規則：數字後面接 A/B，或是 A/B 在字串結尾
-            match = re.search(r'(?:[0-9])([A-B])', dept_str)
-            if not match:
-                 # 檢查字串結尾是否單獨為 A 或 B
-                 match = re.search(r'^.*[^a-zA-Z]([A-B])$', dept_str)
-                 if not match and re.match(r'^([A-B])$', dept_str): # 字串僅為 "A" 或 "B"
-                     match = re.match(r'^([A-B])$', dept_str)
+            # 規則：數字後面接 A/B，或是 A/B 在字串結尾，或字串僅為 "A" 或 "B"
+            match = (
+                _CLASS_AFTER_DIGIT.search(dept_str)
+                or _CLASS_AT_END.search(dept_str)
+                or _CLASS_ONLY.match(dept_str)
+            )
 
             if match:
                 char = match.group(1)
@@ -281,51 +360,11 @@ class DepartmentMapper:
     def _infer_department_from_abbrev(self, dept_str: str) -> Dict[str, Any]:
         """從縮寫中推斷科系信息"""
         year, class_info = self._extract_year_and_class(dept_str)
-        clean_str = re.sub(r'[0-9]+', '', dept_str).strip()
+        clean_str = _DIGITS.sub('', dept_str).strip()
 
-        # 縮寫映射
-        abbrev_mapping = {
-            '資管': {'學院': '管理學院', '科系': '資訊管理學系'},
-            '資工': {'學院': '工學院', '科系': '資訊工程學系'},
-            '數': {'學院': '理學院', '科系': '數學系'},
-            '物': {'學院': '理學院', '科系': '物理學系'},
-            '化': {'學院': '理學院', '科系': '化學系'},
-            '生': {'學院': '理學院', '科系': '生物學系'},
-            '國': {'學院': '文學院', '科系': '國文學系'},
-            '英': {'學院': '文學院', '科系': '英語學系'},
-            '美': {'學院': '文學院', '科系': '美術學系'},
-            '地': {'學院': '文學院', '科系': '地理學系'},
-            '機電': {'學院': '工學院', '科系': '機電工程學系'},
-            '電機': {'學院': '工學院', '科系': '電機工程學系'},
-            '電子': {'學院': '工學院', '科系': '電子工程學系'},
-            '會': {'學院': '管理學院', '科系': '會計學系'},
-            '企管': {'學院': '管理學院', '科系': '企業管理學系'},
-            '財金': {'學院': '管理學院', '科系': '財務金融技術學系'},
-            '輔': {'學院': '教育學院', '科系': '輔導與諮商學系'},
-            '特': {'學院': '教育學院', '科系': '特殊教育學系'},
-            '運': {'學院': '社會科學暨體育學院', '科系': '運動學系'},
-            '公育': {'學院': '社會科學暨體育學院', '科系': '公共事務與公民教育學系'},
-            '科技': {'學院': '科技學院', '科系': '電機與機械科技學系'},
-            '智車': {'學院': '科技學院', '科系': '智慧車輛工程學系'},
-            '人管': {'學院': '科技學院', '科系': '人力資源管理研究所'},
-            '兒英': {'學院': '文學院', '科系': '科技與兒少英語研究所'},
-            '台文': {'學院': '文學院', '科系': '台灣文學研究所'},
-            '統資': {'學院': '理學院', '科系': '統計資訊研究所'},
-            '光': {'學院': '理學院', '科系': '光電科技研究所'},
-            '科': {'學院': '理學院', '科系': '科學教育研究所'},
-            '工學位': {'學院': '工學院', '科系': '工學院國際工程碩士學位學程'},
-            '運健': {'學院': '社會科學暨體育學院', '科系': '運動健康研究所'},
-            '技職': {'學院': '科技學院', '科系': '技術及職業教育研究所'},
-            'AI': {'學院': '科技學院', '科系': '人工智慧科技應用碩士學位學程'},
-            '歷': {'學院': '文學院', '科系': '歷史學研究所'},
-            '復': {'學院': '教育學院', '科系': '復健諮商研究所'},
-            '教': {'學院': '教育學院', '科系': '教育研究所'},
-            '高齡': {'學院': '教育學院', '科系': '高齡健康促進與照護管理原住民專班'},
-            '材生': {'學院': '理學院', '科系': '材料與生物科技暨科教國際碩士學位學程'},
-        }
 
         # 檢查縮寫
-        for abbrev, info in abbrev_mapping.items():
+        for abbrev, info in ABBREV_MAPPING.items():
             if abbrev in clean_str:
                 result = info.copy()
                 result['年級'] = year
@@ -351,25 +390,23 @@ class DepartmentMapper:
     def _parse_dept_code_pattern(self, dept_str: str) -> Dict[str, Any]:
         """解析部門代碼模式"""
         year, class_info = self._extract_year_and_class(dept_str)
-        clean_dept = re.sub(r'[0-9]+', '', dept_str).strip()
-        clean_dept = re.sub(r'[A-C]班?', '', clean_dept) # 移除已經識別的班級字元
-
-        sorted_items = sorted(self.department_mapping.items(), key=lambda x: len(x[0]), reverse=True)
+        clean_dept = _DIGITS.sub('', dept_str).strip()
+        clean_dept = _CLASS_SUFFIX.sub('', clean_dept) # 移除已經識別的班級字元
+
+        dept_name = self._match_department_name(clean_dept)
+        if dept_name is not None:
+            result = self.department_mapping[dept_name].copy()
+            result['年級'] = year
+
+            # 應用預設班級邏輯
+            if class_info:
+                result['班級'] = class_info
+            elif dept_name not in self.special_course_keys:
+                result['班級'] = '甲班'
+            else:
+                result['班級'] = ''
 
-        for dept_name, info in sorted_items:
-            if dept_name in clean_dept:
-                result = info.copy()
-                result['年級'] = year
-                
-                # 應用預設班級邏輯
-                if class_info:
-                    result['班級'] = class_info
-                elif dept_name not in self.special_course_keys:
-                    result['班級'] = '甲班'
-                else:
-                    result['班級'] = ''
-                
-                return result
+            return result
 
         # 無法匹配的情況
         final_class = class_info if class_info else '甲班'
@@ -386,12 +423,14 @@ class DepartmentMapper:
             self.logger.warning("DataFrame缺少'開課班別(代表)'列，無法添加部門信息")
             return df
 
-        dept_info = df['開課班別(代表)'].apply(self.parse_department_info)
-        dept_df = pd.DataFrame(list(dept_info))
+        # 只解析不重複的開課班別，再以 factorize 廣播回各列（缺值對應最後一列）
+        codes, uniques = pd.factorize(df['開課班別(代表)'])
+        infos = [self.parse_department_info(u) for u in uniques] + [self.parse_department_info(None)]
+        unique_df = pd.DataFrame(infos, columns=DEPARTMENT_COLUMNS)
+        dept_df = unique_df.take(codes).set_axis(df.index)
+
+        df = df.drop(columns=[col for col in DEPARTMENT_COLUMNS if col in df.columns], errors='ignore')
 
-        columns_to_add = ['學院', '科系', '年級', '班級']
-        df = df.drop(columns=[col for col in columns_to_add if col in df.columns], errors='ignore')
-        
         result_df = pd.concat([df, dept_df], axis=1)
         self.logger.info(f"成功添加部門信息，共處理 {len(result_df)} 筆記錄")
         return result_df
\ No newline at end of file
@@ -2,7 +2,7 @@
 
 import pandas as pd
 from pathlib import Path
-from typing import Set, List, Optional
+from typing import Set, List, Optional, Dict, Iterable, Tuple
 import logging
 
 from config import RAW_DATA_DIR, DICT_DIR, TEACHER_DICT_AUTO_PATH, TEACHER_HIGH_RISK_PATH
@@ -21,10 +21,10 @@ class TeacherDictBuilder:
         return [text]
 
     @staticmethod
-    def extract_single_teacher_set(df: pd.DataFrame) -> Set[str]:
+    def extract_single_teacher_set(names: Iterable[str]) -> Set[str]:
         """建立已確認的三字教師集合（來源：僅有一位老師的課程）"""
         single_set = set()
-        for t in df["教師姓名"].dropna():
+        for t in names:
             parts = TeacherDictBuilder.safe_split(t)
             if len(parts) == 1 and len(parts[0]) == 3:
                 single_set.add(parts[0])
@@ -65,98 +65,153 @@ class TeacherDictBuilder:
             take[i] = best_take
 
         resolved = []
-        buffer = ""
+        # buffer 以起始位置表示，結算時才切片，避免逐字串接
+        buffer_start = 0
         i = 0
 
         while i < n:
             if take[i]:
-                if buffer:
-                    buffer_result = TeacherDictBuilder._process_buffer(buffer)
+                if buffer_start < i:
+                    buffer_result = TeacherDictBuilder._process_buffer(s[buffer_start:i])
                     if buffer_result is None:
                         return None
                     resolved.extend(buffer_result)
-                    buffer = ""
                 resolved.append(s[i:i+3])
                 i += 3
+                buffer_start = i
             else:
-                buffer += s[i]
                 i += 1
 
-        if buffer:
-            buffer_result = TeacherDictBuilder._process_buffer(buffer)
+        if buffer_start < n:
+            buffer_result = TeacherDictBuilder._process_buffer(s[buffer_start:])
             if buffer_result is None:
                 return None
             resolved.extend(buffer_result)
 
         return resolved
 
-    def load_all_raw_data(self, input_dir: Path) -> pd.DataFrame:
-        """讀取指定目錄下所有 courses_*.csv 並合併"""
-        csv_files = sorted(input_dir.glob("courses_*.csv"))
-        if not csv_files:
-            self.logger.warning(f"在 {input_dir} 找不到任何 courses_*.csv 檔案")
-            return pd.DataFrame()
+    @staticmethod
+    def resolve_names(names: Iterable[str], single_set: Set[str],
+                      known: Optional[Set[str]] = None) -> Tuple[Set[str], Set[str]]:
+        """拆分不重複的教師姓名字串，回傳 (已確認姓名, 高風險字串)"""
+        resolved_set = set(single_set)
+        if known:
+            resolved_set.update(known)
+        high_risk = set()
+
+        for t in names:
+            for name in TeacherDictBuilder.safe_split(t):
+                if name in resolved_set:
+                    continue
+                split_result = TeacherDictBuilder.smart_split_preserve_order(name, single_set)
+                if split_result:
+                    resolved_set.update(split_result)
+                else:
+                    high_risk.add(name)
+        return resolved_set, high_risk
 
-        dfs = []
+    def load_teacher_names(self, csv_files: List[Path]) -> List[str]:
+        """只讀取各檔的教師姓名欄位，回傳不重複的姓名字串（依首次出現順序）"""
+        names: Dict[str, None] = {}
         for f in csv_files:
-            df = safe_read_csv(f)
+            df = safe_read_csv(f, usecols=lambda col: col == "教師姓名")
             if df is not None and "教師姓名" in df.columns:
-                dfs.append(df)
+                names.update(dict.fromkeys(df["教師姓名"].dropna().astype(str)))
             else:
                 self.logger.warning(f"跳過 {f.name}: 無 '教師姓名' 欄位")
+        return list(names)
+
+    def load_existing_dict(self) -> pd.DataFrame:
+        """讀取既有的自動教師辭典（不存在時回傳空表）"""
+        columns = ["teacher_id", "teacher_name", "alias"]
+        if TEACHER_DICT_AUTO_PATH.exists():
+            df = safe_read_csv(TEACHER_DICT_AUTO_PATH)
+            if df is not None and {"teacher_id", "teacher_name"} <= set(df.columns):
+                df = df.reindex(columns=columns)
+                df["alias"] = df["alias"].fillna("")
+                return df
+        return pd.DataFrame(columns=columns)
+
+    @staticmethod
+    def assign_teacher_ids(names: Set[str], existing: pd.DataFrame) -> pd.DataFrame:
+        """既有姓名沿用原 teacher_id 與 alias，新姓名依排序接續編號（不重用已刪除的編號）"""
+        kept = dict(zip(existing["teacher_name"], zip(existing["teacher_id"], existing["alias"])))
+        used = existing["teacher_id"].astype(str).str.extract(r"^T(\d+)$", expand=False).dropna()
+        next_id = int(used.astype(int).max()) + 1 if len(used) else 1
+
+        rows = []
+        for name in sorted(names):
+            if name in kept:
+                teacher_id, alias = kept[name]
+            else:
+                teacher_id, alias = f"T{next_id:03d}", ""
+                next_id += 1
+            rows.append((teacher_id, name, alias))
+        return pd.DataFrame(rows, columns=["teacher_id", "teacher_name", "alias"])
+
+    def _write_outputs(self, resolved_set: Set[str], high_risk: Set[str], existing: pd.DataFrame) -> None:
+        DICT_DIR.mkdir(parents=True, exist_ok=True)
+        teacher_df = self.assign_teacher_ids(resolved_set, existing)
+        safe_write_csv(teacher_df, TEACHER_DICT_AUTO_PATH)
+
+        risk_df = pd.DataFrame(sorted(high_risk), columns=["teacher_name"])
+        safe_write_csv(risk_df, TEACHER_HIGH_RISK_PATH)
 
-        if not dfs:
-            return pd.DataFrame()
-        return pd.concat(dfs, ignore_index=True)
+        self.logger.info("自動教師辭典輸出完成")
+        self.logger.info(f"自動確認教師數：{len(teacher_df)}")
+        self.logger.info(f"高風險教師數（需人工）：{len(risk_df)}")
 
     def build_teacher_dict(self) -> None:
-        """構建教師字典"""
+        """由所有學期重新構建教師字典（既有姓名的 teacher_id 保持不變）"""
         self.logger.info("正在讀取原始資料...")
-        df = self.load_all_raw_data(RAW_DATA_DIR)
+        names = self.load_teacher_names(sorted(RAW_DATA_DIR.glob("courses_*.csv")))
 
-        if df.empty:
+        if not names:
             self.logger.error("沒有資料，程式結束。")
             return
 
-        DICT_DIR.mkdir(parents=True, exist_ok=True)
-        single_set = self.extract_single_teacher_set(df)
-        self.logger.info(f"已知三字教師庫大小: {len(single_set)}")
+        single_set = self.extract_single_teacher_set(names)
+        self.logger.info(f"已知三字教師庫大小: {len(single_set)}（不重複姓名字串 {len(names)} 個）")
 
-        resolved_set = set()
-        resolved_set.update(single_set)
-        high_risk = set()
+        resolved_set, high_risk = self.resolve_names(names, single_set)
+        self._write_outputs(resolved_set, high_risk, self.load_existing_dict())
 
-        for t in df["教師姓名"].dropna():
-            raw_parts = self.safe_split(t)
-            for name in raw_parts:
-                if name in resolved_set:
-                    continue
-                split_result = self.smart_split_preserve_order(name, single_set)
-                if split_result:
-                    resolved_set.update(split_result)
-                else:
-                    high_risk.add(name)
+    def update_teacher_dict(self, csv_files: List[Path]) -> None:
+        """將新學期併入既有字典，不重新掃描歷史資料
 
-        teacher_df = pd.DataFrame(sorted(resolved_set), columns=["teacher_name"])
-        teacher_df.insert(0, "teacher_id", [f"T{idx:03d}" for idx in range(1, len(teacher_df) + 1)])
-        teacher_df["alias"] = ""
+        既有字典的三字姓名視為已知教師，與新學期的單一教師合併後，
+        拆分新學期的姓名並重試先前的高風險字串。
+        """
+        existing = self.load_existing_dict()
+        if existing.empty:
+            self.logger.info("尚無既有字典，改為完整構建")
+            self.build_teacher_dict()
+            return
 
-        safe_write_csv(teacher_df, TEACHER_DICT_AUTO_PATH)
+        names = self.load_teacher_names(csv_files)
+        if TEACHER_HIGH_RISK_PATH.exists():
+            risk_df = safe_read_csv(TEACHER_HIGH_RISK_PATH)
+            if risk_df is not None and "teacher_name" in risk_df.columns:
+                names = list(dict.fromkeys(names + risk_df["teacher_name"].dropna().astype(str).tolist()))
 
-        risk_df = pd.DataFrame(sorted(high_risk), columns=["teacher_name"])
-        safe_write_csv(risk_df, TEACHER_HIGH_RISK_PATH)
+        known = set(existing["teacher_name"].astype(str))
+        single_set = self.extract_single_teacher_set(names) | {n for n in known if len(n) == 3}
+        self.logger.info(f"增量更新：{len(csv_files)} 個檔案，待處理姓名字串 {len(names)} 個")
 
-        self.logger.info("自動教師辭典輸出完成")
-        self.logger.info(f"自動確認教師數：{len(teacher_df)}")
-        self.logger.info(f"高風險教師數（需人工）：{len(risk_df)}")
+        resolved_set, high_risk = self.resolve_names(names, single_set, known)
+        self._write_outputs(resolved_set, high_risk, existing)
 
-def main():
-    """主函數"""
+def main(incremental: bool = False):
+    """主函數；incremental 時只將最新一個學期併入既有字典"""
     from utils.common import setup_logging
     setup_logging()
 
     builder = TeacherDictBuilder()
-    builder.build_teacher_dict()
+    if incremental:
+        csv_files = sorted(RAW_DATA_DIR.glob("courses_*.csv"))[-1:]
+        builder.update_teacher_dict(csv_files)
+    else:
+        builder.build_teacher_dict()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
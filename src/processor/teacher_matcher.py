@@ -0,0 +1,69 @@
+"""教師姓名比對器 - 以字典樹進行最長匹配拆分黏連的教師姓名"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List
+
+# 字典樹節點中標記「此處為完整姓名」的鍵
+_END = ''
+
+# 校際/校外教師統一歸為同一名稱
+INTER_SCHOOL_NAMES = {'校際教師', '校外教師'}
+INTER_SCHOOL_TEACHER = '校際教'
+
+
+class TeacherNameMatcher:
+    """由教師字典編譯的字典樹：由左至右在每個位置取長度至少 2 的最長已知姓名，無匹配則前進一字。"""
+
+    def __init__(self, names: Iterable[str]):
+        self.root: Dict[str, dict] = {}
+        for name in names:
+            node = self.root
+            for ch in name:
+                node = node.setdefault(ch, {})
+            node[_END] = True
+        self._cache: Dict[str, str] = {}
+
+    def _longest_match(self, text: str, start: int) -> int:
+        """回傳自 start 起最長已知姓名的長度（不足 2 字回傳 0）"""
+        node = self.root
+        best = 0
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            if _END in node and i - start + 1 >= 2:
+                best = i - start + 1
+        return best
+
+    def split(self, text: str) -> List[str]:
+        result = []
+        i = 0
+        n = len(text)
+        while i < n:
+            width = self._longest_match(text, i)
+            if width:
+                result.append(text[i:i + width])
+                i += width
+            else:
+                i += 1
+        return result if result else [text]
+
+    def split_joined(self, raw: str) -> str:
+        """拆分單一教師姓名字串並以 ", " 串接（結果依原字串快取）"""
+        cached = self._cache.get(raw)
+        if cached is None:
+            text = raw.strip()
+            if text in INTER_SCHOOL_NAMES:
+                cached = INTER_SCHOOL_TEACHER
+            else:
+                cached = ", ".join(self.split(text))
+            self._cache[raw] = cached
+        return cached
+
+    def split_series(self, teacher_names: pd.Series) -> pd.Series:
+        """對每個不重複的教師姓名拆分一次，再以 factorize 廣播回各列；缺值為空字串"""
+        codes, uniques = pd.factorize(teacher_names)
+        joined = np.array([self.split_joined(str(u)) for u in uniques] + [''], dtype=object)
+        # 缺值的 code 為 -1，正好對應最後一個空字串
+        return pd.Series(joined[codes], index=teacher_names.index)
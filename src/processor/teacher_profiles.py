@@ -0,0 +1,161 @@
+"""教師檔案階段 - 由拆分後的教師列表彙整每位教師的跨學期授課紀錄，每個資料集版本只計算一次
+
+合授課程拆成每位教師各一筆（不以子字串比對姓名），彙整授課課程、學期、平均滿班率/中籤率、
+常見上課時段與合授教師，輸出以教師姓名為鍵的 JSON，API 以字典直接查詢。
+"""
+
+import json
+import logging
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import TEACHER_PROFILE_DIR, TEACHER_TOP_SLOTS, TEACHER_TOP_COTEACHERS
+from utils.common import safe_read_csv, processed_courses_file, params_key, output_is_current, record_params
+from utils.course_features import CourseFeatureTable
+from utils.course_tables import CourseTables, split_flat
+
+INPUT_COLUMNS = ['section_id', '學年度', '學期', '課程代碼', '課程名稱', '教師姓名', '教師列表',
+                 '上限人數', '登記人數', '選上人數']
+TEACHER_SEPARATOR = ', '
+
+
+def teacher_sections(courses: pd.DataFrame) -> pd.DataFrame:
+    """(section_id, 教師) 對照表：教師列表依分隔符拆開，沒有教師列表時沿用教師姓名"""
+    teachers = courses['教師列表'].astype(object) if '教師列表' in courses.columns else pd.Series(np.nan, index=courses.index)
+    teachers = teachers.fillna(courses['教師姓名'].astype(object)).fillna('').astype(str)
+    pairs = pd.DataFrame({'section_id': courses['section_id'].to_numpy(),
+                          '教師': teachers.str.split(TEACHER_SEPARATOR).to_numpy()}).explode('教師')
+    pairs['教師'] = pairs['教師'].str.strip()
+    return pairs[pairs['教師'] != ''].drop_duplicates(ignore_index=True)
+
+
+def _round(value: float) -> Optional[float]:
+    return None if pd.isna(value) else round(float(value), 4)
+
+
+def build_profiles(tables: CourseTables) -> Dict[str, Dict[str, Any]]:
+    courses, meetings = tables
+    features = CourseFeatureTable.build(courses)
+    sections = courses[['section_id', '學年度', '學期', '課程代碼', '課程名稱']].astype(
+        {'課程代碼': object, '課程名稱': object}
+    ).assign(
+        semester=lambda d: d['學年度'].astype(int).astype(str) + '-' + d['學期'].astype(int).astype(str),
+        acceptance_rate=pd.Series(features.sections['acceptance_rate'], index=features.section_ids)
+        .reindex(courses['section_id']).to_numpy(),
+        fill_rate=pd.Series(features.sections['fill_rate'], index=features.section_ids)
+        .reindex(courses['section_id']).to_numpy(),
+    )
+    pairs = teacher_sections(courses).merge(sections, on='section_id', how='inner')
+
+    # 授課總覽
+    summary = pairs.groupby('教師').agg(
+        sections=('section_id', 'size'),
+        avg_acceptance_rate=('acceptance_rate', 'mean'),
+        avg_fill_rate=('fill_rate', 'mean'),
+    )
+    semesters = pairs.drop_duplicates(['教師', '學年度', '學期']).sort_values(['學年度', '學期']) \
+        .groupby('教師')['semester'].agg(list)
+
+    # 授課課程：同教師同課程名稱合併，列出開課學期，最近開課者在前
+    course_groups = pairs.sort_values(['學年度', '學期']).groupby(['教師', '課程名稱'], sort=False).agg(
+        課程代碼=('課程代碼', 'last'), sections=('section_id', 'size'),
+        semesters=('semester', lambda s: list(dict.fromkeys(s))),
+        latest=('section_id', 'max'),
+    ).reset_index().sort_values(['教師', 'latest'], ascending=[True, False])
+    courses_by_teacher = {
+        teacher: group[['課程名稱', '課程代碼', 'sections', 'semesters']].to_dict('records')
+        for teacher, group in course_groups.groupby('教師', sort=False)
+    }
+
+    # 常見上課時段（星期、起訖節次），依出現次數
+    slots = pairs[['教師', 'section_id']].merge(meetings[['section_id', '星期', '起始節次', '結束節次']],
+                                               on='section_id', how='inner').dropna()
+    slots = slots.astype({'星期': str, '起始節次': int, '結束節次': int})
+    slot_counts = slots.groupby(['教師', '星期', '起始節次', '結束節次']).size().reset_index(name='count') \
+        .sort_values(['教師', 'count'], ascending=[True, False])
+    slots_by_teacher = {
+        teacher: group.head(TEACHER_TOP_SLOTS)[['星期', '起始節次', '結束節次', 'count']].to_dict('records')
+        for teacher, group in slot_counts.groupby('教師', sort=False)
+    }
+
+    # 合授教師：同一開課班的其他教師
+    co = pairs[['section_id', '教師']].merge(pairs[['section_id', '教師']], on='section_id', suffixes=('', '_co'))
+    co = co[co['教師'] != co['教師_co']]
+    co_counts = co.groupby(['教師', '教師_co']).size().reset_index(name='sections') \
+        .sort_values(['教師', 'sections'], ascending=[True, False])
+    co_by_teacher = {
+        teacher: [{'教師': r['教師_co'], 'sections': int(r['sections'])}
+                  for r in group.head(TEACHER_TOP_COTEACHERS).to_dict('records')]
+        for teacher, group in co_counts.groupby('教師', sort=False)
+    }
+
+    profiles = {}
+    for teacher, row in summary.iterrows():
+        profiles[teacher] = {
+            'name': teacher,
+            'sections': int(row['sections']),
+            'semesters': semesters.get(teacher, []),
+            'avg_acceptance_rate': _round(row['avg_acceptance_rate']),
+            'avg_fill_rate': _round(row['avg_fill_rate']),
+            'courses': courses_by_teacher.get(teacher, []),
+            'typical_slots': slots_by_teacher.get(teacher, []),
+            'co_teachers': co_by_teacher.get(teacher, []),
+        }
+    return profiles
+
+
+def load_tables(courses_file: Path) -> Optional[CourseTables]:
+    """讀取課程表需要的欄位與同時間戳的上課時段表；舊版扁平檔則就地拆分"""
+    meetings_file = courses_file.with_name(courses_file.name.replace("all_courses_", "all_meetings_", 1))
+    if not meetings_file.exists():
+        df = safe_read_csv(courses_file)
+        return None if df is None else split_flat(df)
+    wanted = set(INPUT_COLUMNS)
+    courses = safe_read_csv(courses_file, usecols=lambda col: col in wanted)
+    meetings = safe_read_csv(meetings_file)
+    if courses is None or meetings is None:
+        return None
+    return CourseTables(courses, meetings)
+
+
+def profiles_path_for(courses_file: Path) -> Path:
+    """資料集對應的教師檔案路徑（all_courses_<時間戳>.csv -> teachers/teachers_<時間戳>.json）"""
+    return TEACHER_PROFILE_DIR / courses_file.name.replace("all_courses_", "teachers_", 1).replace(".csv", ".json")
+
+
+def profiles_params() -> str:
+    """影響教師檔案內容的設定摘要；與上次產生時不同即重新計算"""
+    return params_key(TEACHER_TOP_SLOTS, TEACHER_TOP_COTEACHERS)
+
+
+def main(use_cache: bool = True, version: Optional[str] = None):
+    from utils.common import setup_logging
+    setup_logging()
+
+    courses_file = processed_courses_file(version)
+    if courses_file is None:
+        return
+    output_path = profiles_path_for(courses_file)
+    params = profiles_params()
+    if use_cache and output_is_current(output_path, params):
+        print(f"\n資料集與參數未變動，沿用教師檔案：{output_path}")
+        return
+
+    started = time.perf_counter()
+    tables = load_tables(courses_file)
+    if tables is None:
+        return
+    profiles = build_profiles(tables)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    tmp_path.write_text(json.dumps(profiles, ensure_ascii=False), encoding='utf-8')
+    tmp_path.replace(output_path)
+    record_params(output_path, params)
+    print(f"\n教師檔案完成（{len(profiles)} 位教師，{time.perf_counter() - started:.2f}s）：{output_path}")
+
+
+if __name__ == "__main__":
+    main()
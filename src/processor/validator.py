@@ -0,0 +1,182 @@
+"""資料集驗證 - 以向量化運算檢查處理後的課程表與上課時段表，輸出機器可讀的報告"""
+
+import json
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from utils.course_tables import CourseTables, MEETING_COLUMNS, SECTION_KEY
+
+REQUIRED_COURSE_COLUMNS = ['section_id'] + SECTION_KEY + ['課程名稱', '學分', '上限人數', '登記人數', '選上人數']
+REQUIRED_MEETING_COLUMNS = MEETING_COLUMNS
+COUNT_COLUMNS = ['上限人數', '登記人數', '選上人數']
+VALID_DAYS = ['一', '二', '三', '四', '五', '六', '日']
+PERIOD_RANGE = (1, 14)
+CREDIT_RANGE = (0, 30)
+# 每項檢查保留的失敗樣本數（section_id 或欄位名稱）
+SAMPLE_SIZE = 5
+
+# 檢查名稱 -> (嚴重度, 說明)；error 會使驗證失敗，warning 只記錄
+CHECKS: Dict[str, tuple] = {
+    'required_columns': ('error', '缺少必要欄位'),
+    'null_keys': ('error', '學年度/學期/課程代碼/序號 有缺值'),
+    'duplicate_keys': ('error', '同學期的課程代碼+序號重複'),
+    'section_id_sequence': ('error', 'section_id 不等於課程表的列位置'),
+    'orphan_meetings': ('error', '上課時段的 section_id 不在課程表中'),
+    'credit_range': ('error', f'學分不在 {CREDIT_RANGE[0]}~{CREDIT_RANGE[1]} 之間'),
+    'negative_enrollment': ('error', '上限/登記/選上人數為負值'),
+    'invalid_day': ('error', '星期不是 一~日'),
+    'period_range': ('error', f'節次不在 {PERIOD_RANGE[0]}~{PERIOD_RANGE[1]} 之間'),
+    'period_order': ('error', '起始節次大於結束節次'),
+    'missing_credit': ('warning', '學分缺值'),
+    'enrolled_over_capacity': ('warning', '選上人數超過上限人數'),
+    'meeting_without_time': ('warning', '上課時段只有地點，沒有星期與節次'),
+}
+
+
+def _as_float(series: pd.Series) -> np.ndarray:
+    return pd.to_numeric(series.astype(object) if isinstance(series.dtype, pd.CategoricalDtype) else series,
+                         errors='coerce').astype('float64').to_numpy()
+
+
+class DatasetValidator:
+    """可逐塊累積的驗證器：update() 每次接收一批雙表（整個資料集或串流的一塊），report() 產生報告
+
+    跨塊的檢查（section_id 連續、鍵值唯一）只保留 section_id 與鍵值雜湊，記憶體與塊大小無關。
+    """
+
+    def __init__(self):
+        self.n_courses = 0
+        self.n_meetings = 0
+        self.failed: Dict[str, int] = dict.fromkeys(CHECKS, 0)
+        self.samples: Dict[str, List[Any]] = {name: [] for name in CHECKS}
+        self._key_hashes: List[np.ndarray] = []
+        self._key_sections: List[np.ndarray] = []
+
+    def _record(self, name: str, mask: np.ndarray, ids: np.ndarray) -> None:
+        count = int(np.count_nonzero(mask))
+        if not count:
+            return
+        self.failed[name] += count
+        room = SAMPLE_SIZE - len(self.samples[name])
+        if room > 0:
+            self.samples[name].extend(ids[mask][:room].tolist())
+
+    def _record_columns(self, missing: Sequence[str]) -> None:
+        self.failed['required_columns'] += len(missing)
+        self.samples['required_columns'].extend(c for c in missing if c not in self.samples['required_columns'])
+
+    def update(self, tables: CourseTables) -> None:
+        courses, meetings = tables
+        offset = self.n_courses
+        self.n_courses += len(courses)
+        self.n_meetings += len(meetings)
+
+        missing = [c for c in REQUIRED_COURSE_COLUMNS if c not in courses.columns]
+        missing += [f'meetings.{c}' for c in REQUIRED_MEETING_COLUMNS if c not in meetings.columns]
+        if missing:
+            self._record_columns(missing)
+        if 'section_id' not in courses.columns:
+            return
+
+        section_ids = courses['section_id'].to_numpy()
+        self._record('section_id_sequence', section_ids != np.arange(offset, offset + len(courses)), section_ids)
+
+        key = [c for c in SECTION_KEY if c in courses.columns]
+        if key:
+            self._record('null_keys', courses[key].isna().any(axis=1).to_numpy(), section_ids)
+            self._key_hashes.append(pd.util.hash_pandas_object(courses[key].astype(object), index=False).to_numpy())
+            self._key_sections.append(section_ids)
+
+        if '學分' in courses.columns:
+            credits = _as_float(courses['學分'])
+            self._record('missing_credit', np.isnan(credits), section_ids)
+            self._record('credit_range', (credits < CREDIT_RANGE[0]) | (credits > CREDIT_RANGE[1]), section_ids)
+
+        counts = {c: _as_float(courses[c]) for c in COUNT_COLUMNS if c in courses.columns}
+        if counts:
+            self._record('negative_enrollment', np.logical_or.reduce([v < 0 for v in counts.values()]), section_ids)
+        if '選上人數' in counts and '上限人數' in counts:
+            self._record('enrolled_over_capacity', counts['選上人數'] > counts['上限人數'], section_ids)
+
+        if 'section_id' in meetings.columns:
+            self._update_meetings(meetings, section_ids)
+
+    def _update_meetings(self, meetings: pd.DataFrame, section_ids: np.ndarray) -> None:
+        meeting_sections = meetings['section_id'].to_numpy()
+        # 上課時段與其課程必在同一塊內
+        self._record('orphan_meetings', ~np.isin(meeting_sections, section_ids), meeting_sections)
+        if not {'星期', '起始節次', '結束節次'} <= set(meetings.columns):
+            return
+
+        days = meetings['星期']
+        no_day = days.isna().to_numpy()
+        self._record('invalid_day', ~no_day & ~days.isin(VALID_DAYS).to_numpy(), meeting_sections)
+        start, end = _as_float(meetings['起始節次']), _as_float(meetings['結束節次'])
+        no_period = np.isnan(start) & np.isnan(end)
+        self._record('meeting_without_time', no_day & no_period, meeting_sections)
+        out_of_range = ((start < PERIOD_RANGE[0]) | (start > PERIOD_RANGE[1])
+                        | (end < PERIOD_RANGE[0]) | (end > PERIOD_RANGE[1]))
+        self._record('period_range', out_of_range, meeting_sections)
+        self._record('period_order', start > end, meeting_sections)
+
+    def _check_duplicate_keys(self) -> None:
+        if not self._key_hashes:
+            return
+        hashes = np.concatenate(self._key_hashes)
+        sections = np.concatenate(self._key_sections)
+        order = np.argsort(hashes, kind='stable')
+        sorted_hashes = hashes[order]
+        duplicated = np.zeros(len(hashes), dtype=bool)
+        duplicated[1:] = sorted_hashes[1:] == sorted_hashes[:-1]
+        self._record('duplicate_keys', duplicated, sections[order])
+
+    def report(self) -> Dict[str, Any]:
+        """產生驗證報告（可直接序列化為 JSON）"""
+        self.failed['duplicate_keys'] = 0
+        self.samples['duplicate_keys'] = []
+        self._check_duplicate_keys()
+
+        checks = [
+            {
+                'name': name,
+                'severity': severity,
+                'description': description,
+                'failed': self.failed[name],
+                'samples': self.samples[name],
+            }
+            for name, (severity, description) in CHECKS.items()
+        ]
+        errors = sum(c['failed'] > 0 for c in checks if c['severity'] == 'error')
+        warnings = sum(c['failed'] > 0 for c in checks if c['severity'] == 'warning')
+        return {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'courses': self.n_courses,
+            'meetings': self.n_meetings,
+            'ok': errors == 0,
+            'errors': errors,
+            'warnings': warnings,
+            'checks': checks,
+        }
+
+
+def validate_tables(tables: CourseTables) -> Dict[str, Any]:
+    """驗證整個資料集"""
+    validator = DatasetValidator()
+    validator.update(tables)
+    return validator.report()
+
+
+def write_report(report: Dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+
+
+def summarize(report: Dict[str, Any]) -> List[str]:
+    """有失敗的檢查項目，每項一行"""
+    return [
+        f"[{c['severity']}] {c['name']}：{c['failed']} 筆（{c['description']}），例：{c['samples']}"
+        for c in report['checks'] if c['failed']
+    ]
@@ -3,9 +3,10 @@ import pandas as pd
 from pathlib import Path
 from typing import Optional, Tuple, List, Dict, Any
 import re
+import hashlib
 from datetime import datetime
 
-from config import LOG_LEVEL, LOG_FORMAT, LOG_FILE, LOG_DIR
+from config import LOG_LEVEL, LOG_FORMAT, LOG_FILE, LOG_DIR, PROCESSED_DATA_DIR
 
 def setup_logging():
     """初始化日誌"""
@@ -28,12 +29,57 @@ def extract_year_semester_from_filename(filepath: Path) -> Tuple[Optional[str],
         return None, None
     return match.group(1), match.group(2)
 
-from .io import safe_read_csv, safe_write_csv
+from .io import safe_read_csv, safe_read_csv_chunks, safe_write_csv, append_csv
 
 def get_timestamp() -> str:
     """獲取當前時間戳"""
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
+def processed_courses_file(version: Optional[str] = None) -> Optional[Path]:
+    """資料集版本對應的課程表 all_courses_<版本>.csv；未指定版本（由命令列單獨執行階段）時為最新的一個，
+    找不到時記錄錯誤並回傳 None"""
+    if version is not None:
+        path = PROCESSED_DATA_DIR / f"all_courses_{version}.csv"
+        if not path.exists():
+            logging.error(f"找不到資料集 {path.name}，請先執行 process")
+            return None
+        return path
+    processed_files = sorted(PROCESSED_DATA_DIR.glob("all_courses_*.csv"))
+    if not processed_files:
+        logging.error(f"{PROCESSED_DATA_DIR} 內找不到 all_courses_*.csv，請先執行 process")
+        return None
+    return processed_files[-1]
+
+def hash_files(paths: List[Path], extra: str = "") -> str:
+    """計算多個檔案內容（不存在者以路徑標記）與額外字串的 SHA-256"""
+    digest = hashlib.sha256(extra.encode('utf-8'))
+    for path in paths:
+        digest.update(str(Path(path).name).encode('utf-8'))
+        if Path(path).exists():
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        else:
+            digest.update(b'<missing>')
+    return digest.hexdigest()
+
+def params_key(*params: Any) -> str:
+    """設定參數的摘要，作為衍生結果快取身分的一部分"""
+    return hashlib.sha256(repr(params).encode('utf-8')).hexdigest()[:16]
+
+def _params_path(path: Path) -> Path:
+    """衍生結果旁記錄參數摘要的檔案（forecast_<時間戳>.csv -> forecast_<時間戳>.csv.params）"""
+    return path.with_name(path.name + '.params')
+
+def output_is_current(path: Path, key: str) -> bool:
+    """衍生結果存在，且由參數摘要為 key 的設定產生"""
+    params_file = _params_path(path)
+    return path.exists() and params_file.exists() and params_file.read_text(encoding='utf-8').strip() == key
+
+def record_params(path: Path, key: str) -> None:
+    """衍生結果寫出後記錄其參數摘要；須在結果之後寫入，中途失敗時下次視為快取失效"""
+    _params_path(path).write_text(key, encoding='utf-8')
+
 def validate_dataframe_columns(df: pd.DataFrame, required_columns: List[str]) -> bool:
     """驗證 DataFrame 是否包含所需列"""
     missing_columns = [col for col in required_columns if col not in df.columns]
@@ -0,0 +1,292 @@
+"""嵌入式 SQLite 課程資料庫 - 可選的 API 資料來源
+
+課程表以 section_id 為主鍵（學期即為主鍵區間），並對 (學年度, 學期)、開課班別(代表)、課程代碼 建立 B-tree 索引；
+課程名稱/教師/英文課程名稱另建 FTS5 trigram 全文索引供子字串搜尋。API 經由唯讀連線池查詢，
+只有查詢結果進入記憶體，歷年資料增加時常駐記憶體不隨之成長。
+"""
+
+import queue
+import sqlite3
+import threading
+import pandas as pd
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.course_tables import MEETING_FIELDS, MEETING_COLUMNS, concat_courses
+from utils.io import MEETINGS_SCHEMA, PROCESSED_COURSES_SCHEMA, coerce_to_schema
+
+# 資料表結構改變時遞增（寫入 PRAGMA user_version），舊版資料庫視為不存在
+COURSE_DB_VERSION = 1
+
+# FTS5 trigram 只能加速 3 個字元以上的查詢，較短的查詢改為在學期主鍵區間內逐列比對
+TRIGRAM_MIN_LENGTH = 3
+# 全文索引欄位 -> 課程表欄位
+SEARCH_COLUMNS = {'name': '課程名稱', 'teacher': '教師姓名', 'english': '英文課程名稱'}
+INSERT_BATCH = 5000
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_type(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _rows(df: pd.DataFrame) -> Iterator[Tuple]:
+    """逐批轉為 Python 值（缺值為 None、bool 為 0/1）"""
+    for start in range(0, len(df), INSERT_BATCH):
+        chunk = df.iloc[start:start + INSERT_BATCH].astype(object)
+        yield from chunk.where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+class CourseDatabaseWriter:
+    """逐學期寫入課程/上課時段，commit 時建立索引與全文索引並以原子方式取代目標檔"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.tmp_path = path.with_name(path.name + '.tmp')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path.unlink(missing_ok=True)
+        self.conn = sqlite3.connect(self.tmp_path)
+        self.conn.execute('PRAGMA journal_mode = OFF')
+        self.conn.execute('PRAGMA synchronous = OFF')
+        self.columns: Optional[List[str]] = None
+
+    def _create(self, courses: pd.DataFrame) -> None:
+        self.columns = list(courses.columns)
+        columns = ', '.join(
+            f"{_quote(col)} {'INTEGER PRIMARY KEY' if col == 'section_id' else _sql_type(courses[col].dtype)}"
+            for col in self.columns
+        )
+        self.conn.execute(f"CREATE TABLE courses ({columns})")
+        self.conn.execute(
+            "CREATE TABLE meetings (section_id INTEGER NOT NULL, 星期 TEXT, 起始節次 INTEGER, 結束節次 INTEGER, 上課地點 TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE semesters (學年度 INTEGER, 學期 INTEGER, section_start INTEGER, section_end INTEGER, "
+            "PRIMARY KEY (學年度, 學期))"
+        )
+        self.conn.execute(f"CREATE VIRTUAL TABLE course_search USING fts5({', '.join(SEARCH_COLUMNS)}, tokenize='trigram')")
+
+    def append(self, key: Tuple[int, int], courses: pd.DataFrame, meetings: pd.DataFrame) -> None:
+        """寫入一個學期（courses 依 section_id 排序）"""
+        if courses.empty:
+            return
+        if self.columns is None:
+            self._create(courses)
+        courses = courses.reindex(columns=self.columns)
+        placeholders = ', '.join('?' * len(self.columns))
+        self.conn.executemany(f"INSERT INTO courses VALUES ({placeholders})", _rows(courses))
+        self.conn.executemany("INSERT INTO meetings VALUES (?, ?, ?, ?, ?)", _rows(meetings[MEETING_COLUMNS]))
+        search = courses[['section_id'] + list(SEARCH_COLUMNS.values())]
+        self.conn.executemany(f"INSERT INTO course_search (rowid, {', '.join(SEARCH_COLUMNS)}) VALUES (?, ?, ?, ?)",
+                              _rows(search))
+        section_ids = courses['section_id']
+        self.conn.execute("INSERT INTO semesters VALUES (?, ?, ?, ?)",
+                          (int(key[0]), int(key[1]), int(section_ids.iloc[0]), int(section_ids.iloc[-1])))
+
+    def commit(self) -> Path:
+        self.conn.execute('CREATE INDEX idx_courses_semester ON courses (學年度, 學期)')
+        self.conn.execute('CREATE INDEX idx_courses_class ON courses ("開課班別(代表)")')
+        self.conn.execute('CREATE INDEX idx_courses_code ON courses (課程代碼)')
+        self.conn.execute('CREATE INDEX idx_meetings_section ON meetings (section_id)')
+        self.conn.execute("INSERT INTO course_search (course_search) VALUES ('optimize')")
+        self.conn.execute(f'PRAGMA user_version = {COURSE_DB_VERSION}')
+        self.conn.commit()
+        self.conn.execute('VACUUM')
+        self.conn.close()
+        self.tmp_path.replace(self.path)
+        return self.path
+
+    def abort(self) -> None:
+        self.conn.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+
+def database_version(path: Path) -> Optional[int]:
+    """資料庫的結構版本，無法開啟時回傳 None"""
+    try:
+        conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            return conn.execute('PRAGMA user_version').fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+
+class ReadOnlyPool:
+    """固定上限的唯讀連線池；連線用完歸還，全部借出時等待"""
+
+    def __init__(self, path: Path, size: int):
+        self.uri = f"{path.resolve().as_uri()}?mode=ro"
+        self.size = size
+        self._idle: 'queue.LifoQueue[sqlite3.Connection]' = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        conn.execute('PRAGMA query_only = ON')
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            conn = self._connect() if create else self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class CourseDatabase:
+    """以唯讀連線池查詢課程資料庫；回傳的 DataFrame 欄位型別與處理後課程表相同"""
+
+    def __init__(self, path: Path, pool_size: int):
+        self.path = path
+        self.pool = ReadOnlyPool(path, pool_size)
+        with self.pool.connection() as conn:
+            bounds = conn.execute('SELECT 學年度, 學期, section_start, section_end FROM semesters '
+                                  'ORDER BY 學年度, 學期').fetchall()
+        self.bounds: Dict[Tuple[int, int], Tuple[int, int]] = {(y, s): (start, end) for y, s, start, end in bounds}
+        self.keys: List[Tuple[int, int]] = list(self.bounds)
+
+    @property
+    def latest_key(self) -> Optional[Tuple[int, int]]:
+        return self.keys[-1] if self.keys else None
+
+    def _query(self, sql: str, params: Sequence[Any] = (), schema=PROCESSED_COURSES_SCHEMA) -> pd.DataFrame:
+        with self.pool.connection() as conn:
+            cursor = conn.execute(sql, params)
+            columns = [d[0] for d in cursor.description]
+            df = pd.DataFrame(cursor.fetchall(), columns=columns)
+        return coerce_to_schema(df, schema)
+
+    def courses(self, key: Optional[Tuple[int, int]] = None) -> pd.DataFrame:
+        """學期的所有開課班（預設最新學期），以主鍵區間讀取"""
+        key = key or self.latest_key
+        if key not in self.bounds:
+            return pd.DataFrame()
+        return self._query('SELECT * FROM courses WHERE section_id BETWEEN ? AND ? ORDER BY section_id', self.bounds[key])
+
+    def all_courses(self, columns: Sequence[str] = ()) -> pd.DataFrame:
+        """所有學期的開課班（由舊到新）；指定 columns 時只讀取這些欄位"""
+        selected = ', '.join(_quote(c) for c in columns) if columns else '*'
+        return self._query(f'SELECT {selected} FROM courses ORDER BY section_id')
+
+    def rows(self, section_ids: Sequence[int]) -> pd.DataFrame:
+        """依 section_id 取得課程列（可跨學期，依傳入順序；不存在者略過）"""
+        ids = [int(s) for s in section_ids]
+        frames = [self._query(f"SELECT * FROM courses WHERE section_id IN ({', '.join('?' * len(chunk))})", chunk)
+                  for chunk in (ids[i:i + 500] for i in range(0, len(ids), 500))]
+        found = concat_courses(frames)
+        if found.empty:
+            return found
+        order = {s: i for i, s in enumerate(ids)}
+        return found.iloc[found['section_id'].map(order).argsort(kind='stable')].reset_index(drop=True)
+
+    def find(self, course_code: str, serial: Optional[str] = None,
+             key: Optional[Tuple[int, int]] = None) -> pd.DataFrame:
+        """課程代碼（與序號）相符的開課班，依 section_id 排序；key 為 None 時查詢所有學期"""
+        sql, params = 'SELECT * FROM courses WHERE 課程代碼 = ?', [str(course_code)]
+        if serial is not None:
+            sql += ' AND 序號 = ?'
+            params.append(int(serial) if str(serial).isdigit() else serial)
+        if key is not None:
+            if key not in self.bounds:
+                return pd.DataFrame()
+            sql += ' AND section_id BETWEEN ? AND ?'
+            params.extend(self.bounds[key])
+        return self._query(sql + ' ORDER BY section_id', params)
+
+    def semester_meetings(self, key: Tuple[int, int]) -> pd.DataFrame:
+        """學期所有開課班的上課時段（欄位與型別同學期分區的上課時段表）"""
+        if key not in self.bounds:
+            return pd.DataFrame(columns=MEETING_COLUMNS)
+        return self._query(f"SELECT {', '.join(MEETING_COLUMNS)} FROM meetings WHERE section_id BETWEEN ? AND ? "
+                           'ORDER BY section_id, rowid', self.bounds[key], schema=MEETINGS_SCHEMA)
+
+    def search(self, q: str, limit: int, key: Optional[Tuple[int, int]] = None,
+               columns: Sequence[str] = tuple(SEARCH_COLUMNS)) -> pd.DataFrame:
+        """課程名稱/教師/英文課程名稱（columns）含 q 的開課班（不分大小寫），依 section_id 排序；
+        key 為 None 時由新到舊逐學期搜尋，湊滿 limit 筆即停止"""
+        query = q.lower()
+        frames, remaining = [], limit
+        for semester in ([key] if key is not None else self.keys[::-1]):
+            if remaining <= 0 or semester not in self.bounds:
+                break
+            start, end = self.bounds[semester]
+            if len(query) >= TRIGRAM_MIN_LENGTH:
+                phrase = '{' + ' '.join(columns) + '} : "' + query.replace('"', '""') + '"'
+                df = self._query(
+                    'SELECT c.* FROM course_search s JOIN courses c ON c.section_id = s.rowid '
+                    'WHERE course_search MATCH ? AND s.rowid BETWEEN ? AND ? ORDER BY s.rowid LIMIT ?',
+                    (phrase, start, end, remaining))
+            else:
+                condition = ' OR '.join(f"instr(lower({_quote(SEARCH_COLUMNS[c])}), ?) > 0" for c in columns)
+                df = self._query(
+                    f'SELECT * FROM courses WHERE section_id BETWEEN ? AND ? AND ({condition}) '
+                    'ORDER BY section_id LIMIT ?',
+                    (start, end, *([query] * len(columns)), remaining))
+            frames.append(df)
+            remaining -= len(df)
+        return concat_courses(frames)
+
+    def by_class(self, department: str, class_name: str, key: Tuple[int, int]) -> pd.DataFrame:
+        """開課班別含 department 或 class_name 的開課班，必修在前"""
+        if key not in self.bounds:
+            return pd.DataFrame()
+        return self._query(
+            'SELECT * FROM courses WHERE 學年度 = ? AND 學期 = ? '
+            'AND (instr("開課班別(代表)", ?) > 0 OR instr("開課班別(代表)", ?) > 0) '
+            'ORDER BY instr(coalesce(課程性質, \'\'), \'必修\') = 0, section_id',
+            (key[0], key[1], department, class_name))
+
+    def departments(self, key: Optional[Tuple[int, int]] = None) -> List[str]:
+        """學期（key 為 None 時為所有學期）的開課班別"""
+        if key is not None and key not in self.bounds:
+            return []
+        with self.pool.connection() as conn:
+            if key is None:
+                rows = conn.execute('SELECT DISTINCT "開課班別(代表)" FROM courses').fetchall()
+            else:
+                rows = conn.execute('SELECT DISTINCT "開課班別(代表)" FROM courses WHERE 學年度 = ? AND 學期 = ?',
+                                    key).fetchall()
+        return sorted(d for (d,) in rows if d and str(d).strip())
+
+    def meetings(self, section_ids: Sequence[int]) -> List[List[Dict[str, Any]]]:
+        """依 section_id 取得各開課班的上課時段（格式同 MeetingIndex.lookup）"""
+        ids = [int(s) for s in section_ids]
+        found: Dict[int, List[Dict[str, Any]]] = {}
+        with self.pool.connection() as conn:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT {', '.join(MEETING_COLUMNS)} FROM meetings WHERE section_id IN ({', '.join('?' * len(chunk))}) "
+                    'ORDER BY section_id, rowid', chunk).fetchall()
+                for section_id, *values in rows:
+                    found.setdefault(section_id, []).append(dict(zip(MEETING_FIELDS, values)))
+        return [found.get(s, []) for s in ids]
+
+    def close(self) -> None:
+        self.pool.close()
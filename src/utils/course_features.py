@@ -0,0 +1,210 @@
+"""選課競爭特徵表 - 每個資料集版本計算一次的開課班/課程（跨學期課程身分）競爭指標，以 NumPy 欄位儲存並依 section_id 查詢"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from utils.course_identity import CourseIdentityIndex, link_courses
+
+# 特徵定義或檔案格式改變時遞增，舊版特徵檔視為不存在
+FEATURE_TABLE_VERSION = 2
+
+INPUT_COLUMNS = ['section_id', '學年度', '學期', '課程代碼', '課程名稱', '教師姓名', '教師列表',
+                 '上限人數', '登記人數', '選上人數']
+
+# 開課班特徵（依 section_id 對齊）；比率在登記或上限為 0 時為 NaN
+SECTION_FEATURES = [
+    'acceptance_rate',          # 中籤率：上限人數 / 登記人數（取上限 1）
+    'demand_ratio',             # 登記人數 / 上限人數
+    'fill_rate',                # 選上人數 / 上限人數
+    'acceptance_percentile',    # 中籤率在同學期開課班中的百分位（越低越難選上）
+    'demand_percentile',        # 登記/上限在同學期開課班中的百分位（越高越熱門）
+]
+# 課程（跨學期課程身分，見 course_identity）特徵（依身分對齊）
+COURSE_FEATURES = [
+    'historical_acceptance_rate',   # 歷年平均中籤率
+    'historical_demand_ratio',      # 歷年平均登記/上限
+    'historical_fill_rate',         # 歷年平均選上/上限
+    'acceptance_trend',             # 中籤率對學期序的斜率（每學期變化量），少於兩學期為 NaN
+    'observed_sections',            # 有完整人數資料的開課班數
+]
+FEATURE_FIELDS = SECTION_FEATURES + COURSE_FEATURES
+
+
+def ratio(numerator: np.ndarray, denominator: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    out = np.full(len(numerator), np.nan)
+    np.divide(numerator, denominator, out=out, where=valid)
+    return out
+
+
+def _group_mean(codes: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """各組非 NaN 值的平均，沒有值的組為 NaN"""
+    valid = ~np.isnan(values)
+    counts = np.bincount(codes[valid], minlength=n_groups)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=n_groups)
+    return ratio(sums, counts.astype('float64'), counts > 0)
+
+
+def _group_slope(codes: np.ndarray, x: np.ndarray, y: np.ndarray, n_groups: int) -> np.ndarray:
+    """各組 y 對 x 的最小平方斜率（以分組加總計算，不逐組迴圈）"""
+    valid = ~np.isnan(y)
+    codes, x, y = codes[valid], x[valid], y[valid]
+    n = np.bincount(codes, minlength=n_groups).astype('float64')
+    sx = np.bincount(codes, weights=x, minlength=n_groups)
+    sy = np.bincount(codes, weights=y, minlength=n_groups)
+    sxx = np.bincount(codes, weights=x * x, minlength=n_groups)
+    sxy = np.bincount(codes, weights=x * y, minlength=n_groups)
+    denominator = n * sxx - sx * sx
+    return ratio(n * sxy - sx * sy, denominator, (n >= 2) & (denominator > 0))
+
+
+def semester_order(courses: pd.DataFrame) -> np.ndarray:
+    """學期序（學年度 * 2 + 學期 - 1），相鄰學期差 1"""
+    years = pd.to_numeric(courses['學年度']).to_numpy(dtype='int64')
+    semesters = pd.to_numeric(courses['學期']).to_numpy(dtype='int64')
+    return years * 2 + semesters - 1
+
+
+def _semester_percentile(semester_codes: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """值在同學期（非 NaN）開課班中的百分位排名，範圍 (0, 1]"""
+    return pd.Series(values).groupby(semester_codes).rank(pct=True).to_numpy(dtype='float64')
+
+
+class CourseFeatureTable:
+    """競爭特徵表：開課班特徵以 section_id 排序，課程特徵以課程身分（course_codes）索引；
+    identity 為 身分 -> 開課班 的索引，查詢一門課的歷年開課班為一次切片"""
+
+    def __init__(self, section_ids: np.ndarray, course_codes: np.ndarray,
+                 sections: Dict[str, np.ndarray], courses: Dict[str, np.ndarray],
+                 course_names: np.ndarray, teachers: np.ndarray, identity: CourseIdentityIndex,
+                 version: Optional[str] = None):
+        self.section_ids = section_ids
+        self.course_codes = course_codes
+        self.sections = sections
+        self.courses = courses
+        self.course_names = course_names
+        self.teachers = teachers
+        self.identity = identity
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.section_ids)
+
+    @classmethod
+    def build(cls, courses: pd.DataFrame, version: Optional[str] = None) -> 'CourseFeatureTable':
+        """由所有學期的課程表（每個開課班一列，至少含 INPUT_COLUMNS）計算特徵"""
+        courses = courses.sort_values('section_id', kind='stable')
+        registered = courses['登記人數'].fillna(0).to_numpy(dtype='float64')
+        capacity = courses['上限人數'].fillna(0).to_numpy(dtype='float64')
+        selected = courses['選上人數'].fillna(0).to_numpy(dtype='float64')
+        valid = (registered > 0) & (capacity > 0)
+
+        acceptance = np.minimum(ratio(capacity, registered, valid), 1.0)
+        demand = ratio(registered, capacity, valid)
+        fill = ratio(selected, capacity, valid)
+
+        order = semester_order(courses).astype('float64')
+        semester_codes = pd.factorize(order)[0]
+        section_ids = courses['section_id'].to_numpy(dtype='int64')
+        identity = CourseIdentityIndex.from_identities(section_ids, link_courses(courses))
+        course_codes = identity.identities
+        n_courses = len(identity)
+        # 課程名稱/教師取各身分最新一期
+        latest = identity.latest_rows()
+
+        sections = {
+            'acceptance_rate': acceptance,
+            'demand_ratio': demand,
+            'fill_rate': fill,
+            'acceptance_percentile': _semester_percentile(semester_codes, acceptance),
+            'demand_percentile': _semester_percentile(semester_codes, demand),
+        }
+        course_features = {
+            'historical_acceptance_rate': _group_mean(course_codes, acceptance, n_courses),
+            'historical_demand_ratio': _group_mean(course_codes, demand, n_courses),
+            'historical_fill_rate': _group_mean(course_codes, fill, n_courses),
+            'acceptance_trend': _group_slope(course_codes, order, acceptance, n_courses),
+            'observed_sections': np.bincount(course_codes[valid], minlength=n_courses).astype('int32'),
+        }
+        return cls(
+            section_ids=section_ids,
+            course_codes=course_codes,
+            sections=sections,
+            courses=course_features,
+            course_names=courses['課程名稱'].astype(object).fillna('').astype(str).str.strip().to_numpy(dtype=str)[latest],
+            teachers=courses['教師姓名'].astype(object).fillna('').astype(str).str.strip().to_numpy(dtype=str)[latest],
+            identity=identity,
+            version=version,
+        )
+
+    def save(self, path: Path) -> Path:
+        """寫出為未壓縮的 .npz（各欄位為獨立陣列，不需 pickle）"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {f"section.{k}": v for k, v in self.sections.items()}
+        arrays.update({f"course.{k}": v for k, v in self.courses.items()})
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, format_version=np.array(FEATURE_TABLE_VERSION), section_ids=self.section_ids,
+                     course_codes=self.course_codes, course_names=self.course_names, teachers=self.teachers,
+                     identity_rows=self.identity.rows, identity_offsets=self.identity.offsets, **arrays)
+        tmp_path.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path, version: Optional[str] = None) -> Optional['CourseFeatureTable']:
+        """讀取特徵檔；格式版本不符時回傳 None"""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format_version']) != FEATURE_TABLE_VERSION:
+                return None
+            section_ids, course_codes = data['section_ids'], data['course_codes']
+            return cls(
+                section_ids=section_ids,
+                course_codes=course_codes,
+                sections={k: data[f"section.{k}"] for k in SECTION_FEATURES},
+                courses={k: data[f"course.{k}"] for k in COURSE_FEATURES},
+                course_names=data['course_names'],
+                teachers=data['teachers'],
+                identity=CourseIdentityIndex(section_ids, course_codes, data['identity_rows'], data['identity_offsets']),
+                version=version,
+            )
+
+    def positions(self, section_ids: Sequence[int]) -> np.ndarray:
+        """section_id 在特徵表中的列位置，不存在者為 -1"""
+        section_ids = np.asarray(section_ids, dtype=np.int64)
+        if not len(self.section_ids):
+            return np.full(len(section_ids), -1, dtype=np.int64)
+        pos = np.searchsorted(self.section_ids, section_ids).clip(max=len(self.section_ids) - 1)
+        return np.where(self.section_ids[pos] == section_ids, pos, -1)
+
+    def lookup(self, section_ids: Sequence[int]) -> Dict[str, np.ndarray]:
+        """依 section_id 取得所有特徵欄位（不存在的開課班為 NaN）"""
+        pos = self.positions(section_ids)
+        found = pos >= 0
+        codes = self.course_codes[pos[found]]
+        result = {}
+        for name, values in list(self.sections.items()) + list(self.courses.items()):
+            column = np.full(len(pos), np.nan)
+            column[found] = values[codes] if name in self.courses else values[pos[found]]
+            result[name] = column
+        return result
+
+    def history(self, section_id: int) -> np.ndarray:
+        """與開課班同一課程身分的所有開課班 section_id（含自己，由舊到新）"""
+        identity = int(self.identity.identity_of([section_id])[0])
+        return self.identity.sections(identity)
+
+    def attach(self, records: List[Dict[str, Any]], section_ids: Sequence[int]) -> None:
+        """將特徵與課程身分附加到回應紀錄；NaN 轉為 None，次數欄位轉為 int"""
+        columns = self.lookup(section_ids)
+        identities = self.identity.identity_of(section_ids)
+        for i, record in enumerate(records):
+            record['course_identity'] = int(identities[i]) if identities[i] >= 0 else None
+            for name in FEATURE_FIELDS:
+                value = columns[name][i]
+                if np.isnan(value):
+                    record[name] = None
+                elif name == 'observed_sections':
+                    record[name] = int(value)
+                else:
+                    record[name] = float(value)
@@ -0,0 +1,116 @@
+"""跨學期課程身分 - 以課程代碼、正規化課程名稱與拆分後的教師列表，將各學期的開課班連結為穩定的課程身分
+
+課程代碼會跨學期重複使用（例如體育(一)/(二)、校際課程共用代碼），不能單獨作為連結依據。兩個開課班
+正規化名稱相同，且教師集合相同（允許課程代碼改變）、或課程代碼相同且至少有一位共同教師（允許合授教師增減）時
+視為同一門課，連結可遞移。身分以第一次出現的順序編號，並建立 身分 -> 開課班列 的索引（CSR 形式），
+查詢一門課的所有學期只需一次陣列切片。索引隨競爭特徵表一起寫出（見 course_features）。
+"""
+
+import unicodedata
+import numpy as np
+import pandas as pd
+from typing import Sequence, Tuple
+
+INPUT_COLUMNS = ['section_id', '課程代碼', '課程名稱', '教師姓名', '教師列表']
+TEACHER_SEPARATOR = ', '
+
+
+def normalize_names(names: pd.Series) -> pd.Series:
+    """全形/半形統一（NFKC）、去除所有空白並轉小寫"""
+    text = names.astype(object).fillna('').astype(str)
+    return text.map(lambda s: unicodedata.normalize('NFKC', s)).str.replace(r'\s+', '', regex=True).str.lower()
+
+
+def teacher_lists(courses: pd.DataFrame) -> pd.Series:
+    """每列拆開、去空白、去重並排序後的教師清單；沒有教師列表時沿用教師姓名"""
+    if '教師列表' in courses.columns:
+        teachers = courses['教師列表'].astype(object).fillna(courses['教師姓名'].astype(object))
+    else:
+        teachers = courses['教師姓名'].astype(object)
+    return teachers.fillna('').astype(str).map(
+        lambda s: sorted({t.strip() for t in s.split(TEACHER_SEPARATOR)} - {''})
+    )
+
+
+def _propagate_min(size: int, links: Sequence[Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+    """連通元件：links 為 (列位置, 群組編號) 配對，反覆將每個群組內的標籤取最小值，直到不再變動"""
+    labels = np.arange(size, dtype=np.int64)
+    while True:
+        previous = labels.copy()
+        for rows, groups in links:
+            group_min = np.full(groups.max() + 1, size, dtype=np.int64)
+            np.minimum.at(group_min, groups, labels[rows])
+            np.minimum.at(labels, rows, group_min[groups])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def link_courses(courses: pd.DataFrame) -> np.ndarray:
+    """每列的課程身分（0 起算，依第一次出現的列順序編號）"""
+    if courses.empty:
+        return np.empty(0, dtype=np.int32)
+    rows = np.arange(len(courses))
+    teachers = teacher_lists(courses)
+    codes = courses['課程代碼'].astype(object).fillna('').astype(str).str.strip().to_numpy()
+    names = normalize_names(courses['課程名稱']).to_numpy()
+
+    # 名稱 + 完整教師集合
+    team = teachers.map(TEACHER_SEPARATOR.join).to_numpy()
+    by_team = pd.MultiIndex.from_arrays([names, team]).factorize()[0]
+    # 課程代碼 + 名稱 + 單一教師（每位教師各一筆）
+    counts = teachers.map(len).to_numpy()
+    member_rows = np.repeat(rows, counts)
+    members = np.array([t for ts in teachers for t in ts], dtype=object)
+    links = [(rows, by_team)]
+    if len(member_rows):
+        by_member = pd.MultiIndex.from_arrays([codes[member_rows], names[member_rows], members]).factorize()[0]
+        links.append((member_rows, by_member))
+
+    labels = _propagate_min(len(courses), links)
+    return pd.factorize(labels)[0].astype(np.int32)
+
+
+class CourseIdentityIndex:
+    """identities[i] 為第 i 列（依 section_id 排序）的課程身分；rows 依身分排序，offsets 為各身分的起訖位置"""
+
+    def __init__(self, section_ids: np.ndarray, identities: np.ndarray, rows: np.ndarray, offsets: np.ndarray):
+        self.section_ids = section_ids
+        self.identities = identities
+        self.rows = rows
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @classmethod
+    def from_identities(cls, section_ids: np.ndarray, identities: np.ndarray) -> 'CourseIdentityIndex':
+        """由依 section_id 排序的每列身分建立索引"""
+        # 穩定排序使同一身分內的列維持 section_id（學期）順序
+        rows = np.argsort(identities, kind='stable').astype(np.int32)
+        counts = np.bincount(identities, minlength=int(identities.max()) + 1 if len(identities) else 0)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(section_ids, identities, rows, offsets)
+
+    @classmethod
+    def build(cls, courses: pd.DataFrame) -> 'CourseIdentityIndex':
+        courses = courses.sort_values('section_id', kind='stable')
+        return cls.from_identities(courses['section_id'].to_numpy(dtype=np.int64), link_courses(courses))
+
+    def latest_rows(self) -> np.ndarray:
+        """每個身分最新一列的列位置"""
+        return self.rows[self.offsets[1:] - 1]
+
+    def identity_of(self, section_ids: Sequence[int]) -> np.ndarray:
+        """section_id 對應的課程身分，不存在者為 -1"""
+        section_ids = np.asarray(section_ids, dtype=np.int64)
+        if not len(self.section_ids):
+            return np.full(len(section_ids), -1, dtype=np.int64)
+        pos = np.searchsorted(self.section_ids, section_ids).clip(max=len(self.section_ids) - 1)
+        return np.where(self.section_ids[pos] == section_ids, self.identities[pos], -1)
+
+    def sections(self, identity: int) -> np.ndarray:
+        """課程身分在所有學期的 section_id（由舊到新），為一次陣列切片"""
+        if not 0 <= identity < len(self):
+            return np.empty(0, dtype=np.int64)
+        return self.section_ids[self.rows[self.offsets[identity]:self.offsets[identity + 1]]]
@@ -0,0 +1,124 @@
+"""課程/上課時段雙表結構 - 每個開課班一列的課程表，與以 section_id 關聯的上課時段表"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from .io import safe_read_csv
+
+MEETING_FIELDS = ['星期', '起始節次', '結束節次', '上課地點']
+MEETING_COLUMNS = ['section_id'] + MEETING_FIELDS
+SECTION_KEY = ['學年度', '學期', '課程代碼', '序號']
+
+
+class CourseTables(NamedTuple):
+    """courses：每個開課班一列，section_id 為列位置；meetings：每段上課時間一列"""
+    courses: pd.DataFrame
+    meetings: pd.DataFrame
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+    @property
+    def empty(self) -> bool:
+        return self.courses.empty
+
+
+def empty_meetings() -> pd.DataFrame:
+    return pd.DataFrame({
+        'section_id': pd.Series(dtype='int32'),
+        '星期': pd.Series(dtype=object),
+        '起始節次': pd.Series(dtype='Int64'),
+        '結束節次': pd.Series(dtype='Int64'),
+        '上課地點': pd.Series(dtype=object),
+    })
+
+
+def concat_tables(parts: Sequence[CourseTables]) -> CourseTables:
+    """合併多個學期的雙表，依序平移 section_id 使其等於合併後課程表的列位置"""
+    courses, meetings = [], []
+    offset = 0
+    for part in parts:
+        courses.append(part.courses.assign(section_id=part.courses['section_id'].to_numpy() + offset))
+        meetings.append(part.meetings.assign(section_id=part.meetings['section_id'].to_numpy() + offset))
+        offset += len(part.courses)
+    if not courses:
+        return CourseTables(pd.DataFrame(), empty_meetings())
+    all_courses = pd.concat(courses, ignore_index=True)
+    all_meetings = pd.concat(meetings, ignore_index=True)
+    all_courses['section_id'] = all_courses['section_id'].astype('int32')
+    all_meetings['section_id'] = all_meetings['section_id'].astype('int32')
+    return CourseTables(all_courses, all_meetings)
+
+
+def concat_courses(frames: Sequence[pd.DataFrame]) -> pd.DataFrame:
+    """串接不同學期的課程列：略過空的 DataFrame，categorical 欄位先轉為 object（各學期的類別不同，
+    某學期全為缺值時 pandas 會發出 FutureWarning）"""
+    frames = [f.astype({c: object for c in f.columns if isinstance(f[c].dtype, pd.CategoricalDtype)})
+              for f in frames if not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def flatten(tables: CourseTables, columns: Sequence[str] = ()) -> pd.DataFrame:
+    """還原為舊版「一段上課時間一列」的扁平資料（無上課時段的課程保留一列 NA）"""
+    flat = tables.courses.merge(tables.meetings, on='section_id', how='left', sort=False)
+    if '上課地點' in flat.columns:
+        flat['上課地點'] = flat['上課地點'].astype(object).fillna('')
+    if columns:
+        flat = flat[[c for c in columns if c in flat.columns]]
+    return flat
+
+
+def split_flat(flat: pd.DataFrame) -> CourseTables:
+    """由舊版扁平資料拆出雙表（同一開課班的多列合併為一列課程）"""
+    key = [c for c in SECTION_KEY if c in flat.columns]
+    flat = flat.reset_index(drop=True)
+    if key:
+        section_id = flat.groupby(key, sort=False, dropna=False).ngroup().to_numpy()
+    else:
+        section_id = np.arange(len(flat))
+
+    first = ~pd.Series(section_id).duplicated().to_numpy()
+    courses = flat.loc[first, [c for c in flat.columns if c not in MEETING_FIELDS]].reset_index(drop=True)
+    courses.insert(0, 'section_id', np.arange(len(courses), dtype='int32'))
+
+    meetings = flat[[c for c in MEETING_FIELDS if c in flat.columns]].copy()
+    meetings.insert(0, 'section_id', section_id.astype('int32'))
+    has_time = meetings['星期'].notna() if '星期' in meetings.columns else pd.Series(False, index=meetings.index)
+    has_room = meetings['上課地點'].notna() & (meetings['上課地點'].astype(str) != '') \
+        if '上課地點' in meetings.columns else pd.Series(False, index=meetings.index)
+    meetings = meetings[has_time | has_room].reset_index(drop=True)
+    return CourseTables(courses, meetings)
+
+
+def read_courses(courses_file: Path, columns: Iterable[str]) -> Optional[pd.DataFrame]:
+    """只讀取處理後課程表的 columns 欄位（不存在者略過）；舊版扁平檔（無 section_id）先合併為每個開課班一列"""
+    wanted = set(columns)
+    df = safe_read_csv(courses_file, usecols=lambda col: col in wanted)
+    if df is None:
+        return None
+    if 'section_id' not in df.columns:
+        df = split_flat(df).courses
+    return df
+
+
+class MeetingIndex:
+    """依 section_id 排序的上課時段，可用 O(1) 切片取得某開課班的所有時段"""
+
+    def __init__(self, meetings: pd.DataFrame):
+        meetings = meetings.sort_values('section_id', kind='stable').reset_index(drop=True)
+        self.meetings = meetings
+        self.section_ids = meetings['section_id'].to_numpy()
+        self.records: List[Dict[str, Any]] = meetings[MEETING_FIELDS].astype(object).where(
+            meetings[MEETING_FIELDS].notna(), None
+        ).to_dict('records')
+
+    def slices(self, section_ids: np.ndarray):
+        starts = np.searchsorted(self.section_ids, section_ids, side='left')
+        ends = np.searchsorted(self.section_ids, section_ids, side='right')
+        return starts, ends
+
+    def lookup(self, section_ids: Sequence[int]) -> List[List[Dict[str, Any]]]:
+        starts, ends = self.slices(np.asarray(section_ids))
+        return [self.records[s:e] for s, e in zip(starts, ends)]
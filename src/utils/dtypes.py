@@ -0,0 +1,66 @@
+"""處理後資料集的緊湊型別 - 高重複文字欄位轉為 categorical，數值欄位縮小位寬"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+# 高重複的文字欄位：以字典編碼（categorical）儲存
+CATEGORICAL_COLUMNS = [
+    '學院', '科系', '年級', '班級', '學制', '部別',
+    '星期', '課程性質', '教師姓名', '上課地點',
+    '課程性質2', '上課大樓', '可跨班', '教學大綱狀態',
+]
+
+# 數值欄位的目標型別
+NUMERIC_DTYPES: Dict[str, str] = {
+    '序號': 'int32',
+    '上限人數': 'int32',
+    '登記人數': 'int32',
+    '選上人數': 'int32',
+    '起始節次': 'Int8',
+    '結束節次': 'Int8',
+}
+
+
+def to_compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """將處理後的資料集轉為緊湊型別（就地修改並回傳）"""
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    for col, dtype in NUMERIC_DTYPES.items():
+        if col not in df.columns:
+            continue
+        values = pd.to_numeric(df[col], errors='coerce')
+        # 含缺值的整數欄位無法轉為 numpy int，保留原型別
+        if dtype.startswith('int') and values.isna().any():
+            continue
+        df[col] = values.astype(dtype)
+    return df
+
+
+def own_object_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """重新建立 object 欄位（缺值統一為 np.nan）並回傳新的 DataFrame
+
+    反序列化（pickle）得到的 object 欄位在 pandas 2.1 下呼叫 astype(str) 會原地把缺值改寫成 'nan'，
+    copy(deep=True) 無法避免，需重新建立欄位陣列。
+    """
+    df = df.copy()
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """逐欄比較兩個 DataFrame 的記憶體用量（bytes，含物件內容）"""
+    before_bytes = before.memory_usage(deep=True, index=False)
+    after_bytes = after.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        '欄位': before_bytes.index,
+        '型別(前)': [str(before[c].dtype) for c in before_bytes.index],
+        '型別(後)': [str(after[c].dtype) if c in after.columns else '' for c in before_bytes.index],
+        'bytes(前)': before_bytes.values,
+        'bytes(後)': after_bytes.reindex(before_bytes.index).fillna(0).astype('int64').values,
+    })
+    report['比例'] = (report['bytes(後)'] / report['bytes(前)'].where(report['bytes(前)'] > 0)).round(3)
+    return report.sort_values('bytes(前)', ascending=False, ignore_index=True)
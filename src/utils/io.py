@@ -1,25 +1,179 @@
-"""I/O 工具 - 安全的 CSV 讀寫函式"""
+"""I/O 工具 - 安全的 CSV 讀寫函式與各類 CSV 的欄位型別註冊表"""
 
+import fnmatch
+import importlib.util
 import logging
 import pandas as pd
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, NamedTuple, Optional
 
+from .dtypes import CATEGORICAL_COLUMNS, NUMERIC_DTYPES
 
-def safe_read_csv(filepath: Path, encoding: str = 'utf-8-sig') -> Optional[pd.DataFrame]:
-    """安全讀取 CSV"""
+# 有安裝 pyarrow 時以其解析器讀取整個檔案，否則使用 pandas 的 C 解析器
+FAST_ENGINE = 'pyarrow' if importlib.util.find_spec('pyarrow') is not None else 'c'
+
+
+class CsvSchema(NamedTuple):
+    """一類 CSV 的欄位型別；未列出的欄位沿用 pandas 推斷"""
+    name: str
+    patterns: tuple
+    dtypes: Dict[str, str]
+
+
+_TEXT = 'str'
+
+RAW_COURSES_SCHEMA = CsvSchema('raw_courses', ('courses_*.csv',), {
+    '序號': 'Int64', '課程代碼': _TEXT, '開課班別(代表)': _TEXT, '課程名稱': _TEXT,
+    '教學大綱Syllabus': _TEXT, '課程性質': _TEXT, '課程性質2': _TEXT, '全英語授課': _TEXT,
+    '學分': 'float64', '教師姓名': _TEXT, '上課大樓': _TEXT, '上課節次+地點': _TEXT,
+    '上限人數': 'Int64', '登記人數': 'Int64', '選上人數': 'Int64',
+    '可跨班': _TEXT, '備註': _TEXT, '英文課程名稱': _TEXT, '教學大綱狀態': _TEXT,
+    '教學大綱連結': _TEXT, '教師個人頁': _TEXT,
+})
+
+# 課程表（亦相容舊版含上課時段欄位的扁平檔）；高重複欄位與數值位寬沿用 utils.dtypes
+PROCESSED_COURSES_SCHEMA = CsvSchema('processed_courses', ('all_courses_*.csv',), {
+    'section_id': 'int32', '學年度': 'int32', '學期': 'int32',
+    '課程代碼': _TEXT, '開課班別(代表)': _TEXT, '課程名稱': _TEXT, '英文課程名稱': _TEXT,
+    '教學大綱Syllabus': _TEXT, '教學大綱連結': _TEXT, '教師列表': _TEXT, '上課節次+地點': _TEXT, '備註': _TEXT,
+    '全英語授課': 'bool', '學分': 'float64',
+    **{col: 'category' for col in CATEGORICAL_COLUMNS},
+    **NUMERIC_DTYPES,
+})
+
+MEETINGS_SCHEMA = CsvSchema('meetings', ('all_meetings_*.csv',), {
+    col: PROCESSED_COURSES_SCHEMA.dtypes[col] for col in ['section_id', '星期', '起始節次', '結束節次', '上課地點']
+})
+
+CLUSTERS_SCHEMA = CsvSchema('clusters', ('clusters_*.csv',), {
+    'section_id': 'int32', '學年度': 'int32', '學期': 'int32', '分類': 'category',
+    '中籤率': 'float64', '飽和度': 'float64', 'cluster': 'int8', '分群描述': 'category',
+})
+
+FORECAST_SCHEMA = CsvSchema('forecast', ('forecast_*.csv',), {
+    'section_id': 'int32', '學年度': 'int32', '學期': 'int32',
+    'predicted_registered': 'float64', 'predicted_acceptance': 'float64',
+    'forecast_basis': 'category', 'history_sections': 'int32',
+})
+
+TEACHER_DICT_SCHEMA = CsvSchema('teacher_dict', ('teacher.csv', 'teacher_dict_auto.csv'), {
+    'teacher_id': _TEXT, 'teacher_name': _TEXT, 'alias': _TEXT,
+})
+
+TEACHER_HIGH_RISK_SCHEMA = CsvSchema('teacher_high_risk', ('teacher_high_risk.csv',), {
+    'teacher_name': _TEXT,
+})
+
+DEPARTMENT_MAPPING_SCHEMA = CsvSchema('department_mapping', ('department_mapping.csv',), {
+    '開課班別(代表)': _TEXT, '學院': _TEXT, '科系': _TEXT, '年級': _TEXT, '班級': _TEXT,
+})
+
+SCHEMAS = [
+    RAW_COURSES_SCHEMA, PROCESSED_COURSES_SCHEMA, MEETINGS_SCHEMA, CLUSTERS_SCHEMA, FORECAST_SCHEMA,
+    TEACHER_DICT_SCHEMA, TEACHER_HIGH_RISK_SCHEMA, DEPARTMENT_MAPPING_SCHEMA,
+]
+
+
+def schema_for(filepath: Path) -> Optional[CsvSchema]:
+    """依檔名找出對應的 schema（比對順序同 SCHEMAS）"""
+    name = Path(filepath).name
+    for schema in SCHEMAS:
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in schema.patterns):
+            return schema
+    return None
+
+
+def _text_dtypes(schema: CsvSchema) -> Dict[str, str]:
+    return {col: dtype for col, dtype in schema.dtypes.items() if dtype in (_TEXT, 'category')}
+
+
+def coerce_to_schema(df: pd.DataFrame, schema: CsvSchema) -> pd.DataFrame:
+    """將已讀入的欄位轉為 schema 型別；無法解析的數值轉為缺值，含缺值的整數改用可空整數"""
+    for col, dtype in schema.dtypes.items():
+        if col not in df.columns or str(df[col].dtype) == dtype:
+            continue
+        if dtype == 'bool':
+            df[col] = df[col].map({True: True, False: False, 'True': True, 'False': False}).fillna(False).astype(bool)
+        elif dtype == _TEXT:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        elif dtype == 'category':
+            df[col] = df[col].astype('category')
+        else:
+            values = pd.to_numeric(df[col], errors='coerce')
+            if dtype.startswith('int') and values.isna().any():
+                dtype = 'I' + dtype[1:]
+            df[col] = values.astype(dtype)
+    return df
+
+
+def _read_typed(filepath: Path, schema: CsvSchema, encoding: str, usecols) -> pd.DataFrame:
+    """以 schema 型別一次讀入；型別不符（如數值欄出現文字）時改為讀入文字後再轉換"""
+    kwargs = dict(encoding=encoding, usecols=usecols)
+    if FAST_ENGINE != 'c' and not callable(usecols):
+        try:
+            return pd.read_csv(filepath, dtype=schema.dtypes, engine=FAST_ENGINE, **kwargs)
+        except Exception as e:
+            logging.debug(f"{FAST_ENGINE} 解析 {filepath} 失敗，改用 C 解析器: {e}")
     try:
-        return pd.read_csv(filepath, encoding=encoding)
+        return pd.read_csv(filepath, dtype=schema.dtypes, **kwargs)
+    except (ValueError, TypeError) as e:
+        logging.warning(f"{filepath} 欄位型別不符 schema（{e}），改為逐欄轉換")
+        return coerce_to_schema(pd.read_csv(filepath, dtype=_text_dtypes(schema), **kwargs), schema)
+
+
+def safe_read_csv(filepath: Path, encoding: str = 'utf-8-sig', usecols=None,
+                  schema: Optional[CsvSchema] = None) -> Optional[pd.DataFrame]:
+    """安全讀取 CSV；依檔名（或指定的 schema）固定欄位型別，usecols 可只讀取部分欄位"""
+    schema = schema or schema_for(filepath)
+    try:
+        if schema is None:
+            return pd.read_csv(filepath, encoding=encoding, usecols=usecols)
+        return _read_typed(filepath, schema, encoding, usecols)
     except Exception as e:
         logging.error(f"讀取文件失敗 {filepath}: {e}")
         return None
 
 
+def safe_read_csv_chunks(filepath: Path, chunksize: int, encoding: str = 'utf-8-sig',
+                         schema: Optional[CsvSchema] = None) -> Iterator[pd.DataFrame]:
+    """分塊讀取 CSV，每次只保留一塊在記憶體中；各塊以相同 schema 轉換，型別不會因塊而異
+
+    讀取中途失敗時記錄後重新拋出，呼叫端不會把只讀到一半的檔案當成完整資料。
+    """
+    schema = schema or schema_for(filepath)
+    try:
+        dtype = _text_dtypes(schema) if schema else None
+        with pd.read_csv(filepath, encoding=encoding, chunksize=chunksize, dtype=dtype) as reader:
+            for chunk in reader:
+                yield coerce_to_schema(chunk, schema) if schema else chunk
+    except Exception as e:
+        logging.error(f"讀取文件失敗 {filepath}: {e}")
+        raise
+
+
+def _conform_numeric(df: pd.DataFrame, schema: Optional[CsvSchema]) -> pd.DataFrame:
+    """寫出前將數值/布林欄位轉為 schema 型別（例如避免整數欄寫成 3.0）"""
+    if schema is None:
+        return df
+    numeric = {col: dtype for col, dtype in schema.dtypes.items()
+               if col in df.columns and dtype not in (_TEXT, 'category') and str(df[col].dtype) != dtype}
+    if not numeric:
+        return df
+    return coerce_to_schema(df.copy(), CsvSchema(schema.name, schema.patterns, numeric))
+
+
 def safe_write_csv(df: pd.DataFrame, filepath: Path, index: bool = False, encoding: str = 'utf-8-sig'):
     """安全寫入 CSV"""
     try:
         filepath.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(filepath, index=index, encoding=encoding)
+        _conform_numeric(df, schema_for(filepath)).to_csv(filepath, index=index, encoding=encoding)
         logging.info(f"成功寫入文件: {filepath}")
     except Exception as e:
         logging.error(f"寫入文件失敗 {filepath}: {e}")
+
+
+def append_csv(df: pd.DataFrame, filepath: Path, header: bool, encoding: str = 'utf-8-sig'):
+    """附加寫入 CSV；header 為 True 時覆寫檔案並寫入表頭（BOM 只會出現在檔首）"""
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    df = _conform_numeric(df, schema_for(filepath.with_suffix('') if filepath.suffix == '.tmp' else filepath))
+    df.to_csv(filepath, index=False, encoding=encoding, mode='w' if header else 'a', header=header)
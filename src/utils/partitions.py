@@ -0,0 +1,252 @@
+"""依學期分區的處理後資料集 - 每個 (學年度, 學期) 一組課程表/上課時段表，可延遲載入並在記憶體預算內淘汰"""
+
+import json
+import logging
+import shutil
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .course_tables import CourseTables, MeetingIndex, concat_courses
+from .dtypes import own_object_columns, to_compact_dtypes
+from .io import append_csv, safe_read_csv
+
+MANIFEST_NAME = 'manifest.json'
+
+SemesterKey = Tuple[int, int]
+
+
+def partition_files(key: SemesterKey) -> Tuple[str, str]:
+    """分區的 (課程表, 上課時段表) 檔名；沿用 all_courses_/all_meetings_ 前綴以套用相同的 schema"""
+    year, semester = key
+    return f"all_courses_{year}_{semester}.csv", f"all_meetings_{year}_{semester}.csv"
+
+
+def semester_bounds(courses: pd.DataFrame) -> List[Tuple[SemesterKey, int, int]]:
+    """課程表依學期連續排列；回傳各學期的 (學期, 起始列, 結束列)"""
+    if courses.empty:
+        return []
+    years = pd.to_numeric(courses['學年度']).to_numpy()
+    semesters = pd.to_numeric(courses['學期']).to_numpy()
+    change = np.flatnonzero((years[1:] != years[:-1]) | (semesters[1:] != semesters[:-1])) + 1
+    starts = np.r_[0, change]
+    ends = np.r_[change, len(courses)]
+    return [((int(years[s]), int(semesters[s])), int(s), int(e)) for s, e in zip(starts, ends)]
+
+
+class PartitionWriter:
+    """逐批寫出分區資料集：先寫入 <目錄>.tmp，commit() 時寫出 manifest 並改名，abort() 捨棄"""
+
+    def __init__(self, dataset_dir: Path):
+        self.dataset_dir = dataset_dir
+        self.tmp_dir = dataset_dir.with_name(dataset_dir.name + '.tmp')
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        self.entries: Dict[SemesterKey, Dict[str, Any]] = {}
+        self._last_key: Optional[SemesterKey] = None
+
+    def append(self, tables: CourseTables) -> None:
+        courses, meetings = tables
+        meeting_sections = meetings['section_id'].to_numpy()
+        section_ids = courses['section_id'].to_numpy()
+        for key, start, end in semester_bounds(courses):
+            entry = self.entries.get(key)
+            if entry is not None and key != self._last_key:
+                raise ValueError(f"學期 {key} 的課程在資料集中不連續")
+            first_id, last_id = int(section_ids[start]), int(section_ids[end - 1])
+            part_meetings = meetings[(meeting_sections >= first_id) & (meeting_sections <= last_id)]
+            courses_file, meetings_file = partition_files(key)
+            append_csv(courses.iloc[start:end], self.tmp_dir / courses_file, header=entry is None)
+            append_csv(part_meetings, self.tmp_dir / meetings_file, header=entry is None)
+            if entry is None:
+                entry = self.entries[key] = {
+                    'year': key[0], 'semester': key[1], 'courses': 0, 'meetings': 0,
+                    'section_start': first_id, 'section_end': first_id,
+                    'courses_file': courses_file, 'meetings_file': meetings_file,
+                }
+            entry['courses'] += end - start
+            entry['meetings'] += len(part_meetings)
+            entry['section_end'] = last_id + 1
+            self._last_key = key
+
+    def commit(self) -> Path:
+        manifest = {'partitions': [self.entries[k] for k in sorted(self.entries)]}
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        (self.tmp_dir / MANIFEST_NAME).write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + '\n',
+                                                  encoding='utf-8')
+        self.tmp_dir.replace(self.dataset_dir)
+        return self.dataset_dir
+
+    def abort(self) -> None:
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+def write_partitioned(tables: CourseTables, dataset_dir: Path) -> Path:
+    writer = PartitionWriter(dataset_dir)
+    writer.append(tables)
+    return writer.commit()
+
+
+def latest_dataset_dir(root: Path) -> Optional[Path]:
+    """root 下最新一個已完成（含 manifest）的分區資料集目錄"""
+    dirs = sorted(d for d in root.glob('*') if (d / MANIFEST_NAME).exists()) if root.exists() else []
+    return dirs[-1] if dirs else None
+
+
+class Partition(NamedTuple):
+    courses: pd.DataFrame
+    index: MeetingIndex
+    nbytes: int
+
+
+def _make_partition(tables: CourseTables) -> Partition:
+    courses = to_compact_dtypes(tables.courses)
+    meetings = to_compact_dtypes(tables.meetings)
+    nbytes = int(courses.memory_usage(deep=True).sum() + meetings.memory_usage(deep=True).sum())
+    return Partition(courses, MeetingIndex(meetings), nbytes)
+
+
+class PartitionedDataset:
+    """依學期延遲載入的資料集
+
+    最新學期固定常駐；其他學期第一次存取時才讀檔，已載入分區的總量超過 memory_budget（bytes）時
+    依最久未使用的順序淘汰。由記憶體中的資料建立（from_tables）時沒有檔案可重讀，不會淘汰。
+    """
+
+    def __init__(self, entries: Sequence[Dict[str, Any]], dataset_dir: Optional[Path] = None,
+                 memory_budget: Optional[int] = None, version: Optional[str] = None):
+        self.dataset_dir = dataset_dir
+        # 資料集版本（處理時的時間戳），衍生結果（如分群）以此對應
+        self.version = version or (dataset_dir.name if dataset_dir is not None else None)
+        self.memory_budget = memory_budget
+        self.entries: Dict[SemesterKey, Dict[str, Any]] = {
+            (int(e['year']), int(e['semester'])): e for e in entries
+        }
+        self.keys: List[SemesterKey] = sorted(self.entries)
+        ordered = sorted(self.entries.values(), key=lambda e: e['section_start'])
+        self._section_starts = np.array([e['section_start'] for e in ordered], dtype=np.int64)
+        self._section_keys = [(int(e['year']), int(e['semester'])) for e in ordered]
+        self._loaded: 'OrderedDict[SemesterKey, Partition]' = OrderedDict()
+        self.logger = logging.getLogger(__name__)
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        # 由狀態快照還原時重新建立已載入分區的 object 欄位，避免 API 的字串運算改寫共用的分區
+        self.__dict__.update(state)
+        for key, partition in self._loaded.items():
+            partition.index.meetings = own_object_columns(partition.index.meetings)
+            self._loaded[key] = partition._replace(courses=own_object_columns(partition.courses))
+
+    @classmethod
+    def open(cls, dataset_dir: Path, memory_budget: Optional[int] = None) -> 'PartitionedDataset':
+        manifest = json.loads((dataset_dir / MANIFEST_NAME).read_text(encoding='utf-8'))
+        return cls(manifest['partitions'], dataset_dir, memory_budget)
+
+    @classmethod
+    def from_tables(cls, tables: CourseTables, version: Optional[str] = None) -> 'PartitionedDataset':
+        courses, meetings = tables
+        section_ids = courses['section_id'].to_numpy()
+        meeting_sections = meetings['section_id'].to_numpy()
+        entries, partitions = [], {}
+        for key, start, end in semester_bounds(courses):
+            first_id, last_id = int(section_ids[start]), int(section_ids[end - 1])
+            entries.append({'year': key[0], 'semester': key[1], 'section_start': first_id, 'section_end': last_id + 1})
+            part_meetings = meetings[(meeting_sections >= first_id) & (meeting_sections <= last_id)]
+            partitions[key] = _make_partition(CourseTables(courses.iloc[start:end].copy(), part_meetings.copy()))
+        dataset = cls(entries, version=version)
+        dataset._loaded.update(partitions)
+        return dataset
+
+    @property
+    def latest_key(self) -> Optional[SemesterKey]:
+        return self.keys[-1] if self.keys else None
+
+    def __contains__(self, key: SemesterKey) -> bool:
+        return key in self.entries
+
+    def loaded_keys(self) -> List[SemesterKey]:
+        return list(self._loaded)
+
+    def memory_usage(self) -> int:
+        return sum(p.nbytes for p in self._loaded.values())
+
+    def _load(self, key: SemesterKey) -> Partition:
+        entry = self.entries[key]
+        courses = safe_read_csv(self.dataset_dir / entry['courses_file'])
+        meetings = safe_read_csv(self.dataset_dir / entry['meetings_file'])
+        if courses is None or meetings is None:
+            raise RuntimeError(f"讀取學期分區失敗：{key}")
+        return _make_partition(CourseTables(courses, meetings))
+
+    def _evict(self, keep: SemesterKey) -> None:
+        if self.memory_budget is None or self.dataset_dir is None:
+            return
+        for key in list(self._loaded):
+            if self.memory_usage() <= self.memory_budget:
+                break
+            if key in (keep, self.latest_key):
+                continue
+            del self._loaded[key]
+            self.logger.info(f"淘汰學期分區 {key}（已載入 {self.memory_usage() / 1e6:.1f} MB）")
+
+    def partition(self, key: SemesterKey) -> Optional[Partition]:
+        """取得學期分區（必要時讀檔），不存在時回傳 None"""
+        if key not in self.entries:
+            return None
+        partition = self._loaded.get(key)
+        if partition is None:
+            partition = self._load(key)
+            self._loaded[key] = partition
+            self.logger.info(f"載入學期分區 {key}：{len(partition.courses)} 筆（{partition.nbytes / 1e6:.1f} MB）")
+            self._evict(keep=key)
+        else:
+            self._loaded.move_to_end(key)
+        return partition
+
+    def courses(self, key: SemesterKey) -> Optional[pd.DataFrame]:
+        partition = self.partition(key)
+        return None if partition is None else partition.courses
+
+    def all_courses(self) -> pd.DataFrame:
+        """所有學期的課程列（由舊到新串接）；依序載入每個學期分區"""
+        return concat_courses([self.courses(key) for key in self.keys])
+
+    def iter_newest(self) -> Iterator[Tuple[SemesterKey, pd.DataFrame]]:
+        """由新到舊逐學期產生課程表，呼叫端可提早停止以免載入所有學期"""
+        for key in reversed(self.keys):
+            yield key, self.courses(key)
+
+    def lookup(self, section_ids: Sequence[int]) -> List[List[Dict[str, Any]]]:
+        """依 section_id 取得各開課班的上課時段（section_id 可跨學期）"""
+        section_ids = np.asarray(section_ids, dtype=np.int64)
+        result: List[List[Dict[str, Any]]] = [[] for _ in range(len(section_ids))]
+        if not len(section_ids) or not len(self._section_starts):
+            return result
+        owner = np.searchsorted(self._section_starts, section_ids, side='right') - 1
+        for i in np.unique(owner[owner >= 0]):
+            positions = np.flatnonzero(owner == i)
+            found = self.partition(self._section_keys[i]).index.lookup(section_ids[positions])
+            for pos, meetings in zip(positions, found):
+                result[pos] = meetings
+        return result
+
+    def rows(self, section_ids: Sequence[int]) -> pd.DataFrame:
+        """依 section_id 取得課程列（可跨學期，依傳入順序；不存在者略過）"""
+        section_ids = np.asarray(section_ids, dtype=np.int64)
+        if not len(section_ids) or not len(self._section_starts):
+            return pd.DataFrame()
+        owner = np.searchsorted(self._section_starts, section_ids, side='right') - 1
+        frames, order = [], []
+        for i in np.unique(owner[owner >= 0]):
+            positions = np.flatnonzero(owner == i)
+            courses = self.partition(self._section_keys[i]).courses
+            # 分區內課程表依 section_id 排序
+            ids = courses['section_id'].to_numpy()
+            found = np.searchsorted(ids, section_ids[positions]).clip(max=len(ids) - 1)
+            hit = ids[found] == section_ids[positions]
+            frames.append(courses.iloc[found[hit]])
+            order.append(positions[hit])
+        if not frames:
+            return pd.DataFrame()
+        result = concat_courses(frames)
+        return result.iloc[np.argsort(np.concatenate(order), kind='stable')].reset_index(drop=True)
@@ -0,0 +1,183 @@
+"""Make 式的增量流程 - 每個階段宣告依賴、輸入檔與輸出檔；輸入內容與上次成功執行時相同且輸出仍在時略過，
+依賴都完成的階段以行程池平行執行，結束時列出各階段狀態與耗時
+
+輸入以檔案內容雜湊比對（重新爬取但內容相同的原始檔不會觸發重新處理），
+上次成功執行時的輸入雜湊與階段回傳值（如 process 產生的資料集版本）記錄在狀態檔（PIPELINE_STATE_PATH）。
+階段的輸入/輸出與執行參數以各階段回傳值解析，輸出對應該次執行實際產生的檔案，而不是磁碟上最新的檔案。
+"""
+
+import hashlib
+import importlib
+import json
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+# 狀態檔格式改變時遞增，舊版狀態視為不存在（全部重新執行）
+PIPELINE_STATE_VERSION = 2
+
+RAN, SKIPPED, FAILED, BLOCKED = '執行', '略過', '失敗', '未執行'
+
+# 階段回傳值（階段名稱 -> 值），供其他階段解析輸入/輸出檔
+Values = Mapping[str, Any]
+PathsFn = Callable[[Values], List[Path]]
+
+
+def no_paths(values: Values) -> List[Path]:
+    return []
+
+
+def no_kwargs(values: Values) -> Dict[str, Any]:
+    return {}
+
+
+class Stage(NamedTuple):
+    name: str
+    target: str                                     # 'module:function'，於子行程匯入並呼叫
+    kwargs: Dict[str, Any]
+    deps: Tuple[str, ...] = ()
+    inputs: PathsFn = no_paths                      # 依賴完成後才解析（上游可能產生新時間戳的檔案）
+    outputs: PathsFn = no_paths                     # 皆存在才算成功；空清單視為沒有輸出
+    current: Optional[Callable[[Values], bool]] = None  # 輸出另有自己的有效性檢查時（如依來源檔時間戳失效的快照）
+    always: bool = False                            # 無法由輸入判斷是否變動（如爬蟲），每次都執行
+    bind: Callable[[Values], Dict[str, Any]] = no_kwargs  # 依上游回傳值解析、執行時併入 kwargs 的參數（如資料集版本）
+
+
+class StageResult(NamedTuple):
+    name: str
+    status: str
+    seconds: float
+    detail: str = ''
+
+
+def run_target(target: str, kwargs: Dict[str, Any]) -> Any:
+    """於子行程執行階段；拋出例外即為失敗，回傳值須可 JSON 序列化"""
+    module_name, func_name = target.split(':', 1)
+    return getattr(importlib.import_module(module_name), func_name)(**kwargs)
+
+
+class Pipeline:
+    def __init__(self, stages: Sequence[Stage], state_path: Path, jobs: int = 1, force: bool = False):
+        names = [s.name for s in stages]
+        unknown = {d for s in stages for d in s.deps} - set(names)
+        if unknown:
+            raise ValueError(f"未定義的依賴階段：{sorted(unknown)}")
+        self.stages = list(stages)
+        self.state_path = state_path
+        self.jobs = max(1, jobs)
+        self.force = force
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+
+    def _file_hash(self, path: Path) -> str:
+        stat = path.stat()
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        if key not in self._hashes:
+            digest = hashlib.sha1()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            self._hashes[key] = digest.hexdigest()
+        return self._hashes[key]
+
+    def fingerprint(self, paths: Sequence[Path]) -> str:
+        """輸入檔（名稱與內容）的雜湊；不存在的檔案以固定標記計入"""
+        digest = hashlib.sha1()
+        for path in sorted(paths):
+            content = self._file_hash(path) if path.is_file() else 'missing'
+            digest.update(f"{path.name}\0{content}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def load_state(self) -> Dict[str, Dict[str, Any]]:
+        if not self.state_path.exists():
+            return {}
+        try:
+            state = json.loads(self.state_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+        return state.get('stages', {}) if state.get('format_version') == PIPELINE_STATE_VERSION else {}
+
+    def save_state(self, stages: Dict[str, Dict[str, Any]]) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(self.state_path.name + '.tmp')
+        tmp_path.write_text(json.dumps({'format_version': PIPELINE_STATE_VERSION, 'stages': stages},
+                                       ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+        tmp_path.replace(self.state_path)
+
+    @staticmethod
+    def outputs_ready(stage: Stage, values: Values) -> bool:
+        paths = stage.outputs(values)
+        if not paths or not all(p.exists() for p in paths):
+            return False
+        return stage.current is None or stage.current(values)
+
+    def run(self) -> List[StageResult]:
+        state = self.load_state()
+        # 略過的階段沿用上次成功執行的回傳值，執行成功的階段以本次回傳值取代
+        values: Dict[str, Any] = {name: entry.get('value') for name, entry in state.items()}
+        pending = {s.name: s for s in self.stages}
+        results: Dict[str, StageResult] = {}
+        running: Dict[Any, Tuple[Stage, Optional[str], float]] = {}
+
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            while pending or running:
+                progressed = False
+                for name, stage in list(pending.items()):
+                    dep_status = [results[d].status if d in results else None for d in stage.deps]
+                    if any(s in (FAILED, BLOCKED) for s in dep_status):
+                        results[name] = StageResult(name, BLOCKED, 0.0, '上游階段失敗')
+                    elif all(s in (RAN, SKIPPED) for s in dep_status):
+                        fingerprint = None if stage.always else self.fingerprint(stage.inputs(values))
+                        if (not self.force and fingerprint is not None
+                                and state.get(name, {}).get('fingerprint') == fingerprint
+                                and self.outputs_ready(stage, values)):
+                            results[name] = StageResult(name, SKIPPED, 0.0, '輸入未變動')
+                        else:
+                            print(f"\n[{name}] 開始")
+                            future = pool.submit(run_target, stage.target, {**stage.kwargs, **stage.bind(values)})
+                            running[future] = (stage, fingerprint, time.perf_counter())
+                    else:
+                        continue
+                    del pending[name]
+                    progressed = True
+                if progressed and not running:
+                    continue
+                if not running:
+                    raise RuntimeError(f"無法排程的階段（依賴循環？）：{sorted(pending)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, fingerprint, started = running.pop(future)
+                    elapsed = time.perf_counter() - started
+                    # 失敗的階段不記錄輸入雜湊與回傳值，下次必定重新執行
+                    state.pop(stage.name, None)
+                    values.pop(stage.name, None)
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        logging.error(f"階段 {stage.name} 失敗: {e}")
+                        results[stage.name] = StageResult(stage.name, FAILED, elapsed, str(e))
+                        self.save_state(state)
+                        continue
+                    values[stage.name] = value
+                    if not self.outputs_ready(stage, values):
+                        values.pop(stage.name)
+                        results[stage.name] = StageResult(stage.name, FAILED, elapsed, '未產生輸出')
+                        self.save_state(state)
+                        continue
+                    results[stage.name] = StageResult(stage.name, RAN, elapsed)
+                    state[stage.name] = {'fingerprint': fingerprint, 'value': value}
+                    self.save_state(state)
+        return [results[s.name] for s in self.stages]
+
+
+def print_summary(results: Sequence[StageResult], wall_seconds: float) -> None:
+    print("\n流程摘要：")
+    width = max(len(r.name) for r in results) if results else 0
+    for r in results:
+        seconds = f"{r.seconds:8.2f}s" if r.status in (RAN, FAILED) else ' ' * 9
+        detail = f"  {r.detail}" if r.detail else ''
+        print(f"  {r.name:<{width}}  {r.status}  {seconds}{detail}")
+    total = sum(r.seconds for r in results)
+    print(f"  總耗時 {wall_seconds:.2f}s（各階段合計 {total:.2f}s）")
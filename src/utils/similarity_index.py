@@ -0,0 +1,52 @@
+"""相似課程索引 - 每個開課班預先計算的 top-k 相似開課班，以緊湊陣列儲存，查詢只需一次二分搜尋"""
+
+import numpy as np
+from pathlib import Path
+from typing import Optional, Tuple
+
+# 索引格式改變時遞增，舊版索引視為不存在
+SIMILARITY_INDEX_VERSION = 3
+
+
+class SimilarityIndex:
+    """section_ids 依序排列；neighbors[i] 為第 i 個開課班的相似開課班列位置（依相似度遞減，不足 k 個以 -1 補齊）；
+    params 為建立索引時的設定摘要"""
+
+    def __init__(self, section_ids: np.ndarray, neighbors: np.ndarray, scores: np.ndarray, params: str = ''):
+        self.section_ids = section_ids
+        self.neighbors = neighbors
+        self.scores = scores
+        self.params = params
+
+    def __len__(self) -> int:
+        return len(self.section_ids)
+
+    @property
+    def top_k(self) -> int:
+        return self.neighbors.shape[1]
+
+    def save(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, format_version=np.array(SIMILARITY_INDEX_VERSION), section_ids=self.section_ids,
+                     neighbors=self.neighbors, scores=self.scores, params=np.array(self.params))
+        tmp_path.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['SimilarityIndex']:
+        """讀取索引；格式版本不符時回傳 None"""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format_version']) != SIMILARITY_INDEX_VERSION:
+                return None
+            return cls(data['section_ids'], data['neighbors'], data['scores'], str(data['params']))
+
+    def similar(self, section_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """開課班的相似開課班 (section_ids, 相似度)，依相似度遞減；不在索引中時為空陣列"""
+        pos = int(np.searchsorted(self.section_ids, section_id))
+        if pos >= len(self.section_ids) or self.section_ids[pos] != section_id:
+            return np.empty(0, dtype=self.section_ids.dtype), np.empty(0, dtype=self.scores.dtype)
+        row = self.neighbors[pos]
+        valid = row >= 0
+        return self.section_ids[row[valid]], self.scores[pos][valid]
@@ -0,0 +1,163 @@
+"""合成課程資料產生器 - 依真實原始資料的分佈產生爬蟲格式的 courses_{學年}_{學期}.csv，供大規模壓力測試"""
+
+import logging
+import re
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from .io import safe_read_csv, safe_write_csv
+
+# 爬蟲輸出的欄位順序（網頁表頭 + 爬蟲補上的欄位）
+RAW_COLUMNS = [
+    '序號', '課程代碼', '開課班別(代表)', '課程名稱', '教學大綱Syllabus',
+    '課程性質', '課程性質2', '全英語授課', '學分', '教師姓名', '上課大樓',
+    '上課節次+地點', '上限人數', '登記人數', '選上人數', '可跨班', '備註',
+    '英文課程名稱', '教學大綱狀態', '教學大綱連結', '教師個人頁',
+]
+
+# 整列沿用真實課程的欄位（組合保持一致，例如班別與課程名稱、學分）
+TEMPLATE_COLUMNS = [
+    '開課班別(代表)', '課程名稱', '教學大綱Syllabus', '課程性質', '課程性質2', '全英語授課',
+    '學分', '上課大樓', '上限人數', '可跨班', '備註', '英文課程名稱', '教學大綱狀態',
+]
+
+MEETING_PATTERN = re.compile(r'\(([一二三四五六日])\)\s*([\d,\-]+)\s*(.*?)(?=\s*\([一二三四五六日]\)|$)')
+SYLLABUS_URL_PREFIX = "https://webap0.ncue.edu.tw/DEANV2/UploadDEAN/SUBJECT/{year}{semester}/"
+TEACHER_PAGE_URL_PREFIX = "https://webapss.ncue.edu.tw/Teacher/Reports/OB020.aspx?yms_year={year}&yms_sms={semester}&emp_id="
+
+# 每門課的教師人數分佈（1 位 / 2 位 / 3 位）
+TEACHER_COUNT_WEIGHTS = [0.82, 0.13, 0.05]
+
+
+def _distribution(values: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """回傳 (不重複值, 機率)"""
+    counts = pd.Series(list(values)).value_counts()
+    return counts.index.to_numpy(), (counts / counts.sum()).to_numpy()
+
+
+class CatalogProfile:
+    """由真實原始資料與教師字典擷取的分佈，產生器只依此抽樣"""
+
+    def __init__(self, raw_df: pd.DataFrame, teacher_names: Sequence[str]):
+        templates = raw_df.reindex(columns=TEMPLATE_COLUMNS).reset_index(drop=True)
+        self.templates = templates
+        self.teacher_names = np.array(sorted(set(teacher_names)), dtype=object)
+        if len(self.templates) == 0 or len(self.teacher_names) == 0:
+            raise ValueError("需要至少一筆原始資料與一位教師才能產生合成資料")
+
+        schedules = raw_df['上課節次+地點'].dropna().astype(str)
+        meetings = [m for text in schedules for m in MEETING_PATTERN.findall(text)]
+        counts_per_row = raw_df['上課節次+地點'].fillna('').astype(str).map(
+            lambda text: len(MEETING_PATTERN.findall(text))
+        )
+        self.meeting_counts = _distribution(counts_per_row)
+        self.days = _distribution([m[0] for m in meetings] or ['一'])
+        self.periods = _distribution([m[1] for m in meetings] or ['01-02'])
+        self.rooms = _distribution([m[2] for m in meetings] or [''])
+        self.missing_teacher_rate = float(raw_df['教師姓名'].isna().mean()) if '教師姓名' in raw_df else 0.0
+        self.syllabus_rate = float(raw_df['教學大綱連結'].notna().mean()) if '教學大綱連結' in raw_df else 0.0
+
+    @classmethod
+    def from_files(cls, raw_dir: Path, teacher_dict_path: Path) -> 'CatalogProfile':
+        frames = [df for df in (safe_read_csv(f) for f in sorted(raw_dir.glob('courses_*.csv'))) if df is not None]
+        if not frames:
+            raise RuntimeError(f"{raw_dir} 內找不到 courses_*.csv")
+        teachers = safe_read_csv(teacher_dict_path)
+        names = [] if teachers is None else teachers['teacher_name'].dropna().astype(str).tolist()
+        return cls(pd.concat(frames, ignore_index=True), names)
+
+
+def _sample(rng: np.random.Generator, distribution: Tuple[np.ndarray, np.ndarray], size: int) -> np.ndarray:
+    values, probs = distribution
+    return values[rng.choice(len(values), size=size, p=probs)]
+
+
+def _join_columns(columns: List[np.ndarray], sep: str) -> pd.Series:
+    """逐列以 sep 串接多個字串欄位，空字串略過"""
+    joined = pd.Series(columns[0], dtype=object)
+    for col in columns[1:]:
+        col = pd.Series(col, dtype=object)
+        joined = joined.where(col == '', joined.where(joined == '', joined + sep) + col)
+    return joined
+
+
+def _schedules(rng: np.random.Generator, profile: CatalogProfile, n: int) -> pd.Series:
+    """產生「(星期) 節次 地點」格式的上課節次+地點；無上課時段者為缺值"""
+    counts = _sample(rng, profile.meeting_counts, n).astype(int)
+    segments = []
+    for k in range(int(counts.max()) if n else 0):
+        day = _sample(rng, profile.days, n)
+        period = _sample(rng, profile.periods, n)
+        room = _sample(rng, profile.rooms, n)
+        segment = pd.Series('(' + day.astype(object) + ') ' + period.astype(object) + ' ' + room.astype(object))
+        segments.append(np.where(counts > k, segment.str.rstrip().to_numpy(), ''))
+    if not segments:
+        return pd.Series([np.nan] * n, dtype=object)
+    joined = _join_columns(segments, ' ')
+    return joined.where(joined != '', np.nan)
+
+
+def _teachers(rng: np.random.Generator, profile: CatalogProfile, n: int) -> pd.Series:
+    """由字典抽取 1~3 位教師並直接黏接（與原始網頁相同，不含分隔符）"""
+    counts = rng.choice(len(TEACHER_COUNT_WEIGHTS), size=n, p=TEACHER_COUNT_WEIGHTS) + 1
+    parts = []
+    for k in range(len(TEACHER_COUNT_WEIGHTS)):
+        names = profile.teacher_names[rng.integers(0, len(profile.teacher_names), size=n)]
+        parts.append(np.where(counts > k, names, ''))
+    joined = _join_columns(parts, '')
+    return joined.where(rng.random(n) >= profile.missing_teacher_rate, np.nan)
+
+
+def generate_semester(profile: CatalogProfile, n_rows: int, year: int, semester: int,
+                      rng: Optional[np.random.Generator] = None) -> pd.DataFrame:
+    """產生單一學期的原始資料（欄位與爬蟲輸出相同）"""
+    rng = rng if rng is not None else np.random.default_rng()
+    picked = rng.integers(0, len(profile.templates), size=n_rows)
+    df = profile.templates.iloc[picked].reset_index(drop=True)
+
+    df['序號'] = np.arange(1, n_rows + 1)
+    # 課程代碼為 5 位數，單學期超過 10 萬筆時必然重複（序號仍唯一）
+    codes = rng.permutation(100000)[:n_rows] if n_rows <= 100000 else rng.integers(0, 100000, size=n_rows)
+    df['課程代碼'] = pd.Series(codes).astype(str).str.zfill(5)
+    df['教師姓名'] = _teachers(rng, profile, n_rows)
+    df['上課節次+地點'] = _schedules(rng, profile, n_rows)
+
+    capacity = pd.to_numeric(df['上限人數'], errors='coerce').fillna(50).clip(lower=1).to_numpy(dtype='float64')
+    demand = rng.lognormal(mean=-0.1, sigma=0.6, size=n_rows)
+    df['上限人數'] = capacity.astype(int)
+    df['登記人數'] = np.where(rng.random(n_rows) < 0.19, 0, rng.poisson(capacity * demand)).astype(int)
+    df['選上人數'] = np.minimum(rng.poisson(capacity * np.minimum(demand, 1.0)), (capacity * 1.2).astype(int))
+
+    has_syllabus = rng.random(n_rows) < profile.syllabus_rate
+    suffixes = pd.Series(rng.integers(0, 10 ** 7, size=n_rows)).astype(str).str.zfill(7)
+    syllabus_prefix = SYLLABUS_URL_PREFIX.format(year=year, semester=semester)
+    df['教學大綱連結'] = np.where(has_syllabus, syllabus_prefix + df['課程代碼'] + '_1S' + suffixes + '.pdf', np.nan)
+    emp_ids = pd.Series(rng.integers(1, 2000, size=n_rows)).astype(str).str.zfill(7)
+    page_prefix = TEACHER_PAGE_URL_PREFIX.format(year=year, semester=semester)
+    df['教師個人頁'] = np.where(df['教師姓名'].notna(), page_prefix + emp_ids, np.nan)
+    return df[RAW_COLUMNS]
+
+
+def semester_sequence(start_year: int, count: int) -> Iterator[Tuple[int, int]]:
+    """自 start_year 第 1 學期起依序產生 count 個 (學年度, 學期)"""
+    for i in range(count):
+        yield start_year + i // 2, i % 2 + 1
+
+
+def write_synthetic_raw(profile: CatalogProfile, output_dir: Path, total_rows: int, semesters: int = 8,
+                        start_year: int = 100, seed: Optional[int] = None) -> List[Path]:
+    """將 total_rows 筆合成資料平均分配到 semesters 個學期並寫出 courses_*.csv"""
+    rng = np.random.default_rng(seed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    base, extra = divmod(total_rows, semesters)
+    paths = []
+    for i, (year, semester) in enumerate(semester_sequence(start_year, semesters)):
+        n_rows = base + (1 if i < extra else 0)
+        df = generate_semester(profile, n_rows, year, semester, rng)
+        path = output_dir / f"courses_{year}_{semester}.csv"
+        safe_write_csv(df, path)
+        paths.append(path)
+        logging.info(f"已產生 {path.name}：{n_rows} 筆")
+    return paths
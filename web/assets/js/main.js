@@ -615,10 +615,14 @@ async function handleSearchRecommend() {
         
         const dayMap = {'1':'一', '2':'二', '3':'三', '4':'四', '5':'五', '6':'六', '7':'日'};
         courses = courses.filter(course => {
-            const cDay = String(course.星期);
-            const isMatchNumeric = selectedDays.includes(cDay);
-            const isMatchChinese = selectedDays.some(d => dayMap[d] === cDay);
-            return isMatchNumeric || isMatchChinese;
+            // 所有上課時段都須落在選取的星期
+            const meetings = Array.isArray(course.meetings) && course.meetings.length > 0 ? course.meetings : [course];
+            return meetings.every(m => {
+                const cDay = String(m.星期);
+                const isMatchNumeric = selectedDays.includes(cDay);
+                const isMatchChinese = selectedDays.some(d => dayMap[d] === cDay);
+                return isMatchNumeric || isMatchChinese;
+            });
         });
 
         // 空堂過濾
@@ -738,10 +742,11 @@ function openHistoryModal(index) {
         // 處理多個時間地點
         let timeLocationHtml = '';
         
-        // 檢查是否有時間地點數組或字符串
-        if (Array.isArray(c.時間地點)) {
+        // 檢查是否有時間地點數組（API 的 meetings 或 時間地點）或字符串
+        const timeLocations = Array.isArray(c.meetings) && c.meetings.length > 0 ? c.meetings : c.時間地點;
+        if (Array.isArray(timeLocations)) {
             // 如果是數組，顯示所有時間地點
-            timeLocationHtml = c.時間地點.map((item, idx) => {
+            timeLocationHtml = timeLocations.map((item, idx) => {
                 const day = item.星期 || c.星期 || '?';
                 const start = item.起始節次 || c.起始節次 || '';
                 const end = item.結束節次 || c.結束節次 || '';
@@ -918,6 +923,34 @@ function renderHistoryChart(data) {
     });
 }
 
+// 課程（名稱+教師）的歷年平均中籤率與飽和度：優先使用 API 附上的預先計算特徵，舊版回應才在前端計算
+function groupCompetitionStats(group) {
+    const precomputed = group.data.find(item => item.historical_acceptance_rate != null);
+    if (precomputed) {
+        return {
+            rate: precomputed.historical_acceptance_rate,
+            sat: precomputed.historical_demand_ratio ?? 0,
+            count: precomputed.observed_sections || 1
+        };
+    }
+
+    let sumRate = 0, sumSaturation = 0, count = 0;
+    group.data.forEach(item => {
+        const reg = parseFloat(item.登記人數 || 0);
+        const limit = parseFloat(item.上限人數 || 0);
+        if (reg > 0 && limit > 0) {
+            sumRate += Math.min(limit / reg, 1);
+            sumSaturation += reg / limit;
+            count++;
+        }
+    });
+    return {
+        rate: count > 0 ? sumRate / count : 0,
+        sat: count > 0 ? sumSaturation / count : 0,
+        count
+    };
+}
+
 function displayHistoryResults(courses, query) {
     const container = document.getElementById('history-results-container');
     const title = document.getElementById('history-search-title');
@@ -969,23 +1002,10 @@ function displayHistoryResults(courses, query) {
     // 3. 排序邏輯
     historyGroupsCache.sort((a, b) => {
         const getStats = (group) => {
-            let sRateSum = 0, sSatSum = 0, vCount = 0;
-            group.data.forEach(item => {
-                const reg = parseFloat(item.登記人數 || 0);
-                const limit = parseFloat(item.上限人數 || 0); 
-
-                if (reg > 0 && limit > 0) {
-                    let rate = limit / reg;
-                    if (rate > 1) rate = 1;
-                    
-                    sRateSum += rate;
-                    sSatSum += (reg / limit);
-                    vCount++;
-                }
-            });
+            const stats = groupCompetitionStats(group);
             return {
-                rate: vCount > 0 ? (sRateSum / vCount) : 0, 
-                sat: vCount > 0 ? (sSatSum / vCount) : -1
+                rate: stats.count > 0 ? stats.rate : 0,
+                sat: stats.count > 0 ? stats.sat : -1
             };
         };
 
@@ -1005,28 +1025,13 @@ function displayHistoryResults(courses, query) {
     // 4. 渲染邏輯
     if (container) {
         container.innerHTML = historyGroupsCache.map((group, index) => {
-            let sumRate = 0;
-            let sumSaturation = 0;
-            let validCount = 0;
-
-            group.data.forEach(item => {
-                const reg = parseFloat(item.登記人數 || 0);
-                const limit = parseFloat(item.上限人數 || 0);
-
-                if (reg > 0 && limit > 0) {
-                    let rate = limit / reg;
-                    if (rate > 1) rate = 1;
-                    sumRate += rate;
-
-                    sumSaturation += (reg / limit);
-                    validCount++;
-                }
-            });
+            const stats = groupCompetitionStats(group);
+            const validCount = stats.count;
 
-            const avgRate = validCount > 0 ? (sumRate / validCount) : 0;
+            const avgRate = validCount > 0 ? stats.rate : 0;
             const avgRatePercent = (avgRate * 100).toFixed(0);
             
-            const avgSat = validCount > 0 ? (sumSaturation / validCount) : 0;
+            const avgSat = validCount > 0 ? stats.sat : 0;
             const avgSatPercent = (avgSat * 100).toFixed(0);
             
             let badgesHtml = '';
@@ -1,6 +1,6 @@
 import { WEEKDAYS, WEEKDAY_MAP, PERIOD_TIMES, PERIOD_ORDER } from './config.js';
 import { state } from './state.js';
-import { checkTimeConflict } from './utils.js';
+import { checkTimeConflict, getCourseMeetings } from './utils.js';
 
 export function showAlert(message, type = 'info') {
     const iconMap = { info: 'info', success: 'success', warning: 'warning', danger: 'error', error: 'error' };
@@ -49,68 +49,66 @@ export function updateScheduleDisplay() {
     });
     
     state.selectedCourses.forEach(course => {
-        const day = WEEKDAY_MAP[course.星期] || parseInt(course.星期);
-        const startPeriod = parseInt(course.起始節次);
-        const endPeriod = parseInt(course.結束節次);
-        
-        if (day && startPeriod && endPeriod) {
-            const coveredPeriods = [];
-            for (let p = startPeriod; p <= endPeriod; p++) {
-                coveredPeriods.push(p);
-            }
+        getCourseMeetings(course).forEach(({ day, startPeriod, endPeriod, location }) => {
+            if (day && startPeriod && endPeriod) {
+                const coveredPeriods = [];
+                for (let p = startPeriod; p <= endPeriod; p++) {
+                    coveredPeriods.push(p);
+                }
             
-            const groups = [];
-            let currentGroup = [];
+                const groups = [];
+                let currentGroup = [];
             
-            coveredPeriods.forEach(p => {
-                const pIndex = PERIOD_ORDER.indexOf(p);
-                if (pIndex === -1) return;
+                coveredPeriods.forEach(p => {
+                    const pIndex = PERIOD_ORDER.indexOf(p);
+                    if (pIndex === -1) return;
                 
-                if (currentGroup.length === 0) {
-                    currentGroup.push(p);
-                } else {
-                    const lastP = currentGroup[currentGroup.length - 1];
-                    const lastIndex = PERIOD_ORDER.indexOf(lastP);
-                    if (pIndex === lastIndex + 1) {
+                    if (currentGroup.length === 0) {
                         currentGroup.push(p);
                     } else {
-                        groups.push(currentGroup);
-                        currentGroup = [p];
+                        const lastP = currentGroup[currentGroup.length - 1];
+                        const lastIndex = PERIOD_ORDER.indexOf(lastP);
+                        if (pIndex === lastIndex + 1) {
+                            currentGroup.push(p);
+                        } else {
+                            groups.push(currentGroup);
+                            currentGroup = [p];
+                        }
                     }
-                }
-            });
-            if (currentGroup.length > 0) groups.push(currentGroup);
+                });
+                if (currentGroup.length > 0) groups.push(currentGroup);
 
-            groups.forEach(group => {
-                const firstP = group[0];
-                const span = group.length;
-                const cell = document.querySelector(`td[data-day="${day}"][data-period="${firstP}"]`);
+                groups.forEach(group => {
+                    const firstP = group[0];
+                    const span = group.length;
+                    const cell = document.querySelector(`td[data-day="${day}"][data-period="${firstP}"]`);
                 
-                if (cell) {
-                    cell.rowSpan = span;
+                    if (cell) {
+                        cell.rowSpan = span;
                     
-                    let courseType = 'course-elective';
-                    if (course.課程性質?.includes('必修')) courseType = 'course-required';
-                    else if (course.課程性質?.match(/通識/)) courseType = 'course-general';
-                    else if (course.課程性質?.match(/國文|英文/)) courseType = 'course-language';
+                        let courseType = 'course-elective';
+                        if (course.課程性質?.includes('必修')) courseType = 'course-required';
+                        else if (course.課程性質?.match(/通識/)) courseType = 'course-general';
+                        else if (course.課程性質?.match(/國文|英文/)) courseType = 'course-language';
                     
-                    cell.className = `schedule-cell ${courseType}`;
-                    cell.innerHTML = `
-                        <div class="course-name">${course.課程名稱 || course.中文課程名稱 || ''}</div>
-                        <div class="course-teacher">${course.教師姓名 || ''}</div>
-                        <div class="course-info">${course.上課地點 || ''}</div>
-                    `;
+                        cell.className = `schedule-cell ${courseType}`;
+                        cell.innerHTML = `
+                            <div class="course-name">${course.課程名稱 || course.中文課程名稱 || ''}</div>
+                            <div class="course-teacher">${course.教師姓名 || ''}</div>
+                            <div class="course-info">${location}</div>
+                        `;
                     
-                    cell.onclick = () => window.showCourseDetail(course);
+                        cell.onclick = () => window.showCourseDetail(course);
                     
-                    for (let i = 1; i < group.length; i++) {
-                        const nextP = group[i];
-                        const nextCell = document.querySelector(`td[data-day="${day}"][data-period="${nextP}"]`);
-                        if (nextCell) nextCell.style.display = 'none';
+                        for (let i = 1; i < group.length; i++) {
+                            const nextP = group[i];
+                            const nextCell = document.querySelector(`td[data-day="${day}"][data-period="${nextP}"]`);
+                            if (nextCell) nextCell.style.display = 'none';
+                        }
                     }
-                }
-            });
-        }
+                });
+            }
+        });
     });
 
     renderScheduleCards();
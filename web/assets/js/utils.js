@@ -25,27 +25,33 @@ export function isCourseSelected(course) {
     );
 }
 
-// 檢查時間衝突
+// 取得課程的所有上課時段（API 的 meetings；舊資料退回單一扁平欄位）
+export function getCourseMeetings(course) {
+    const meetings = Array.isArray(course.meetings) && course.meetings.length > 0 ? course.meetings : [course];
+    return meetings.map(m => ({
+        day: WEEKDAY_MAP[m.星期] || parseInt(m.星期),
+        startPeriod: parseInt(m.起始節次),
+        endPeriod: parseInt(m.結束節次),
+        location: m.上課地點 || ''
+    })).filter(m => m.day && m.startPeriod && m.endPeriod);
+}
+
+// 檢查時間衝突（任一上課時段衝突即視為衝突）
 export function checkTimeConflict(course) {
-    const day = WEEKDAY_MAP[course.星期] || parseInt(course.星期);
-    if (!day) return { hasConflict: false };
-    
-    const startPeriod = parseInt(course.起始節次);
-    const endPeriod = parseInt(course.結束節次);
-    
-    if (startPeriod && endPeriod) {
-        for (let p = startPeriod; p <= endPeriod; p++) {
-            if (state.currentSchedule[day] && state.currentSchedule[day][p]) {
+    const meetings = getCourseMeetings(course);
+    for (const m of meetings) {
+        for (let p = m.startPeriod; p <= m.endPeriod; p++) {
+            if (state.currentSchedule[m.day] && state.currentSchedule[m.day][p]) {
                 // 回傳衝突的具體課程物件
                 return { 
                     hasConflict: true, 
-                    day, 
-                    conflictingCourse: state.currentSchedule[day][p] 
+                    day: m.day, 
+                    conflictingCourse: state.currentSchedule[m.day][p] 
                 };
             }
         }
     }
-    return { hasConflict: false, day, startPeriod, endPeriod };
+    return { hasConflict: false, meetings };
 }
 
 // 將傳入的課程物件規範化為前端期望的欄位
@@ -90,12 +96,12 @@ export function addCourseToState(course) {
     
     state.selectedCourses.push(c);
     
-    if (check.startPeriod && check.endPeriod) {
-        for (let p = check.startPeriod; p <= check.endPeriod; p++) {
-            if (!state.currentSchedule[check.day]) state.currentSchedule[check.day] = {};
-            state.currentSchedule[check.day][p] = c;
+    check.meetings.forEach(m => {
+        for (let p = m.startPeriod; p <= m.endPeriod; p++) {
+            if (!state.currentSchedule[m.day]) state.currentSchedule[m.day] = {};
+            state.currentSchedule[m.day][p] = c;
         }
-    }
+    });
     return true;
 }
 
@@ -120,20 +126,16 @@ export function removeCourseFromState(courseCode, serial) {
         !(String(c.課程代碼) === sCode && String(c.序號) === sSerial)
     );
     
-    // 從課表視圖中移除 (清除佔用的時段)
-    const day = WEEKDAY_MAP[course.星期] || parseInt(course.星期);
-    if (day && state.currentSchedule[day]) {
-        const startPeriod = parseInt(course.起始節次);
-        const endPeriod = parseInt(course.結束節次);
-        if (startPeriod && endPeriod) {
-            for (let p = startPeriod; p <= endPeriod; p++) {
-                if (state.currentSchedule[day][p] && 
-                    String(state.currentSchedule[day][p].課程代碼) === sCode && 
-                    String(state.currentSchedule[day][p].序號) === sSerial) {
-                    delete state.currentSchedule[day][p];
-                }
+    // 從課表視圖中移除 (清除所有上課時段佔用的節次)
+    getCourseMeetings(course).forEach(m => {
+        if (!state.currentSchedule[m.day]) return;
+        for (let p = m.startPeriod; p <= m.endPeriod; p++) {
+            if (state.currentSchedule[m.day][p] && 
+                String(state.currentSchedule[m.day][p].課程代碼) === sCode && 
+                String(state.currentSchedule[m.day][p].序號) === sSerial) {
+                delete state.currentSchedule[m.day][p];
             }
         }
-    }
+    });
     return true;
 }
\ No newline at end of file